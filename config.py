@@ -193,6 +193,43 @@ PLACEHOLDER_POST_NUM = "Post #"
 PLACEHOLDER_KEYWORD = "Search anything to filter posts"
 # --- END PLACEHOLDER_TEXTS ---
 
+# --- START LIVE_SEARCH_CONFIG ---
+# Search-as-you-type waits this long after the last keystroke before searching
+LIVE_SEARCH_DELAY_MS = 250
+# --- END LIVE_SEARCH_CONFIG ---
+
+# --- START POST_LIST_CONFIG ---
+# While a navigation key auto-repeats, the post list only previews each post
+# and fully renders the one it rests on this long after the last key press
+KEY_NAV_SETTLE_MS = 120
+# --- END POST_LIST_CONFIG ---
+
+# --- START SEARCH_CACHE_CONFIG ---
+# Number of distinct searches whose result rows are kept for instant repeats
+SEARCH_CACHE_SIZE = 64
+# --- END SEARCH_CACHE_CONFIG ---
+
+# --- START RENDER_CACHE_CONFIG ---
+# Number of posts whose built detail-pane content is kept for instant redisplay
+RENDER_CACHE_SIZE = 32
+# --- END RENDER_CACHE_CONFIG ---
+
+# --- START THUMBNAIL_CACHE_CONFIG ---
+# Number of decoded image thumbnails kept in memory; the thumbnails themselves are cached in THUMBNAIL_DIR
+THUMBNAIL_CACHE_SIZE = 128
+# Worker threads decoding and resizing images off the Tk main thread
+IMAGE_DECODE_WORKERS = 2
+# --- END THUMBNAIL_CACHE_CONFIG ---
+
+# --- START PREFETCH_CONFIG ---
+# While the UI is idle, the posts within PREFETCH_RADIUS of the current one are rendered and their images decoded ahead
+PREFETCH_RADIUS = 3
+# Idle time (ms) after the last user input before prefetching starts
+PREFETCH_DELAY_MS = 150
+# Most decoded image memory (MB) one prefetch round may add
+PREFETCH_MEMORY_BUDGET_MB = 16
+# --- END PREFETCH_CONFIG ---
+
 # --- START ARTICLE_DOWNLOAD_CONFIG ---
 # LINKED_ARTICLES_DIR_NAME is now just a name, full path is LINKED_ARTICLES_DIR
 EXCLUDED_LINK_DOMAINS = [
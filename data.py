@@ -1,13 +1,20 @@
+import numpy as np
 import pandas as pd
+import datetime
+import hashlib
 import json
 import os
 import pickle
 import time
 from collections import defaultdict
 import re
+import threading
 
 import config
+import matcher
+import search
 import symbols
+import utils
 
 # --- Global variables ---
 # These dictionaries store the pre-computed relationships between posts.
@@ -24,10 +31,10 @@ quoted_by_map = defaultdict(list)
 # Maps a text marker (e.g., "[Marker]") to a list of posts containing it.
 marker_posts_map = defaultdict(list)
 
-# Maps a time (HH:MM) to a list of posts made at that time (for deltas).
+# Maps a minute of the day (hour * 60 + minute) to the posts made in it (for deltas).
 post_time_hhmm_map = defaultdict(list)
 
-# Maps a time (HH:MM:SS) to a list of posts (for time mirrors).
+# Maps a second of the day to the posts made in it (for time mirrors).
 post_time_hhmmss_map = defaultdict(list)
 
 # Maps a stock symbol/ticker to its aliases and description.
@@ -39,108 +46,442 @@ symbol_timeline = {}
 # Stores a separate day-by-day count for each individual symbol.
 per_symbol_timeline = {}
 
-def pre_load_indices(df):
+# Dense form of the symbol timelines: symbol_day_matrix[i, d] counts the posts
+# mentioning symbol_names[i] on day symbol_day_start + d, and
+# symbol_day_totals[d] the posts mentioning any symbol that day.
+symbol_names = []
+symbol_day_start = None
+symbol_day_matrix = np.zeros((0, 0), dtype=np.int32)
+symbol_day_totals = np.zeros(0, dtype=np.int32)
+
+# Dense post number -> DataFrame row position lookup; -1 marks numbers with no post.
+post_number_rows = np.zeros(0, dtype=np.int32)
+
+# Abbreviation spans of each row's Text in CSR form: the (start, end) spans of
+# row r are abbreviation_spans[abbreviation_span_starts[r]:abbreviation_span_starts[r + 1]].
+abbreviation_span_starts = np.zeros(1, dtype=np.int32)
+abbreviation_spans = np.zeros((0, 2), dtype=np.int32)
+
+# URLs in each row's Text (config.URL_REGEX matches, NUL characters removed), in
+# the same CSR form: url_spans holds their (start, end) spans, url_texts the
+# matched strings and url_domains their domains, all aligned.
+url_span_starts = np.zeros(1, dtype=np.int32)
+url_spans = np.zeros((0, 2), dtype=np.int32)
+url_texts = []
+url_domains = []
+
+# Maps a linked domain to the post numbers linking to it.
+domain_posts_map = defaultdict(list)
+
+# Domain timelines, like the symbol ones: domain_day_matrix[i, d] counts the
+# posts linking to domain_names[i] on day domain_day_start + d. domain_names is
+# ordered by number of linking posts, most linked first.
+domain_names = []
+domain_day_start = None
+domain_day_matrix = np.zeros((0, 0), dtype=np.int32)
+
+# Positional inverted index over Text, Tripcode and Author (see search.py).
+search_index = None
+
+# --- Index store ---
+# Bump DATAFRAME_SCHEMA_VERSION whenever the parsed columns change, and
+# INDEX_SCHEMA_VERSION whenever the shape of any index below changes, so
+# caches written by an older build are rebuilt instead of misread.
+DATAFRAME_SCHEMA_VERSION = 2
+INDEX_SCHEMA_VERSION = 16
+
+# The module-level indices persisted in the index store.
+INDEX_NAMES = (
+    'theme_posts_map', 'post_quotes_map', 'quoted_by_map', 'marker_posts_map',
+    'post_time_hhmm_map', 'post_time_hhmmss_map',
+    'symbol_map', 'symbol_timeline', 'per_symbol_timeline',
+    'symbol_names', 'symbol_day_start', 'symbol_day_matrix', 'symbol_day_totals',
+    'post_number_rows', 'abbreviation_span_starts', 'abbreviation_spans',
+    'url_span_starts', 'url_spans', 'url_texts', 'url_domains', 'domain_posts_map',
+    'domain_names', 'domain_day_start', 'domain_day_matrix', 'search_index',
+)
+
+# Indices left out of the cold build. Their text scans take most of the build
+# time and no view needs them before a post is opened or a search runs, so
+# _build_deferred_indices makes them on first use (see ensure_deferred_indices)
+# and they are added to the index store then.
+DEFERRED_INDEX_NAMES = (
+    'abbreviation_span_starts', 'abbreviation_spans',
+    'url_span_starts', 'url_spans', 'url_texts', 'url_domains', 'domain_posts_map',
+    'domain_names', 'domain_day_start', 'domain_day_matrix', 'search_index',
+)
+
+# (DataFrame, fingerprint) the deferred indices are still to be built from, or None once they exist.
+_deferred_source = None
+_deferred_lock = threading.Lock()
+
+def minute_of_day(timestamp):
+    """Returns the post_time_hhmm_map key (minutes since midnight) for a timestamp."""
+    return timestamp.hour * 60 + timestamp.minute
+
+def second_of_day(timestamp):
+    """Returns the post_time_hhmmss_map key (seconds since midnight) for a timestamp."""
+    return (timestamp.hour * 60 + timestamp.minute) * 60 + timestamp.second
+
+def row_for_post_number(post_number):
+    """Returns the DataFrame row position of a post number, or None if there is no such post."""
+    try:
+        post_number = int(post_number)
+    except (TypeError, ValueError):
+        return None
+    if 0 <= post_number < len(post_number_rows) and post_number_rows[post_number] >= 0:
+        return int(post_number_rows[post_number])
+    return None
+
+def abbreviation_spans_for_row(row):
+    """Returns the precomputed (start, end) abbreviation spans of a row's Text, or None if the row is unknown."""
+    ensure_deferred_indices()
+    if not 0 <= row < len(abbreviation_span_starts) - 1:
+        return None
+    return [tuple(span) for span in abbreviation_spans[abbreviation_span_starts[row]:abbreviation_span_starts[row + 1]].tolist()]
+
+def _build_abbreviation_spans(df):
+    """
+    Finds the abbreviations in every row's Text (as the detail pane shows it,
+    NUL characters removed) and packs the spans into the CSR pair.
     """
-    Creates and caches various dictionaries from the main DataFrame
-    to speed up lookups in the GUI.
+    text = df['Text'].where(df['Text'].notna(), '').astype(str).str.replace('\x00', '', regex=False)
+    per_row = [matcher.find_abbreviation_spans(t) for t in text]
+    starts = np.zeros(len(per_row) + 1, dtype=np.int32)
+    starts[1:] = np.cumsum([len(spans) for spans in per_row])
+    spans = np.array([span for row_spans in per_row for span in row_spans], dtype=np.int32).reshape(-1, 2)
+    return {'abbreviation_span_starts': starts, 'abbreviation_spans': spans}
+
+def url_spans_for_row(row):
+    """Returns the precomputed (start, end) URL spans of a row's Text, or None if the row is unknown."""
+    ensure_deferred_indices()
+    if row is None or not 0 <= row < len(url_span_starts) - 1:
+        return None
+    return [tuple(span) for span in url_spans[url_span_starts[row]:url_span_starts[row + 1]].tolist()]
+
+def urls_for_row(row):
+    """Returns the URLs in a row's Text, in order of appearance."""
+    ensure_deferred_indices()
+    if row is None or not 0 <= row < len(url_span_starts) - 1:
+        return []
+    return url_texts[url_span_starts[row]:url_span_starts[row + 1]]
+
+def row_has_url(row):
+    """Returns whether a row's Text contains a URL."""
+    ensure_deferred_indices()
+    return row is not None and 0 <= row < len(url_span_starts) - 1 and url_span_starts[row + 1] > url_span_starts[row]
+
+def url_domain(url):
+    """Returns the lowercased domain of a URL; scheme-less matches like "www.x.com/a" are read as http."""
+    if not re.match(r'(?i)[a-z][a-z0-9+.\-]*://', url):
+        url = "http://" + url
+    return utils.get_domain(url).lower()
+
+def _build_url_index(df):
     """
-    global post_time_hhmm_map, post_time_hhmms_map, post_quotes_map, post_quoted_by_map, post_markers_map, theme_posts_map, symbol_map, symbol_timeline, per_symbol_timeline
+    Extracts the URLs of every row's Text in one pass and returns the url_*
+    and domain_* index entries.
+    """
+    text = df['Text'].where(df['Text'].notna(), '').astype(str).str.replace('\x00', '', regex=False)
+    starts = np.zeros(len(text) + 1, dtype=np.int32)
+    spans, texts = [], []
+    for row, row_text in enumerate(text):
+        # Every URL match holds a "/" or starts with "www", so other rows can skip the regex
+        if '/' not in row_text and 'www' not in row_text.lower():
+            starts[row + 1] = len(spans)
+            continue
+        for match in config.URL_REGEX.finditer(row_text):
+            spans.append(match.span())
+            texts.append(match.group(0))
+        starts[row + 1] = len(spans)
+    # URLs repeat across posts; parse each distinct one once
+    domain_of = {url: url_domain(url) for url in set(texts)}
+    domains = [domain_of[url] for url in texts]
+
+    # One entry per (domain, post), in row order
+    post_numbers = df['Post Number'].to_numpy(dtype=float, na_value=np.nan)
+    url_rows = np.repeat(np.arange(len(text)), np.diff(starts))
+    pairs = pd.DataFrame({'domain': domains, 'row': url_rows})
+    pairs['pn'] = post_numbers[url_rows] if len(url_rows) else []
+    pairs = pairs[pairs['pn'].notna() & (pairs['domain'] != '')].drop_duplicates()
+
+    # Day-by-day counts per domain, on the same day axis as the symbol timelines
+    day_start, n_days, day_offsets = _day_axis(df['Datetime_UTC'][df['Post Number'].notna()].dropna())
+    domain_counts = pairs['domain'].value_counts(sort=False)
+    domain_names = sorted(domain_counts.index, key=lambda domain: (-domain_counts[domain], domain))
+    day_matrix = np.zeros((len(domain_names), n_days), dtype=np.int32)
+    timestamps = df['Datetime_UTC'].to_numpy()[pairs['row'].to_numpy()]
+    timed = ~pd.isna(timestamps)
+    if n_days and timed.any():
+        codes = pd.Index(domain_names).get_indexer(pairs['domain'].to_numpy()[timed])
+        days = (pd.DatetimeIndex(timestamps[timed]).normalize() - pd.Timestamp(day_start)).days.to_numpy()
+        np.add.at(day_matrix, (codes, days), 1)
+
+    return {
+        'url_span_starts': starts,
+        'url_spans': np.array(spans, dtype=np.int32).reshape(-1, 2),
+        'url_texts': texts,
+        'url_domains': domains,
+        'domain_posts_map': _group_to_lists(pairs['domain'].to_numpy(dtype=object), pairs['pn'].to_numpy(dtype=np.int64)),
+        'domain_names': domain_names,
+        'domain_day_start': day_start,
+        'domain_day_matrix': day_matrix,
+    }
+
+def _build_post_number_rows(df):
+    """Builds the dense post number -> row position array. The first row wins for duplicate numbers."""
+    numbers = df['Post Number'].to_numpy(dtype=float, na_value=np.nan)
+    valid = np.flatnonzero(~np.isnan(numbers) & (numbers >= 0))
+    if len(valid) == 0:
+        return np.zeros(0, dtype=np.int32)
+    numbers = numbers[valid].astype(np.int64)
+    rows = np.full(numbers.max() + 1, -1, dtype=np.int32)
+    # Assign in reverse so the first occurrence of a number is the one kept
+    rows[numbers[::-1]] = valid[::-1]
+    return rows
+
+def _group_to_lists(keys, values):
+    """Groups values by key into a plain {key: [values...]} dict, keeping row order within each key."""
+    keys, values = np.asarray(keys), np.asarray(values)
+    if len(keys) == 0:
+        return {}
+    order = np.argsort(keys, kind='stable')
+    sorted_keys = keys[order]
+    starts = np.flatnonzero(sorted_keys[1:] != sorted_keys[:-1]) + 1
+    # Slicing one converted list is much cheaper than converting one array per group
+    sorted_values = values[order].tolist()
+    bounds = zip(np.r_[0, starts].tolist(), np.r_[starts, len(keys)].tolist())
+    return dict(zip(sorted_keys[np.r_[0, starts]].tolist(), (sorted_values[start:end] for start, end in bounds)))
+
+def _extract_per_post(text, post_numbers, pattern, literal):
+    """
+    Finds every capture of pattern (one group) in the Text column and
+    returns two aligned arrays (post number, captured string), with repeats
+    of the same capture inside a single post dropped. Every match of pattern
+    contains literal, so a vectorized substring test first picks the rows
+    worth running the regex on.
+    """
+    regex = re.compile(pattern)
+    rows = np.flatnonzero(text.str.contains(literal, regex=False).to_numpy()).tolist()
+    captures = [(row, value) for row, row_text in zip(rows, text.iloc[rows]) for value in regex.findall(row_text)]
+    if not captures:
+        return np.array([], dtype=np.int64), np.array([], dtype=object)
+    found = pd.DataFrame({
+        'pn': post_numbers[[row for row, _ in captures]],
+        'value': np.array([value for _, value in captures], dtype=object),
+    }).drop_duplicates()
+    return found['pn'].to_numpy(), found['value'].to_numpy()
 
-    # --- 1. Time-based Maps ---
-    post_time_hhmm_map = defaultdict(list)
-    post_time_hhmms_map = defaultdict(list)
-    
-    for _, row in df.dropna(subset=['Datetime_UTC', 'Post Number']).iterrows():
-        dt = row['Datetime_UTC']
-        pn = int(row['Post Number'])
-        post_time_hhmm_map[dt.strftime('%H:%M')].append(pn)
-        post_time_hhmms_map[dt.strftime('%H:%M:%S')].append(pn)
+def _build_indices(df):
+    """
+    Builds every index but the deferred ones from the DataFrame in one
+    vectorized stage and returns them as a {global name: map} dict. Each map
+    is filled by whole-column operations, with regexes only run on the rows
+    a substring test lets through, so the cost grows linearly with the
+    number of posts.
+    """
+    posts = df[df['Post Number'].notna()]
+    post_numbers = posts['Post Number'].to_numpy(dtype=np.int64)
+    # Positional index so a row position maps straight onto post_numbers
+    text = posts['Text'].where(posts['Text'].notna(), '').astype(str).reset_index(drop=True)
+
+    # --- 1. Time-based Maps (integer minute/second-of-day keys) ---
+    timestamps = posts['Datetime_UTC']
+    has_time = timestamps.notna().to_numpy()
+    timed = timestamps[has_time]
+    timed_pns = post_numbers[has_time]
+    minutes = (timed.dt.hour * 60 + timed.dt.minute).to_numpy()
+    seconds = minutes * 60 + timed.dt.second.to_numpy()
 
     # --- 2. Quote-based Maps ---
-    post_quotes_map = defaultdict(list)
-    post_quoted_by_map = defaultdict(list)
-    
-    for _, row in df.dropna(subset=['Post Number', 'Text']).iterrows():
-        current_pn = int(row['Post Number'])
-        text = str(row['Text'])
-        
-        # Find all quotes this post makes (e.g., >>12345)
-        quoted_posts = set(re.findall(r'>>(\d+)', text))
-        for quoted_pn_str in quoted_posts:
-            try:
-                quoted_pn_int = int(quoted_pn_str)
-                post_quotes_map[current_pn].append(quoted_pn_int)
-                post_quoted_by_map[quoted_pn_int].append(current_pn)
-            except ValueError:
-                continue
+    quoting_pns, quoted = _extract_per_post(text, post_numbers, r'>>(\d+)', '>>')
+    quoted = quoted.astype(np.int64)
 
     # --- 3. Marker-based Map ---
-    post_markers_map = defaultdict(list)
-    for _, row in df.dropna(subset=['Post Number', 'Text']).iterrows():
-        current_pn = int(row['Post Number'])
-        text = str(row['Text'])
-        markers = set(re.findall(r'\[([^\]]+)\]', text))
-        for marker in markers:
-            post_markers_map[marker.strip()].append(current_pn)
+    marker_pns, markers = _extract_per_post(text, post_numbers, r'\[([^\]]+)\]', '[')
+    markers = pd.Series(markers, dtype=object).str.strip()
+    non_empty = (markers != '').to_numpy()
 
     # --- 4. Theme-based Map ---
-    theme_posts_map = defaultdict(list)
-    if 'Themes' in df.columns:
-        for _, row in df.dropna(subset=['Post Number', 'Themes']).iterrows():
-            current_pn = int(row['Post Number'])
-            themes_list = row['Themes']
-            if isinstance(themes_list, list):
-                for theme in themes_list:
-                    theme_posts_map[theme].append(current_pn)
+    theme_keys, theme_pns = [], []
+    if 'Themes' in posts.columns:
+        themes = pd.Series(posts['Themes'].to_numpy(), index=post_numbers).explode().dropna()
+        theme_keys, theme_pns = themes.to_numpy(), themes.index.to_numpy()
 
     # --- 5. Symbol-based Maps ---
-    symbol_map = {}
-    if os.path.exists(config.SYMBOLS_FILE_PATH):
-        try:
-            with open(config.SYMBOLS_FILE_PATH, 'r', encoding='utf-8') as f:
-                symbol_map = json.load(f)
-        except Exception as e:
-            print(f"Error loading symbols file: {e}")
-            
-    symbol_timeline = defaultdict(int)
-    per_symbol_timeline = defaultdict(lambda: defaultdict(int))
-    
-    if 'Text' in df.columns and not df.empty:
-        for _, row in df.dropna(subset=['Datetime_UTC', 'Text']).iterrows():
-            date_key = row['Datetime_UTC'].date()
-            text_lower = str(row['Text']).lower()
-            found_symbol_in_post = False
-            for symbol, data in symbol_map.items():
-                all_terms = [symbol.lower()] + [alias.lower() for alias in data.get("aliases", [])]
-                if any(term in text_lower for term in all_terms):
-                    per_symbol_timeline[symbol][date_key] += 1
-                    found_symbol_in_post = True
-            if found_symbol_in_post:
-                symbol_timeline[date_key] += 1
-                
-    # --- Caching Logic (if you want to re-enable it) ---
-    # try:
-    #     with open(config.INDICES_CACHE_PATH, 'wb') as f:
-    #         pickle.dump({
-    #             "post_time_hhmm_map": post_time_hhmm_map,
-    #             "post_time_hhmms_map": post_time_hhmms_map,
-    #             "post_quotes_map": post_quotes_map,
-    #             "post_quoted_by_map": post_quoted_by_map,
-    #             "post_markers_map": post_markers_map,
-    #             "theme_posts_map": theme_posts_map,
-    #             "symbol_map": symbol_map,
-    #             "symbol_timeline": symbol_timeline,
-    #             "per_symbol_timeline": per_symbol_timeline
-    #         }, f)
-    #     print("--> All indices calculated and cached.")
-    # except Exception as e:
-    #     print(f"Error saving indices cache: {e}")
+    symbol_map = symbols.load_symbols()
+    symbol_indices = _build_symbol_timelines(text[has_time].to_numpy(), timed, symbol_map)
+
+    return {
+        'post_number_rows': _build_post_number_rows(df),
+        'post_time_hhmm_map': _group_to_lists(minutes, timed_pns),
+        'post_time_hhmmss_map': _group_to_lists(seconds, timed_pns),
+        'post_quotes_map': _group_to_lists(quoting_pns, quoted),
+        'quoted_by_map': _group_to_lists(quoted, quoting_pns),
+        'marker_posts_map': _group_to_lists(markers.to_numpy()[non_empty], marker_pns[non_empty]),
+        'theme_posts_map': _group_to_lists(theme_keys, theme_pns),
+        'symbol_map': symbol_map,
+        **symbol_indices,
+    }
+
+def _build_deferred_indices(df):
+    """Builds the DEFERRED_INDEX_NAMES indices and returns them as a {global name: index} dict."""
+    url_indices = _build_url_index(df)
+    return {
+        **_build_abbreviation_spans(df),
+        **url_indices,
+        'search_index': search.SearchIndex(df, has_link=np.diff(url_indices['url_span_starts']) > 0),
+    }
+
+def ensure_deferred_indices():
+    """
+    Builds the deferred indices if they are not there yet and adds them to
+    the index store. Every accessor of a deferred index calls this first; a
+    thread calling it while another one builds waits for that build.
+    """
+    global _deferred_source
+    if _deferred_source is None:
+        return
+    with _deferred_lock:
+        if _deferred_source is None:
+            return # Built by another thread while this one waited
+        df, fingerprint = _deferred_source
+        globals().update(_build_deferred_indices(df))
+        _deferred_source = None
+        _save_indices_to_pickle(config.INDICES_PICKLE_PATH, fingerprint)
+
+def get_search_index():
+    """Returns the search index, building the deferred indices first if needed."""
+    ensure_deferred_indices()
+    return search_index
+
+def _day_axis(timestamps):
+    """
+    Returns (first day, number of days, day offset of each timestamp) of the
+    daily timeline spanning the given non-null timestamps.
+    """
+    if not len(timestamps):
+        return None, 0, []
+    first_day = timestamps.min().normalize()
+    n_days = int((timestamps.max().normalize() - first_day).days) + 1
+    return first_day.date(), n_days, (timestamps.dt.normalize() - first_day).dt.days.to_numpy()
 
+def _build_symbol_timelines(text, timestamps, symbol_map):
+    """
+    Counts, per day, the posts mentioning each symbol (by ticker or alias)
+    and the posts mentioning any symbol at all. Every ticker and alias is
+    compiled into one matcher, so each post is scanned once however many
+    symbols there are. Returns the symbol_* index entries.
+    """
+    symbol_names = sorted(symbol_map)
+    keyword_labels = {}
+    for row, symbol in enumerate(symbol_names):
+        for term in [symbol] + list(symbol_map[symbol].get("aliases", [])):
+            if isinstance(term, str):
+                keyword_labels.setdefault(term.lower(), set()).add(row)
+    symbol_matcher = matcher.KeywordMatcher(keyword_labels)
+
+    day_start, n_days, day_offsets = _day_axis(timestamps)
+
+    day_matrix = np.zeros((len(symbol_names), n_days), dtype=np.int32)
+    day_totals = np.zeros(n_days, dtype=np.int32)
+    if symbol_names:
+        positions, rows = symbol_matcher.find_label_pairs(text)
+        if positions:
+            days = day_offsets[positions]
+            np.add.at(day_matrix, (rows, days), 1)
+            np.add.at(day_totals, day_offsets[np.unique(positions)], 1)
+
+    def to_timeline(counts):
+        days = np.flatnonzero(counts)
+        return {day_start + datetime.timedelta(days=int(day)): int(counts[day]) for day in days}
+
+    return {
+        'symbol_names': symbol_names,
+        'symbol_day_start': day_start,
+        'symbol_day_matrix': day_matrix,
+        'symbol_day_totals': day_totals,
+        'symbol_timeline': to_timeline(day_totals),
+        'per_symbol_timeline': {symbol: to_timeline(day_matrix[row]) for row, symbol in enumerate(symbol_names)
+                                if day_matrix[row].any()},
+    }
 
-def load_or_parse_data():
+def pre_load_indices(df):
+    """
+    Creates the dictionaries the GUI uses for fast lookups (themes, quotes,
+    markers, times and symbols) and publishes them as module globals. The
+    DEFERRED_INDEX_NAMES indices are not built here.
+    """
+    globals().update(_build_indices(df))
+
+
+def _compute_source_fingerprint():
+    """
+    Hashes every input the processed data depends on: the raw posts JSON,
+    symbols.json, the theme definitions and the abbreviations. Any change to one of them
+    produces a new fingerprint and invalidates the on-disk caches.
+    """
+    hasher = hashlib.sha256()
+    for path in (config.POSTS_DATA_PATH, config.SYMBOLS_FILE_PATH):
+        if os.path.exists(path):
+            with open(path, 'rb') as f:
+                for chunk in iter(lambda: f.read(1 << 20), b''):
+                    hasher.update(chunk)
+        else:
+            hasher.update(b'<missing>')
+        hasher.update(b'\0')
+    hasher.update(json.dumps(config.THEMES, sort_keys=True).encode('utf-8'))
+    hasher.update(json.dumps(config.Q_ABBREVIATIONS, sort_keys=True).encode('utf-8'))
+    return hasher.hexdigest()
+
+def _write_cache_file(path, header, payload):
+    """
+    Writes a cache file as two pickle frames, a small header followed by the
+    payload. The data goes to a temporary file that is swapped into place, so
+    an interrupted write never leaves a truncated cache behind.
     """
-    Parses the raw JSON data, processes it into a structured DataFrame
-    (including adding themes), and then pre-loads search indices.
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'wb') as f:
+        pickle.dump(header, f, protocol=pickle.HIGHEST_PROTOCOL)
+        pickle.dump(payload, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, path)
+
+def _read_cache_file(path, expected_header, label):
+    """
+    Returns the payload of a cache file whose header equals expected_header,
+    else None. Only the header frame is unpickled for a stale cache, so
+    rejecting one costs next to nothing.
+    """
+    try:
+        with open(path, 'rb') as f:
+            if pickle.load(f) != expected_header:
+                print(f"The {label} cache is stale, rebuilding.")
+                return None
+            return pickle.load(f)
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        print(f"Ignoring unreadable {label} cache: {e}")
+        return None
+
+def _load_dataframe_from_pickle(path, fingerprint):
+    """Returns the cached DataFrame if it was built from the same sources, else None."""
+    header = {'schema_version': DATAFRAME_SCHEMA_VERSION, 'fingerprint': fingerprint}
+    return _read_cache_file(path, header, "DataFrame")
+
+def _save_dataframe_to_pickle(df, path, fingerprint):
+    """Saves the processed DataFrame together with the fingerprint of its sources."""
+    try:
+        header = {'schema_version': DATAFRAME_SCHEMA_VERSION, 'fingerprint': fingerprint}
+        _write_cache_file(path, header, df)
+        print(f"--> DataFrame cache written to {path}")
+    except Exception as e:
+        print(f"Error saving DataFrame cache: {e}")
+
+def _parse_posts_json():
+    """
+    Parses the raw JSON data and processes it into a structured DataFrame,
+    including the Themes and Datetime_UTC columns.
     """
     print("Parsing and processing data from raw JSON...")
     processed_posts_list = []
@@ -161,203 +502,72 @@ def load_or_parse_data():
             'Referenced Posts Raw': post_data.get('referencedPosts', [])
         }
         
-        post_themes = []
-        post_text_lower = str(processed_post['Text']).lower() if processed_post['Text'] else ""
-
-        for theme_name, keywords in config.THEMES.items():
-            if any(keyword.lower() in post_text_lower for keyword in keywords):
-                post_themes.append(theme_name)
-        
-        processed_post['Themes'] = post_themes
+        processed_post['Themes'] = matcher.find_themes(processed_post['Text'])
 
         processed_posts_list.append(processed_post)
 
     df = pd.DataFrame(processed_posts_list)
     df['Datetime_UTC'] = pd.to_datetime(df['Timestamp'], unit='s', errors='coerce')
+    return df
+
+def load_or_parse_data():
+    """
+    Returns the processed posts DataFrame and pre-loads the search indices.
+    The DataFrame and the indices are each served from their on-disk cache
+    when its fingerprint matches the current sources; otherwise they are
+    rebuilt and the cache is rewritten.
+    """
+    fingerprint = _compute_source_fingerprint()
+    df = _load_dataframe_from_pickle(config.DATAFRAME_PICKLE_PATH, fingerprint)
+    df_rebuilt = df is None
+    if df_rebuilt:
+        df = _parse_posts_json()
+        _save_dataframe_to_pickle(df, config.DATAFRAME_PICKLE_PATH, fingerprint)
+    else:
+        print("Loaded processed posts from cache.")
     
-    # This will now work, as pre_load_indices is defined in the same file
-    pre_load_indices(df)
+    # Indices are derived from the DataFrame, so a re-parse invalidates them too
+    global _deferred_source
+    loaded = False if df_rebuilt else _load_indices_from_pickle(config.INDICES_PICKLE_PATH, fingerprint)
+    if loaded != 'all':
+        _deferred_source = (df, fingerprint)
+    if not loaded:
+        pre_load_indices(df)
+        _save_indices_to_pickle(config.INDICES_PICKLE_PATH, fingerprint)
     
     print("Data is ready.")
     
     return df
 
-def _build_symbol_timeline(df, symbol_map):
-    """Builds an aggregate timeline of mentions for all symbols combined."""
-    print("Building aggregate symbol timeline...")
-    
-    # 1. Collect all aliases from every symbol into one big list
-    all_aliases = []
-    for symbol_data in symbol_map.values():
-        aliases = symbol_data.get("aliases", [])
-        if aliases:
-            all_aliases.extend([a.lower() for a in aliases])
-    
-    # 2. If there are no aliases to search for, stop early
-    if not all_aliases:
-        print("Warning: No aliases found in symbol map. Returning empty timeline.")
-        return {}
-
-    # 3. Create a single, efficient regex pattern to find any alias
-    # This is much faster than looping through every alias for every post
-    pattern = r'\b(' + '|'.join(map(re.escape, all_aliases)) + r')\b'
-    
-    daily_counts = defaultdict(int)
-    
-    # 4. Go through every row in the dataframe
-    for _, row in df.iterrows():
-        date = row['Datetime_UTC'].date()
-        text = row.get('Text', '')
-        # Make sure the text is actually a string before searching
-        if isinstance(text, str):
-            matches = re.findall(pattern, text, re.IGNORECASE)
-            # Add the number of times any alias was found to the day's count
-            daily_counts[date] += len(matches)
-            
-    print("Aggregate symbol timeline built.")
-    
-    # 5. Return the final dictionary of {date: count}
-    return dict(daily_counts)
-    
-def _build_per_symbol_timelines(df, symbol_map):
-    """Builds a separate timeline for each individual symbol."""
-    print("Building per-symbol timeline data...")
-    timelines = {}
-    for symbol, data in symbol_map.items():
-        aliases = data.get("aliases", [])
-        if not aliases: continue
-        
-        pattern = r'\b(' + '|'.join(map(re.escape, [a.lower() for a in aliases])) + r')\b'
-        daily_counts = defaultdict(int)
-        
-        for _, row in df.iterrows():
-            date = row['Datetime_UTC'].date()
-            text = row.get('Text', '')
-            if isinstance(text, str):
-                matches = re.findall(pattern, text, re.IGNORECASE)
-                daily_counts[date] += len(matches)
-        
-        if daily_counts:
-            timelines[symbol] = dict(daily_counts)
-            
-    print("Per-symbol timeline data built.")
-    return timelines
-
-def _load_indices_from_pickle(path):
-    """Loads all pre-computed indices from a pickle file."""
-    global theme_posts_map, post_quotes_map, quoted_by_map, marker_posts_map, \
-           post_time_hhmm_map, post_time_hhmmss_map, symbol_map, symbol_timeline, \
-           per_symbol_timeline
-    
-    try:
-        with open(path, 'rb') as f:
-            indices = pickle.load(f)
-            
-            # These are the missing lines to load all the other maps
-            theme_posts_map.update(indices.get('themes', {}))
-            post_quotes_map.update(indices.get('quotes', {}))
-            quoted_by_map.update(indices.get('quoted_by', {}))
-            marker_posts_map.update(indices.get('markers', {}))
-            post_time_hhmm_map.update(indices.get('hhmm', {}))
-            post_time_hhmmss_map.update(indices.get('hhmmss', {}))
-            
-            # This is the part that was already working
-            symbol_map.update(indices.get('symbols', {}))
-            symbol_timeline.update(indices.get('symbol_timeline', {}))
-            per_symbol_timeline.update(indices.get('per_symbol_timeline', {}))
-            
-            print("--> All indices loaded successfully from pickle.")
-            return True
-    except (FileNotFoundError, EOFError, pickle.UnpicklingError) as e:
-        # This is not an error, just means we need to build from scratch
+def _load_indices_from_pickle(path, fingerprint):
+    """
+    Restores the index globals from the index store. Returns 'all' when it
+    held every index, 'core' when the deferred ones were not built yet when
+    it was written, and False when the store is missing, unreadable, from
+    another schema version or built from different sources, in which case
+    the caller rebuilds the indices.
+    """
+    header = {'schema_version': INDEX_SCHEMA_VERSION, 'fingerprint': fingerprint}
+    indices = _read_cache_file(path, header, "index")
+    core_names = [name for name in INDEX_NAMES if name not in DEFERRED_INDEX_NAMES]
+    if not isinstance(indices, dict) or any(name not in indices for name in core_names):
         return False
 
-def _save_indices_to_pickle(path):
-    """Saves all computed indices to a pickle file."""
-    print(f"--> Attempting to save indices to pickle file: {path}")
-    try:
-        # This is the dictionary of all data to save
-        indices = {
-            'themes': theme_posts_map,
-            'quotes': post_quotes_map,
-            'quoted_by': quoted_by_map,
-            'markers': marker_posts_map,
-            'hhmm': post_time_hhmm_map,
-            'hhmmss': post_time_hhmmss_map,
-            'symbols': symbol_map,
-            'symbol_timeline': symbol_timeline,
-            'per_symbol_timeline': per_symbol_timeline
-        }
+    loaded = 'all' if all(name in indices for name in DEFERRED_INDEX_NAMES) else 'core'
+    globals().update({name: indices[name] for name in (INDEX_NAMES if loaded == 'all' else core_names)})
+    print("--> All indices loaded from cache." if loaded == 'all' else "--> Core indices loaded from cache.")
+    return loaded
 
-        # These are the missing lines that actually write the file
-        with open(path, 'wb') as f:
-            pickle.dump(indices, f)
-            
-        print("--> Successfully saved indices to pickle file.")
+def _save_indices_to_pickle(path, fingerprint):
+    """
+    Saves the index globals to the index store, stamped with the schema
+    version and fingerprint. The deferred indices are left out until built.
+    """
+    header = {'schema_version': INDEX_SCHEMA_VERSION, 'fingerprint': fingerprint}
+    names = [name for name in INDEX_NAMES if _deferred_source is None or name not in DEFERRED_INDEX_NAMES]
+    indices = {name: globals()[name] for name in names}
+    try:
+        _write_cache_file(path, header, indices)
+        print(f"--> Index cache written to {path}")
     except Exception as e:
-        print(f"!!! CRITICAL ERROR: Failed to save pickle file at {path}: {e}")
-
-def _build_indices(df):
-    """Builds all necessary indices from the DataFrame in a single pass."""
-    global theme_posts_map, post_quotes_map, quoted_by_map, marker_posts_map, \
-           post_time_hhmm_map, post_time_hhmmss_map, symbol_map, symbol_timeline, \
-           per_symbol_timeline
-
-    print("Building indices from scratch...")
-    # Clear all maps to ensure a fresh start
-    theme_posts_map.clear(); post_quotes_map.clear(); quoted_by_map.clear()
-    marker_posts_map.clear(); post_time_hhmm_map.clear(); post_time_hhmmss_map.clear()
-    
-    # --- Build Symbol-Related Data (already correct) ---
-    symbol_map = symbols.load_symbols()
-    symbol_timeline = _build_symbol_timeline(df, symbol_map)
-    per_symbol_timeline = _build_per_symbol_timelines(df, symbol_map)
-    
-    # --- Main Loop to build all other indices ---
-    print("Processing all posts to build relationship maps...")
-    quote_pattern = re.compile(r'>>(\d+)')
-    marker_pattern = re.compile(r'\[([^\]]+)\]')
-
-    # Create a new column in the DataFrame to store themes for each post
-    df['Themes'] = [[] for _ in range(len(df))]
-
-    for index, row in df.iterrows():
-        post_num = row.get('Post Number')
-        text = row.get('Text', '')
-        timestamp = row.get('Datetime_UTC')
-
-        if pd.isna(post_num):
-            continue
-
-        # 1. Build Time Maps
-        if pd.notna(timestamp):
-            post_time_hhmm_map[timestamp.strftime('%H:%M')].append(post_num)
-            post_time_hhmmss_map[timestamp.strftime('%H:%M:%S')].append(post_num)
-
-        if not isinstance(text, str): text = ''
-
-        # 2. Build Theme Map and add Themes to the DataFrame row
-        post_themes = []
-        for theme, keywords in config.THEMES.items():
-            for keyword in keywords:
-                if re.search(r'\b' + re.escape(keyword) + r'\b', text, re.IGNORECASE):
-                    theme_posts_map[theme].append(post_num)
-                    if theme not in post_themes:
-                        post_themes.append(theme)
-        df.at[index, 'Themes'] = post_themes
-
-        # 3. Build Quote Maps
-        quoted_posts = quote_pattern.findall(text)
-        if quoted_posts:
-            post_quotes_map[post_num].extend([int(p) for p in quoted_posts])
-            for quoted_num in quoted_posts:
-                quoted_by_map[int(quoted_num)].append(post_num)
-
-        # 4. Build Marker Map
-        markers = marker_pattern.findall(text)
-        for marker in markers:
-            marker_posts_map[marker.strip()].append(post_num)
-
-    print("All relationship maps built successfully.")
-
-# (The load_or_parse_data function does not need to be changed)
\ No newline at end of file
+        print(f"Error saving index cache: {e}")
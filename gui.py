@@ -4,8 +4,10 @@ import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
 from tkcalendar import Calendar
 from PIL import Image, ImageTk
-from collections import defaultdict
+import bisect
+import concurrent.futures
 import io
+import numpy as np
 import pandas as pd
 import datetime
 import os
@@ -17,7 +19,10 @@ import config
 import math
 import utils
 import data as app_data
+import matcher
+import search
 import settings
+import thumbnails
 import calendar
 
 # --- END GUI_PY_HEADER ---
@@ -85,6 +90,201 @@ class Tooltip:
         if tw:
             tw.destroy()
 # --- END TOOLTIP_CLASS ---
+
+# --- START VIRTUAL_POST_LIST_CLASS ---
+class VirtualPostList:
+    """
+    A post list that only holds the rows currently on screen. Its content is
+    an array of row positions; scrolling re-renders the visible window from
+    that array, so listing 3 or 50,000 posts costs the same. It wraps a
+    headings-only ttk.Treeview, so themes style it like any other Treeview,
+    and drives its own scrollbar.
+
+    columns is a sequence of (name, heading text, width, stretch, anchor).
+    row_values(row) returns the column values for a row position,
+    on_select(list_idx) is called when a row gets selected by the user or by
+    select(), and on_sort(name) when a column heading is clicked. While
+    keyboard navigation auto-repeats, on_preview(list_idx) stands in for
+    on_select (see _move_selection).
+    """
+
+    def __init__(self, parent, columns, row_values, on_select, on_sort, on_preview=None):
+        self.row_values = row_values
+        self.on_select = on_select
+        self.on_preview = on_preview
+        self._settle_after_id = None
+        self._settle_pending = False
+        self.rows = np.zeros(0, dtype=np.int64)
+        self.offset = 0 # List index of the first visible row
+        self.selected_idx = -1
+        self.visible_count = 1
+        self._heading_height = 24 # Measured from the first rendered row
+        self._row_height = 20
+
+        self.tree = ttk.Treeview(parent, columns=[column[0] for column in columns], show="headings", selectmode="browse")
+        self.scrollbar = ttk.Scrollbar(parent, orient="vertical", command=self._on_scrollbar)
+        for name, heading, width, stretch, anchor in columns:
+            self.tree.heading(name, text=heading, anchor=anchor, command=lambda c=name: on_sort(c))
+            self.tree.column(name, width=width, stretch=stretch, anchor=anchor)
+
+        self.tree.bind("<<TreeviewSelect>>", self._on_tree_select)
+        self.tree.bind("<Configure>", lambda e: self._update_visible_count())
+        for sequence in ("<MouseWheel>", "<Button-4>", "<Button-5>"):
+            self.tree.bind(sequence, self._on_mousewheel)
+        for key in ("<Up>", "<Down>", "<Prior>", "<Next>", "<Home>", "<End>"):
+            self.tree.bind(key, self._on_key)
+
+    def set_rows(self, rows, selected_idx=-1):
+        """Shows a new array of row positions, with selected_idx (or nothing) selected and scrolled into view."""
+        self.rows = np.asarray(rows, dtype=np.int64)
+        self.selected_idx = selected_idx if 0 <= selected_idx < len(self.rows) else -1
+        if self.selected_idx >= 0:
+            self._scroll_to(self.selected_idx)
+        else:
+            self.offset = 0
+        self._render()
+
+    def select(self, list_idx, notify=True):
+        """Selects (and scrolls to) a list position, calling on_select unless notify is False."""
+        if not 0 <= list_idx < len(self.rows):
+            return
+        self.selected_idx = list_idx
+        self._scroll_to(list_idx)
+        self._render()
+        if notify:
+            self.on_select(list_idx)
+
+    def clear_selection(self):
+        self.selected_idx = -1
+        self._render()
+
+    def refresh_row(self, row):
+        """Redraws one row position if it is on screen, e.g. after its bookmark changed."""
+        if self.tree.exists(str(row)):
+            self.tree.item(str(row), values=self.row_values(row))
+
+    def row_at_y(self, y):
+        """Returns the row position under a y coordinate of the tree, or None."""
+        iid = self.tree.identify_row(y)
+        return int(iid) if iid else None
+
+    def _scroll_to(self, list_idx):
+        if list_idx < self.offset:
+            self.offset = list_idx
+        elif list_idx >= self.offset + self.visible_count:
+            self.offset = list_idx - self.visible_count + 1
+        self._clamp_offset()
+
+    def _clamp_offset(self):
+        self.offset = max(0, min(self.offset, len(self.rows) - self.visible_count))
+
+    def _render(self):
+        """Replaces the tree items with the visible window of rows."""
+        self.tree.delete(*self.tree.get_children())
+        end = min(self.offset + self.visible_count, len(self.rows))
+        for row in self.rows[self.offset:end]:
+            self.tree.insert("", "end", iid=str(row), values=self.row_values(row))
+        if self.offset <= self.selected_idx < end:
+            iid = str(self.rows[self.selected_idx])
+            self.tree.selection_set(iid)
+            self.tree.focus(iid)
+
+        if len(self.rows):
+            self.scrollbar.set(self.offset / len(self.rows), end / len(self.rows))
+        else:
+            self.scrollbar.set(0.0, 1.0)
+
+        # Learn the real heading and row heights from the first row drawn
+        if end > self.offset:
+            bbox = self.tree.bbox(self.tree.get_children()[0])
+            if bbox and (bbox[1], bbox[3]) != (self._heading_height, self._row_height):
+                self._heading_height, self._row_height = bbox[1], bbox[3]
+                self._update_visible_count()
+
+    def _update_visible_count(self):
+        height = self.tree.winfo_height()
+        if height <= 1: # Not mapped yet
+            return
+        visible_count = max(1, (height - self._heading_height) // max(1, self._row_height))
+        if visible_count != self.visible_count:
+            self.visible_count = visible_count
+            self._clamp_offset()
+            self._render()
+
+    def _scroll_by(self, count):
+        self.offset += count
+        self._clamp_offset()
+        self._render()
+
+    def _on_scrollbar(self, action, amount, unit=None):
+        if action == "moveto":
+            self.offset = int(float(amount) * len(self.rows))
+            self._clamp_offset()
+            self._render()
+        elif action == "scroll":
+            self._scroll_by(int(amount) * (self.visible_count if unit == "pages" else 1))
+
+    def _on_mousewheel(self, event):
+        if event.num == 4:
+            steps = -1
+        elif event.num == 5:
+            steps = 1
+        else:
+            steps = -1 if event.delta > 0 else 1
+        self._scroll_by(steps * 3)
+        return "break" # The tree itself never holds more than a screenful
+
+    def _on_key(self, event):
+        if not len(self.rows):
+            return "break"
+        current = self.selected_idx
+        targets = {
+            "Up": current - 1 if current >= 0 else len(self.rows) - 1,
+            "Down": current + 1,
+            "Prior": current - self.visible_count,
+            "Next": current + self.visible_count,
+            "Home": 0,
+            "End": len(self.rows) - 1,
+        }
+        target = max(0, min(targets[event.keysym], len(self.rows) - 1))
+        if target != current:
+            self._move_selection(target)
+        return "break"
+
+    def _move_selection(self, list_idx):
+        """
+        Moves the selection for a navigation key. The first key press selects
+        right away; presses that follow within KEY_NAV_SETTLE_MS (i.e. key
+        auto-repeat) only move the list and call on_preview, and on_select
+        runs once for the row the keys come to rest on.
+        """
+        if self._settle_after_id is None:
+            self.select(list_idx)
+        else:
+            self.tree.after_cancel(self._settle_after_id)
+            self.select(list_idx, notify=False)
+            if self.on_preview:
+                self.on_preview(list_idx)
+            self._settle_pending = True
+        self._settle_after_id = self.tree.after(config.KEY_NAV_SETTLE_MS, self._settle)
+
+    def _settle(self):
+        self._settle_after_id = None
+        if self._settle_pending:
+            self._settle_pending = False
+            if self.selected_idx >= 0:
+                self.on_select(self.selected_idx)
+
+    def _on_tree_select(self, event):
+        selected = self.tree.selection()
+        # Re-rendering clears and restores the selection; only a real change counts
+        if not selected or not self.tree.exists(selected[0]):
+            return
+        list_idx = self.offset + self.tree.index(selected[0])
+        if list_idx != self.selected_idx:
+            self.selected_idx = list_idx
+            self.on_select(list_idx)
+# --- END VIRTUAL_POST_LIST_CLASS ---
         
 # --- START QCLOCK_CLASS ---
 class QClock:
@@ -411,7 +611,7 @@ class QClock:
     def _draw_dot(self, post_number, timestamp, dot_dist, angle, post_row):
         """Determines the dot's color and draws it on the canvas."""
         has_image = post_row.get('Image Count', 0) > 0
-        has_link = isinstance(post_row.get('Text'), str) and ('http://' in post_row['Text'] or 'https://' in post_row['Text'])
+        has_link = app_data.row_has_url(app_data.row_for_post_number(post_number))
 
         # Filter Logic
         if has_image and not self.filter_show_images.get(): return
@@ -505,8 +705,8 @@ class QClock:
             else:
                 self.status_label.config(text=f"{len(self.multi_selection)} post{'s' if len(self.multi_selection) > 1 else ''} selected.")
                 def view_multi():
-                    results_df = self.post_data[self.post_data['Post Number'].isin(self.multi_selection)]
-                    self.gui_instance._handle_search_results(results_df, "Multi-Select")
+                    rows = sorted(row for row in map(app_data.row_for_post_number, self.multi_selection) if row is not None)
+                    self.gui_instance._handle_search_results(rows, "Multi-Select")
                     self.gui_instance.toggle_clock_view()
                 self.view_in_list_button.config(state=tk.NORMAL, command=view_multi)
         else:
@@ -516,15 +716,15 @@ class QClock:
             if not clicked_dot_id: return
             x1, y1, _, _ = self.canvas.coords(clicked_dot_id)
             center_x1, center_y1 = x1 + 2, y1 + 2
-            post_series = self.post_data[self.post_data['Post Number'] == post_number]
-            if post_series.empty: return
-            posts_to_show_df = post_series
+            post_row = app_data.row_for_post_number(post_number)
+            if post_row is None: return
+            rows_to_show = [post_row]
             search_term = f"Post #{post_number}"
             if self.show_deltas_var.get():
-                timestamp = post_series.iloc[0].get('Datetime_UTC')
+                timestamp = self.gui_instance.df_all_posts['Datetime_UTC'].iat[post_row]
                 if pd.notna(timestamp):
                     time_key = timestamp.strftime('%H:%M')
-                    delta_post_numbers = app_data.post_time_hhmm_map.get(time_key, [])
+                    delta_post_numbers = app_data.post_time_hhmm_map.get(app_data.minute_of_day(timestamp), [])
                     if delta_post_numbers:
                         self.delta_source_post_num = post_number
                         for pn in delta_post_numbers:
@@ -535,13 +735,13 @@ class QClock:
                                 if pn != post_number:
                                     x2, y2, _, _ = self.canvas.coords(dot_id)
                                     self.drawn_lines.append(self.canvas.create_line(center_x1, center_y1, x2 + 2, y2 + 2, fill="#ff4d4d", width=0.5, tags="conn_line"))
-                        posts_to_show_df = self.post_data[self.post_data['Post Number'].isin(delta_post_numbers)]
+                        rows_to_show = sorted(row for row in map(app_data.row_for_post_number, delta_post_numbers) if row is not None)
                         search_term = f"Delta Matches for Q#{post_number} at {time_key}"
             # Draw mirror lines (condensed for brevity)
             # ... (mirror line logic would go here, it is correct in the user's file)
             self.status_label.config(text=f"Selected: Q#{post_number} | Deltas: {len(self.highlighted_dots) - 1 if self.highlighted_dots else 0} | Mirrors: {len(self.drawn_lines)}")
             def view_single():
-                self.gui_instance._handle_search_results(posts_to_show_df, search_term)
+                self.gui_instance._handle_search_results(rows_to_show, search_term)
                 self.gui_instance.toggle_clock_view()
             self.view_in_list_button.config(state=tk.NORMAL, command=view_single)
 
@@ -887,9 +1087,31 @@ class QPostViewer:
         self.user_notes = utils.load_user_notes(config.USER_NOTES_FILE_PATH)
 
         self.df_all_posts = app_data.load_or_parse_data()
-        self.df_displayed = pd.DataFrame()
+        # Build the deferred indices (search, URLs, abbreviations) while the UI comes up; anything needing them sooner waits
+        threading.Thread(target=app_data.ensure_deferred_indices, name="deferred-indices", daemon=True).start()
+        self.displayed_rows = np.zeros(0, dtype=np.int64) # Row positions in df_all_posts, in list order
+        self._display_positions = np.zeros(0, dtype=np.int64)
         self.current_search_active = False
+        self.search_highlight_terms = []
         self.current_display_idx = -1
+        self._live_search_after_id = None
+        self._live_search_text = None
+        self._live_search_rows = None
+        self.search_cache = utils.LRUCache(config.SEARCH_CACHE_SIZE)
+        self._search_cache_index = None # The search index the cached results came from
+        self.render_cache = utils.LRUCache(config.RENDER_CACHE_SIZE)
+        self.thumbnails = thumbnails.ThumbnailCache(config.THUMBNAIL_DIR, config.THUMBNAIL_CACHE_SIZE)
+        self.image_executor = concurrent.futures.ThreadPoolExecutor(max_workers=config.IMAGE_DECODE_WORKERS, thread_name_prefix="image-decode")
+        # Prefetch decodes get their own worker, so the visible post's images never queue behind them
+        self.prefetch_executor = concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix="image-prefetch")
+        self._image_generation = 0 # Bumped whenever the detail pane is redrawn; stale decodes are dropped
+        self._pending_image_futures = []
+        self._image_placeholders = {}
+        self._prefetch_after_id = None
+        self._prefetch_generation = 0
+        self._prefetch_queue = []
+        self._prefetch_futures = []
+        self._prefetch_bytes = 0
 
         self.current_theme = self.app_settings.get("theme", settings.DEFAULT_SETTINGS["theme"])
         
@@ -932,6 +1154,11 @@ class QPostViewer:
         self.symbols_view_frame.grid_remove()
         self._setup_symbols_view()
         # --- END NEW ---
+
+        self.domains_view_frame = ttk.Frame(self.main_content_frame)
+        self.domains_view_frame.grid(row=0, column=0, sticky="nsew")
+        self.domains_view_frame.grid_remove()
+        self._setup_domains_view()
         
         self.list_view_paned_window = ttk.Panedwindow(self.list_view_frame, orient=tk.HORIZONTAL)
         self.list_view_paned_window.pack(fill=tk.BOTH, expand=True)
@@ -945,17 +1172,19 @@ class QPostViewer:
         self.tree_frame.grid_rowconfigure(0, weight=1)
         self.tree_frame.grid_columnconfigure(0, weight=1)
 
-        self.post_tree = ttk.Treeview(self.tree_frame, columns=("Post #", "Date", "Notes", "Bookmarked"), show="headings")
-        self.scrollbar_y = ttk.Scrollbar(self.tree_frame, orient="vertical", command=self.post_tree.yview)
-        self.post_tree.configure(yscrollcommand=self.scrollbar_y.set)
-        self.post_tree.heading("Post #", text="Post #", anchor='w', command=lambda: self.sort_treeview_column("Post #", False))
-        self.post_tree.heading("Date", text="Date", anchor='w', command=lambda: self.sort_treeview_column("Date", False))
-        self.post_tree.heading("Notes", text="♪", anchor='center', command=lambda: self.sort_treeview_column("Notes", False))
-        self.post_tree.heading("Bookmarked", text="★", anchor='center', command=lambda: self.sort_treeview_column("Bookmarked", False))
-        self.post_tree.column("Post #", width=70, stretch=tk.NO, anchor='w')
-        self.post_tree.column("Date", width=110, stretch=tk.YES, anchor='w')
-        self.post_tree.column("Notes", width=25, stretch=tk.NO, anchor='center')
-        self.post_tree.column("Bookmarked", width=30, stretch=tk.NO, anchor='center')
+        self.post_list = VirtualPostList(self.tree_frame,
+                                         (("Post #", "Post #", 70, tk.NO, 'w'),
+                                          ("Date", "Date", 110, tk.YES, 'w'),
+                                          ("Notes", "♪", 25, tk.NO, 'center'),
+                                          ("Bookmarked", "★", 30, tk.NO, 'center'),
+                                          ("Images", "Img", 35, tk.NO, 'center'),
+                                          ("Quoted", "Cited", 40, tk.NO, 'center'),
+                                          ("Length", "Len", 45, tk.NO, 'e')),
+                                         self._treeview_row_values, self.on_tree_select, self.sort_treeview_column,
+                                         on_preview=self._preview_post)
+        self.post_tree = self.post_list.tree
+        self.scrollbar_y = self.post_list.scrollbar
+        self._sort_reverse = {} # Column -> direction of its next sort
         self.post_tree.grid(row=0, column=0, sticky="nswe")
         self.scrollbar_y.grid(row=0, column=1, sticky="ns")
 
@@ -1010,6 +1239,8 @@ class QPostViewer:
         self.threads_view_button.pack(side="right", padx=2)
         self.symbols_view_button = ttk.Button(nav_frame, text="Symbols", command=self.show_symbols_view)
         self.symbols_view_button.pack(side="right", padx=2)
+        self.domains_view_button = ttk.Button(nav_frame, text="Domains", command=self.show_domains_view)
+        self.domains_view_button.pack(side="right", padx=2)
         self.clock_view_button = ttk.Button(nav_frame, text="Q Clock", command=self.show_clock_view)
         self.clock_view_button.pack(side="right", padx=2)
         
@@ -1027,6 +1258,19 @@ class QPostViewer:
         self.keyword_entry.bind("<FocusIn>", lambda e, p=config.PLACEHOLDER_KEYWORD: self.clear_placeholder(e, p, self.keyword_entry))
         self.keyword_entry.bind("<FocusOut>", lambda e, p=config.PLACEHOLDER_KEYWORD: self.restore_placeholder(e, p, self.keyword_entry))
         self.keyword_entry.bind("<Return>", lambda event: self.search_by_keyword())
+        self.keyword_entry.bind("<KeyRelease>", self._on_keyword_typed)
+        self.search_mode_var = tk.StringVar(value="Query")
+        search_mode_combo = ttk.Combobox(search_fields_frame, textvariable=self.search_mode_var,
+                                         values=("Query", "Regex", "Fuzzy"), state="readonly", width=6)
+        search_mode_combo.pack(side=tk.LEFT, padx=(5,0))
+        search_mode_combo.bind("<<ComboboxSelected>>", self._on_search_mode_changed)
+        Tooltip(search_mode_combo, lambda: "Query: words, phrases, AND/OR/NOT and fields.\n"
+                                            "Regex: a Python regular expression over post text.\n"
+                                            "Fuzzy: like Query, but single words also match near misspellings.")
+        Tooltip(self.keyword_entry, lambda: "Words match as prefixes and are combined with AND.\n"
+                                            "Use \"quoted phrases\", OR, NOT and (parentheses); word~2 allows 2 typos.\n"
+                                            "Fields: author: trip: theme: quotes:1234 has:image has:link\n"
+                                            "date:2018-01..2018-03 or date:MM-DD for every year.", delay=800)
         search_buttons_frame = ttk.Frame(actions_frame)
         search_buttons_frame.pack(fill=tk.X, pady=(5,2))
         self.search_menu_button = ttk.Menubutton(search_buttons_frame, text="Advanced Search", style="TButton")
@@ -1035,6 +1279,7 @@ class QPostViewer:
         self.search_menu.add_command(label="Search by Date", command=self.show_year_calendar_view)
         self.search_menu.add_command(label="Today's Deltas", command=self.search_today_deltas)
         self.search_menu.add_command(label="Search by Theme", command=self.show_theme_selection_dialog)
+        self.search_menu.add_command(label="Filter Panel", command=self.show_filter_panel)
         Tooltip(self.search_menu_button, lambda: "Advanced search options.")
         self.search_menu_button.pack(side=tk.LEFT, padx=2, expand=True, fill=tk.X)
         self.tools_menu_button = ttk.Menubutton(search_buttons_frame, text="Tools", style="TButton")
@@ -1044,6 +1289,8 @@ class QPostViewer:
         self.tools_menu.add_command(label="View All Notes", command=self.show_all_notes_window)
         self.tools_menu.add_command(label="Content Sync", command=self.show_download_window)
         self.tools_menu.add_command(label="Help & Info", command=self.show_help_window)
+        self.tools_menu.add_separator()
+        self.tools_menu.add_command(label="Search Cache Stats", command=self.show_search_cache_stats_window)
         self.tools_menu_button.pack(side=tk.LEFT, padx=2, expand=True, fill=tk.X)
         Tooltip(self.tools_menu_button, lambda: "Access various utilities.")
         current_post_actions_frame = ttk.Frame(actions_frame)
@@ -1089,16 +1336,17 @@ class QPostViewer:
         self.restore_placeholder(None, config.PLACEHOLDER_POST_NUM, self.post_entry)
         self.restore_placeholder(None, config.PLACEHOLDER_KEYWORD, self.keyword_entry)
 
-        self.post_tree.bind("<<TreeviewSelect>>", self.on_tree_select)
-        self.post_tree.bind("<Up>", self.on_tree_arrow_nav)
-        self.post_tree.bind("<Down>", self.on_tree_arrow_nav)
         self.root.protocol("WM_DELETE_WINDOW", self.on_closing)
+        # Any user input holds back the neighbour prefetch (see IDLE_PREFETCH)
+        for sequence in ("<KeyPress>", "<ButtonPress>", "<MouseWheel>"):
+            self.root.bind_all(sequence, self._postpone_prefetch, add="+")
 
         self._init_complete = False
         if self.df_all_posts is not None and not self.df_all_posts.empty:
             self.df_all_posts = self.df_all_posts.reset_index(drop=True)
-            self.df_displayed = self.df_all_posts.copy()
-            self.repopulate_treeview(self.df_displayed, select_first_item=False)
+            self._prepare_row_columns()
+            self._set_displayed_rows(None)
+            self.repopulate_treeview(select_first_item=False)
             
             # --- NEW: Prepare data for calendar highlighting and info ---
             
@@ -1193,52 +1441,40 @@ class QPostViewer:
         """Draws the symbol density timeline on its canvas for one or more symbols."""
         self.heatmap_canvas.delete("all")
         
-        timeline_data = {}
         title = "Symbol Density Timeline: "
 
         if selected_symbols:
-            # --- NEW: AGGREGATION LOGIC ---
-            aggregated_timeline = defaultdict(int)
-            for symbol in selected_symbols:
-                individual_timeline = app_data.per_symbol_timeline.get(symbol, {})
-                for date, count in individual_timeline.items():
-                    aggregated_timeline[date] += count
-            
-            timeline_data = dict(aggregated_timeline)
+            # Sum the selected rows of the symbols x days matrix
+            rows = [app_data.symbol_names.index(s) for s in selected_symbols if s in app_data.symbol_names]
+            day_counts = app_data.symbol_day_matrix[rows].sum(axis=0)
             
             if len(selected_symbols) > 3:
                 title += f"{len(selected_symbols)} Symbols Selected"
             else:
                 title += ", ".join(selected_symbols)
         else:
-            timeline_data = app_data.symbol_timeline
+            day_counts = app_data.symbol_day_totals
             title += "All Symbols"
 
         self.heatmap_canvas.master.config(text=title)
 
-        if not timeline_data: return
+        if not day_counts.any(): return
 
-        # (The rest of the drawing logic is the same)
         canvas_width = self.heatmap_canvas.winfo_width()
         canvas_height = self.heatmap_canvas.winfo_height()
         if canvas_width < 2 or canvas_height < 2: return
 
-        start_date = self.df_all_posts['Datetime_UTC'].min().date()
-        end_date = self.df_all_posts['Datetime_UTC'].max().date()
-        total_days = (end_date - start_date).days
-        if total_days == 0: return
+        total_days = len(day_counts)
+        if total_days < 2: return
 
-        max_count = float(max(timeline_data.values()) if timeline_data else 1)
-        bar_width = canvas_width / total_days
+        max_count = float(day_counts.max())
+        bar_width = canvas_width / (total_days - 1)
 
-        current_date = start_date
-        for i in range(total_days + 1):
-            count = timeline_data.get(current_date, 0)
+        for i, count in enumerate(day_counts.tolist()):
             color = self._get_heatmap_color(count, max_count)
             x0 = i * bar_width
             x1 = (i + 1) * bar_width
             self.heatmap_canvas.create_rectangle(x0, 0, x1, canvas_height, fill=color, outline="")
-            current_date += datetime.timedelta(days=1)
 
     def _setup_symbols_view(self):
         """Creates the widgets for the Symbol Map view using a PanedWindow."""
@@ -1288,6 +1524,124 @@ class QPostViewer:
             description = data.get("description", "")
             self.symbols_tree.insert("", "end", text=symbol, values=(aliases, description))
 
+    def _setup_domains_view(self):
+        """Creates the widgets for the Link Domains view: the domain list above its timeline."""
+        domains_paned_window = ttk.Panedwindow(self.domains_view_frame, orient=tk.VERTICAL)
+        domains_paned_window.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+
+        # --- Top pane for the Domain List ---
+        list_frame = ttk.Frame(domains_paned_window)
+        domains_paned_window.add(list_frame)
+        list_frame.grid_rowconfigure(1, weight=1)
+        list_frame.grid_columnconfigure(0, weight=1)
+
+        list_controls = ttk.Frame(list_frame)
+        list_controls.grid(row=0, column=0, columnspan=2, sticky="ew", pady=(0, 5))
+        self.hide_excluded_domains_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(list_controls, text="Hide domains excluded from article sync", variable=self.hide_excluded_domains_var,
+                        command=self._populate_domains_view).pack(side="left")
+        ttk.Button(list_controls, text="Show Linking Posts", command=self._show_domain_posts).pack(side="right")
+
+        self.domains_tree = ttk.Treeview(list_frame, columns=("Posts", "First", "Last", "Article Sync"), show="tree headings", selectmode='extended')
+        domains_scrollbar = ttk.Scrollbar(list_frame, orient="vertical", command=self.domains_tree.yview)
+        self.domains_tree.configure(yscrollcommand=domains_scrollbar.set)
+        self.domains_tree.heading("#0", text="Domain")
+        self.domains_tree.heading("Posts", text="# Posts")
+        self.domains_tree.heading("First", text="First Linked")
+        self.domains_tree.heading("Last", text="Last Linked")
+        self.domains_tree.heading("Article Sync", text="Article Sync")
+        self.domains_tree.column("#0", width=250)
+        self.domains_tree.column("Posts", width=80, anchor='center')
+        self.domains_tree.column("First", width=110, anchor='center')
+        self.domains_tree.column("Last", width=110, anchor='center')
+        self.domains_tree.column("Article Sync", width=100, anchor='center')
+        self.domains_tree.grid(row=1, column=0, sticky="nsew")
+        domains_scrollbar.grid(row=1, column=1, sticky="ns")
+        self.domains_tree.bind("<<TreeviewSelect>>", self._on_domain_select)
+        self.domains_tree.bind("<Double-1>", lambda e: self._show_domain_posts())
+
+        # --- Bottom pane for the Heatmap ---
+        domain_heatmap_frame = ttk.Labelframe(domains_paned_window, text="Domain Link Timeline", padding=10, height=150)
+        domains_paned_window.add(domain_heatmap_frame)
+        ttk.Button(domain_heatmap_frame, text="Show All Domains", command=self._draw_domain_heatmap).pack(anchor="ne", pady=(0, 5))
+        self.domain_heatmap_canvas = tk.Canvas(domain_heatmap_frame, bg="white", highlightthickness=0)
+        self.domain_heatmap_canvas.pack(fill=tk.BOTH, expand=True)
+
+    def _populate_domains_view(self):
+        """Clears and fills the domain list from the precomputed domain index, most linked first."""
+        self.domains_tree.delete(*self.domains_tree.get_children())
+        matrix = app_data.domain_day_matrix
+        if not app_data.domain_names or matrix.shape[1] == 0: return
+
+        linked = matrix > 0
+        first_days = linked.argmax(axis=1)
+        last_days = matrix.shape[1] - 1 - linked[:, ::-1].argmax(axis=1)
+        # Ask the same checks the article sync uses, per linked URL, so the column always agrees with it
+        excluded_counts, url_counts = {}, {}
+        for url, domain in zip(app_data.url_texts, app_data.url_domains):
+            if not utils.is_syncable_url(url): continue # Sync never fetches these, excluded or not
+            url_counts[domain] = url_counts.get(domain, 0) + 1
+            if utils.is_excluded_domain(url, config.EXCLUDED_LINK_DOMAINS): excluded_counts[domain] = excluded_counts.get(domain, 0) + 1
+
+        hide_excluded = self.hide_excluded_domains_var.get()
+        for row, domain in enumerate(app_data.domain_names):
+            excluded_count = excluded_counts.get(domain, 0)
+            excluded = excluded_count > 0 and excluded_count == url_counts.get(domain, 0)
+            if excluded and hide_excluded: continue
+            if domain not in url_counts: sync_status = "Not synced" # No http(s) link to fetch
+            else: sync_status = "Excluded" if excluded else ("Partly excluded" if excluded_count else "")
+            if linked[row].any():
+                first = (app_data.domain_day_start + datetime.timedelta(days=int(first_days[row]))).strftime('%Y-%m-%d')
+                last = (app_data.domain_day_start + datetime.timedelta(days=int(last_days[row]))).strftime('%Y-%m-%d')
+            else:
+                first = last = ""
+            self.domains_tree.insert("", "end", iid=domain, text=domain,
+                                     values=(len(app_data.domain_posts_map.get(domain, [])), first, last, sync_status))
+
+    def _on_domain_select(self, event):
+        """Redraws the domain timeline for the selected domains, or all domains if none is selected."""
+        self._draw_domain_heatmap(selected_domains=list(self.domains_tree.selection()) or None)
+
+    def _draw_domain_heatmap(self, selected_domains=None):
+        """Draws the day-by-day count of posts linking to the selected domains, like the symbol timeline."""
+        self.domain_heatmap_canvas.delete("all")
+        title = "Domain Link Timeline: "
+        matrix = app_data.domain_day_matrix
+        if selected_domains:
+            domain_rows = {domain: row for row, domain in enumerate(app_data.domain_names)}
+            day_counts = matrix[[domain_rows[d] for d in selected_domains if d in domain_rows]].sum(axis=0)
+            title += f"{len(selected_domains)} Domains Selected" if len(selected_domains) > 3 else ", ".join(selected_domains)
+        else:
+            day_counts = matrix.sum(axis=0)
+            title += "All Domains"
+        self.domain_heatmap_canvas.master.config(text=title)
+
+        if not day_counts.any(): return
+        canvas_width = self.domain_heatmap_canvas.winfo_width()
+        canvas_height = self.domain_heatmap_canvas.winfo_height()
+        if canvas_width < 2 or canvas_height < 2: return
+        total_days = len(day_counts)
+        if total_days < 2: return
+
+        max_count = float(day_counts.max())
+        bar_width = canvas_width / (total_days - 1)
+        for i, count in enumerate(day_counts.tolist()):
+            if count == 0: continue # Leave the canvas background for empty days
+            self.domain_heatmap_canvas.create_rectangle(i * bar_width, 0, (i + 1) * bar_width, canvas_height,
+                                                        fill=self._get_heatmap_color(count, max_count), outline="")
+
+    def _show_domain_posts(self):
+        """Shows every post linking to one of the selected domains in the post list."""
+        selected_domains = list(self.domains_tree.selection())
+        if not selected_domains:
+            messagebox.showinfo("Link Domains", "Select one or more domains first.", parent=self.root)
+            return
+        post_numbers = np.unique(np.concatenate([np.asarray(app_data.domain_posts_map.get(d, []), dtype=np.int64) for d in selected_domains]))
+        rows = [row for row in (app_data.row_for_post_number(pn) for pn in post_numbers.tolist()) if row is not None]
+        label = ", ".join(selected_domains) if len(selected_domains) <= 3 else f"{len(selected_domains)} domains"
+        self.show_list_view()
+        self._handle_search_results(np.sort(np.asarray(rows, dtype=np.int64)), f"links to {label}")
+
     def _setup_threads_view(self):
         """Creates the widgets for the Narrative Threads view."""
         self.threads_view_frame.grid_rowconfigure(0, weight=1)
@@ -1351,6 +1705,7 @@ class QPostViewer:
         self.multi_clock_frame.grid_remove()
         self.threads_view_frame.grid_remove()
         self.symbols_view_frame.grid_remove()
+        self.domains_view_frame.grid_remove()
         self.list_view_frame.grid()
 
     def show_clock_view(self):
@@ -1358,6 +1713,7 @@ class QPostViewer:
         self.list_view_frame.grid_remove()
         self.threads_view_frame.grid_remove()
         self.symbols_view_frame.grid_remove()
+        self.domains_view_frame.grid_remove()
         self.multi_clock_frame.grid()
         if not self.clocks_initialized:
             self.build_clock_view()
@@ -1367,6 +1723,7 @@ class QPostViewer:
         self.list_view_frame.grid_remove()
         self.multi_clock_frame.grid_remove()
         self.symbols_view_frame.grid_remove()
+        self.domains_view_frame.grid_remove()
         self.threads_view_frame.grid()
         self._populate_threads_view()
         
@@ -1375,6 +1732,7 @@ class QPostViewer:
         self.list_view_frame.grid_remove()
         self.multi_clock_frame.grid_remove()
         self.threads_view_frame.grid_remove()
+        self.domains_view_frame.grid_remove()
         self.symbols_view_frame.grid()
         
         # Populate both the list and the heatmap
@@ -1382,6 +1740,19 @@ class QPostViewer:
         # Use .after() to give the canvas a moment to be drawn before we measure it
         self.root.after(50, self._draw_symbol_heatmap)    
 
+    def show_domains_view(self):
+        """Shows the link domains view and populates its widgets."""
+        self.list_view_frame.grid_remove()
+        self.multi_clock_frame.grid_remove()
+        self.threads_view_frame.grid_remove()
+        self.symbols_view_frame.grid_remove()
+        self.domains_view_frame.grid()
+
+        app_data.ensure_deferred_indices() # The domain index is one of them
+        self._populate_domains_view()
+        # Give the canvas a moment to be drawn before we measure it
+        self.root.after(50, self._draw_domain_heatmap)
+
     def maximize_single_clock(self, year_data):
         """Creates a new window for a single year's Q Clock."""
         if year_data is None or year_data.empty:
@@ -1504,7 +1875,7 @@ class QPostViewer:
             year_frame.grid(row=row, column=col, padx=5, pady=5, sticky="nsew")
             
             ttk.Label(year_frame, text=str(year), font=("Arial", 14, "bold")).pack(pady=(5,0))
-            df_year = self.df_all_posts[self.df_all_posts['Datetime_UTC'].dt.year == year].copy()
+            df_year = self.df_all_posts[self.df_all_posts['Datetime_UTC'].dt.year == year]
             clock = QClock(year_frame, self.root, self, self.style, data=df_year)
             self.clock_instances.append(clock)
         
@@ -1546,150 +1917,93 @@ class QPostViewer:
         return "break"
 # --- END _PREVENT_TEXT_EDIT ---
 
-# --- START _INSERT_TEXT_WITH_CLICKABLE_URLS ---
-    def _insert_text_with_clickable_urls(self, text_widget, text_content_raw, base_tags_tuple, link_event_tag_prefix):
-        if pd.isna(text_content_raw) or not str(text_content_raw).strip():
-            text_widget.insert(tk.END, "", base_tags_tuple if base_tags_tuple else ())
-            return
-        text_content = utils.sanitize_text_for_tkinter(text_content_raw)
-        if not isinstance(text_content, str) or not text_content.strip():
-            text_widget.insert(tk.END, str(text_content) if pd.notna(text_content) else "", base_tags_tuple if base_tags_tuple else ())
-            return
-
-        last_end = 0
-        for url_match in config.URL_REGEX.finditer(text_content):
-            start, end = url_match.span()
-            if start > last_end:
-                text_widget.insert(tk.END, text_content[last_end:start], base_tags_tuple)
-
-            url = url_match.group(0)
-            clickable_tag_instance = f"{link_event_tag_prefix}_url_{url_match.start()}"
-            current_tags = list(base_tags_tuple) if base_tags_tuple else []
-            current_tags.extend(['clickable_link_style', clickable_tag_instance])
-
-            text_widget.insert(tk.END, url, tuple(current_tags))
-            text_widget.tag_bind(clickable_tag_instance, "<Button-1>", lambda e, u=url: utils.open_link_with_preference(u, self.app_settings))
-            last_end = end
-
-        if last_end < len(text_content):
-            text_widget.insert(tk.END, text_content[last_end:], base_tags_tuple)
-# --- END _INSERT_TEXT_WITH_CLICKABLE_URLS ---
-
-# --- START _INSERT_TEXT_WITH_ABBREVIATIONS_AND_URLS ---
-    def _insert_text_with_abbreviations_and_urls(self, text_widget, text_content_raw, base_tags_tuple, post_id_for_tagging):
+# --- START _TEXT_SEGMENTS_WITH_ABBREVIATIONS_AND_URLS ---
+    def _text_segments_with_abbreviations_and_urls(self, segments, text_content_raw, base_tags_tuple, highlight_enabled,
+                                                   abbreviation_spans=None, url_spans=None):
+        """
+        Appends text to a render model's segments with its abbreviations tagged
+        and each URL as a clickable ('url', url) segment. abbreviation_spans
+        and url_spans are the text's precomputed spans (see
+        data.abbreviation_spans_for_row and data.url_spans_for_row); when None
+        the text is scanned here. A URL stays one link, so abbreviations
+        inside it are not tagged.
+        """
         if pd.isna(text_content_raw) or not str(text_content_raw).strip():
-            text_widget.insert(tk.END, "", base_tags_tuple if base_tags_tuple else ())
             return
 
         text_content = utils.sanitize_text_for_tkinter(text_content_raw)
         if not isinstance(text_content, str) or not text_content.strip():
-            text_widget.insert(tk.END, str(text_content) if pd.notna(text_content) else "", base_tags_tuple if base_tags_tuple else ())
+            if pd.notna(text_content) and str(text_content): segments.append(('text', str(text_content), base_tags_tuple or (), None))
             return
 
-        highlight_enabled = self.highlight_abbreviations_var.get()
-
-        # This will store (start_char_idx, end_char_idx, abbreviation_text, is_bracketed) tuples
-        abbreviation_spans = []
-
-        # 1. Find all potential abbreviations
-        # Sorted keys for greedy matching of longer abbreviations first
-        sorted_abbreviations = sorted(config.Q_ABBREVIATIONS.keys(), key=len, reverse=True)
-
-        for abbr in sorted_abbreviations:
-        # Pattern for standalone abbreviation (word boundary)
-        # Using re.escape to handle special characters in abbreviations
-            standalone_pattern = r'\b' + re.escape(abbr) + r'\b'
-            for match in re.finditer(standalone_pattern, text_content):
-                abbreviation_spans.append((match.start(), match.end(), abbr, False))
-
-        # Pattern for bracketed abbreviation
-            bracketed_pattern = r'\[' + re.escape(abbr) + r'\]'
-            for match in re.finditer(bracketed_pattern, text_content):
-                abbreviation_spans.append((match.start(), match.end(), abbr, True))
-
-        # Sort spans by their start index. If start indices are the same, longer matches first.
-        abbreviation_spans.sort(key=lambda x: (x[0], -x[1]))
-
-        # Filter overlapping matches, prioritizing longer ones that start earlier
-        non_overlapping_abbreviations = []
-        last_added_end = -1
-        for start, end, abbr_text, is_bracketed in abbreviation_spans:
-            if start >= last_added_end:
-                non_overlapping_abbreviations.append((start, end, abbr_text, is_bracketed))
-                last_added_end = end
-            else:
-        # If this abbreviation is completely contained within the last added one, skip.
-        # If it's a partial overlap, the sorting already prioritized the "best" (longest-starting-earliest).
-                pass
-
-        # 2. Iterate through text and apply tags
+        if abbreviation_spans is None:
+            abbreviation_spans = matcher.find_abbreviation_spans(text_content)
+        if url_spans is None:
+            url_spans = [match.span() for match in config.URL_REGEX.finditer(text_content)]
+
+        spans = [(start, end, True) for start, end in url_spans]
+        url_starts = [start for start, _ in url_spans]
+        for start, end in abbreviation_spans:
+            i = bisect.bisect_right(url_starts, start) - 1
+            if (i >= 0 and url_spans[i][1] > start) or (i + 1 < len(url_spans) and url_spans[i + 1][0] < end): continue
+            spans.append((start, end, False))
+        spans.sort()
+
+        abbr_tags = tuple(base_tags_tuple) + (('abbreviation_tag',) if highlight_enabled else ())
+        link_tags = tuple(base_tags_tuple) + ('clickable_link_style',)
         current_pos = 0
-
-        # Iterate through the content, processing segments between abbreviations, and then the abbreviations themselves.
-        # This will also handle URLs within non-abbreviation text segments by calling _insert_text_with_clickable_urls.
-        for start, end, abbr_text, is_bracketed in non_overlapping_abbreviations:
-        # Insert text before the current abbreviation match
+        for start, end, is_url in spans:
             if start > current_pos:
-                segment = text_content[current_pos:start]
-                self._insert_text_with_clickable_urls(text_widget, segment, base_tags_tuple, f"{post_id_for_tagging}_seg_{current_pos}")
-
-        # Insert the abbreviation with its specific tags
-            matched_abbr_full_text = text_content[start:end] # e.g., "ROTH" or "[ROTH]"
-
-            abbr_tags = list(base_tags_tuple)
-            if highlight_enabled:
-                abbr_tags.append('abbreviation_tag')
-
-        # For the purpose of applying the context menu, we can bind to the entire text area
-        # and use index. But to apply specific tags for highlighting, we insert.
-            text_widget.insert(tk.END, matched_abbr_full_text, tuple(abbr_tags))
-
+                segments.append(('text', text_content[current_pos:start], base_tags_tuple, None))
+            piece = text_content[start:end] # e.g., "ROTH", "[ROTH]" or a URL
+            if is_url: segments.append(('text', piece, link_tags, ('url', piece)))
+            else: segments.append(('text', piece, abbr_tags, None))
             current_pos = end
 
-        # Insert any remaining text after the last abbreviation
         if current_pos < len(text_content):
-            segment = text_content[current_pos:]
-            self._insert_text_with_clickable_urls(text_widget, segment, base_tags_tuple, f"main_{post_id_for_tagging}_final_{current_pos}")
-# --- END _INSERT_TEXT_WITH_ABBREVIATIONS_AND_URLS ---
+            segments.append(('text', text_content[current_pos:], base_tags_tuple, None))
+# --- END _TEXT_SEGMENTS_WITH_ABBREVIATIONS_AND_URLS ---
+
+# --- START BUILD_RENDER_MODEL ---
+    def _build_render_model(self, original_df_index, highlight_enabled, is_bookmarked):
+        """
+        Builds the render model of a post: everything update_display shows,
+        resolved once so repeat views only replay it. The model holds the
+        text pane as a list of (kind, content, tags, action) segments, where
+        kind is 'text' or 'image' (an inline quote thumbnail path) and action
+        is None, ('url', url), ('jump', post number) or ('open_image', path);
+        the side-panel image paths; the saved article path; and the post's
+        URLs.
+        """
+        segments = []
+        def add(text, tags=(), action=None): segments.append(('text', text, tags, action))
 
-# --- START UPDATE_DISPLAY ---
-    def update_display(self):
-        for widget in self.image_scrollable_frame.winfo_children(): widget.destroy()
-        self.displayed_images_references = []; self._quote_image_references = []; self.current_post_urls = []; self.current_post_downloaded_article_path = None
-        self.post_text_area.config(state=tk.NORMAL)
-        self.post_text_area.delete(1.0, tk.END)
-        self.post_text_area.tag_remove("search_highlight_tag", "1.0", tk.END)
-        
-        if self.df_displayed is None or self.df_displayed.empty or not (0 <= self.current_display_idx < len(self.df_displayed)):
-            self.show_welcome_message(); return
-        
-        original_df_index = self.df_displayed.index[self.current_display_idx]
         post = self.df_all_posts.loc[original_df_index]
+        row = self.df_all_posts.index.get_loc(original_df_index) # The precomputed spans are indexed by row position
         post_number_val = post.get('Post Number'); safe_filename_post_id = utils.sanitize_filename_component(str(post_number_val if pd.notna(post_number_val) else original_df_index))
         pn_display_raw = post.get('Post Number', original_df_index); pn_str = f"#{pn_display_raw}" if pd.notna(pn_display_raw) else f"(Idx:{original_df_index})"
-        is_bookmarked = original_df_index in self.bookmarked_posts; bookmark_indicator_text_raw = "[BOOKMARKED]" if is_bookmarked else ""
-        
-        self.post_text_area.insert(tk.END, utils.sanitize_text_for_tkinter(f"QView Post {pn_str} "), "post_number_val")
-        if is_bookmarked: self.post_text_area.insert(tk.END, utils.sanitize_text_for_tkinter(bookmark_indicator_text_raw) + "\n", "bookmarked_header")
-        else: self.post_text_area.insert(tk.END, "\n")
-        
+
+        add(utils.sanitize_text_for_tkinter(f"QView Post {pn_str} "), ("post_number_val",))
+        if is_bookmarked: add(utils.sanitize_text_for_tkinter("[BOOKMARKED]") + "\n", ("bookmarked_header",))
+        else: add("\n")
+
         dt_val = post.get('Datetime_UTC')
         if pd.notna(dt_val):
             dt_utc = dt_val.tz_localize('UTC') if dt_val.tzinfo is None else dt_val; dt_local = dt_utc.tz_convert(None)
             date_local_str=f"{dt_local.strftime('%Y-%m-%d %H:%M:%S %Z')} (Local)\n"; date_utc_str=f"{dt_utc.strftime('%Y-%m-%d %H:%M:%S %Z')} (UTC)\n"
-            self.post_text_area.insert(tk.END, "Date: ", "bold_label"); self.post_text_area.insert(tk.END, date_local_str, "date_val"); self.post_text_area.insert(tk.END, "      ", "bold_label"); self.post_text_area.insert(tk.END, date_utc_str, "date_val")
-        
+            add("Date: ", ("bold_label",)); add(date_local_str, ("date_val",)); add("      ", ("bold_label",)); add(date_utc_str, ("date_val",))
+
         author_text_raw=post.get('Author',''); tripcode_text_raw=post.get('Tripcode',''); author_text=utils.sanitize_text_for_tkinter(author_text_raw); tripcode_text=utils.sanitize_text_for_tkinter(tripcode_text_raw)
-        if author_text and pd.notna(author_text_raw): self.post_text_area.insert(tk.END, "Author: ", "bold_label"); self.post_text_area.insert(tk.END, f"{author_text}\n", "author_val")
-        if tripcode_text and pd.notna(tripcode_text_raw): self.post_text_area.insert(tk.END, "Tripcode: ", "bold_label"); self.post_text_area.insert(tk.END, f"{tripcode_text}\n", "author_val")
-        
+        if author_text and pd.notna(author_text_raw): add("Author: ", ("bold_label",)); add(f"{author_text}\n", ("author_val",))
+        if tripcode_text and pd.notna(tripcode_text_raw): add("Tripcode: ", ("bold_label",)); add(f"{tripcode_text}\n", ("author_val",))
+
         themes_list = post.get('Themes', [])
-        if themes_list and isinstance(themes_list, list) and len(themes_list) > 0: themes_str = utils.sanitize_text_for_tkinter(f"{', '.join(themes_list)}\n"); self.post_text_area.insert(tk.END, "Themes: ", "bold_label"); self.post_text_area.insert(tk.END, themes_str, "themes_val")
-        
+        if themes_list and isinstance(themes_list, list) and len(themes_list) > 0: add("Themes: ", ("bold_label",)); add(utils.sanitize_text_for_tkinter(f"{', '.join(themes_list)}\n"), ("themes_val",))
+
         referenced_posts_raw_data = post.get('Referenced Posts Raw')
         if isinstance(referenced_posts_raw_data, list) and referenced_posts_raw_data:
-            self.post_text_area.insert(tk.END, "\nReferenced Content:\n", ("bold_label"))
-            for ref_idx, ref_data in enumerate(referenced_posts_raw_data):
+            add("\nReferenced Content:\n", ("bold_label",))
+            for ref_data in referenced_posts_raw_data:
                 if not isinstance(ref_data, dict): continue
 
                 ref_id_str_for_display = ref_data.get('referenceID', '')
@@ -1704,20 +2018,22 @@ class QPostViewer:
                         quoted_post_num = None
 
                 ref_text_content_raw = '[Quoted post data not found]'
+                ref_abbreviation_spans = ref_url_spans = None
                 quoted_images_list = []
                 author_text = 'Unknown'
 
                 if pd.notna(quoted_post_num):
                     target_post_num_for_ref = int(quoted_post_num)
-                    quoted_post_series = self.df_all_posts[self.df_all_posts['Post Number'] == target_post_num_for_ref]
-                    
-                    if not quoted_post_series.empty:
-                        quoted_post = quoted_post_series.iloc[0]
+                    quoted_post_row = app_data.row_for_post_number(target_post_num_for_ref)
+
+                    if quoted_post_row is not None:
+                        quoted_post = self.df_all_posts.iloc[quoted_post_row]
                         ref_text_content_raw = quoted_post.get('Text', '[Text not available in quoted post]')
+                        ref_abbreviation_spans = app_data.abbreviation_spans_for_row(quoted_post_row)
+                        ref_url_spans = app_data.url_spans_for_row(quoted_post_row)
                         quoted_images_list = quoted_post.get('ImagesJSON', [])
                         author_text = quoted_post.get('Author', 'Unknown')
                     else:
-                        # --- THIS IS THE FIX ---
                         # If the post isn't found, use the fallback text from the reference data itself.
                         ref_text_content_raw = ref_data.get('textContent', f'[Post #{target_post_num_for_ref} not found, no fallback text.]')
                         author_text = ref_data.get('referencedPostAuthorID', 'Unknown')
@@ -1726,55 +2042,38 @@ class QPostViewer:
                     ref_text_content_raw = ref_data.get('textContent', '[Could not find valid text content in reference data]')
                     author_text = ref_data.get('referencedPostAuthorID', 'Unknown')
                     quoted_images_list = ref_data.get('images', [])
-                
+
                 ref_num_san = utils.sanitize_text_for_tkinter(str(ref_id_str_for_display))
-                self.post_text_area.insert(tk.END, "↪ Quoting ", ("quoted_ref_header"))
-                clickable_ref_id_tag = f"clickable_ref_id_{original_df_index}_{ref_idx}_{ref_id_str_for_display}"
+                add("↪ Quoting ", ("quoted_ref_header",))
                 if ref_num_san:
-                    self.post_text_area.insert(tk.END, f"{ref_num_san} ", ("quoted_ref_header", "clickable_link_style", clickable_ref_id_tag))
-                    if pd.notna(quoted_post_num):
-                        self.post_text_area.tag_bind(clickable_ref_id_tag, "<Button-1>", lambda e, pn=int(quoted_post_num): self.jump_to_post_number_from_ref(pn))
-                self.post_text_area.insert(tk.END, f"(by {author_text}):\n", ("quoted_ref_header"))
+                    jump_action = ('jump', int(quoted_post_num)) if pd.notna(quoted_post_num) else None
+                    add(f"{ref_num_san} ", ("quoted_ref_header", "clickable_link_style"), jump_action)
+                add(f"(by {author_text}):\n", ("quoted_ref_header",))
 
                 if quoted_images_list and isinstance(quoted_images_list, list):
-                    self.post_text_area.insert(tk.END, "    ", ("quoted_ref_text_body"))
+                    add("    ", ("quoted_ref_text_body",))
                     for q_img_idx, quote_img_data in enumerate(quoted_images_list):
                         img_filename_from_quote = quote_img_data.get('filename')
                         if img_filename_from_quote:
                             local_image_path_from_quote = os.path.join(config.IMAGE_DIR, utils.sanitize_filename_component(os.path.basename(img_filename_from_quote)))
                             if os.path.exists(local_image_path_from_quote):
-                                try:
-                                    img_pil_quote = Image.open(local_image_path_from_quote)
-                                    img_pil_quote.thumbnail((75, 75))
-                                    photo_quote = ImageTk.PhotoImage(img_pil_quote)
-                                    self._quote_image_references.append(photo_quote)
-                                    clickable_quote_img_tag = f"quote_img_open_{original_df_index}_{ref_idx}_{q_img_idx}"
-                                    self.post_text_area.image_create(tk.END, image=photo_quote)
-                                    self.post_text_area.insert(tk.END, " 🔗", ('clickable_link_style', clickable_quote_img_tag))
-                                    self.post_text_area.tag_bind(clickable_quote_img_tag, "<Button-1>", lambda e, p=local_image_path_from_quote: utils.open_image_external(p, self.root))
-                                    if q_img_idx < len(quoted_images_list) - 1: self.post_text_area.insert(tk.END, "  ")
-                                except Exception as e_quote_img: print(f"Error displaying inline quote img {img_filename_from_quote}: {e_quote_img}")
-                    self.post_text_area.insert(tk.END, "\n")
-                
-                self._insert_text_with_abbreviations_and_urls(self.post_text_area, ref_text_content_raw, ("quoted_ref_text_body",), f"qref_{original_df_index}_{ref_idx}")
-                self.post_text_area.insert(tk.END, "\n")
-            self.post_text_area.insert(tk.END, "\n")
+                                segments.append(('image', local_image_path_from_quote, (), None))
+                                add(" 🔗", ('clickable_link_style',), ('open_image', local_image_path_from_quote))
+                                if q_img_idx < len(quoted_images_list) - 1: add("  ")
+                    add("\n")
+
+                self._text_segments_with_abbreviations_and_urls(segments, ref_text_content_raw, ("quoted_ref_text_body",), highlight_enabled,
+                                                                ref_abbreviation_spans, ref_url_spans)
+                add("\n")
+            add("\n")
 
         main_text_content_raw = post.get('Text', '')
-        self.post_text_area.insert(tk.END, "Post Text:\n", ("bold_label"))
-        self._insert_text_with_abbreviations_and_urls(self.post_text_area, main_text_content_raw, (), f"main_{original_df_index}")
+        add("Post Text:\n", ("bold_label",))
+        self._text_segments_with_abbreviations_and_urls(segments, main_text_content_raw, (), highlight_enabled,
+                                                        app_data.abbreviation_spans_for_row(row),
+                                                        app_data.url_spans_for_row(row))
 
-        if self.current_search_active:
-            search_keyword = self.keyword_entry.get().strip().lower()
-            if search_keyword and search_keyword != config.PLACEHOLDER_KEYWORD.lower():
-                start_pos = "1.0"
-                while True:
-                    start_pos = self.post_text_area.search(search_keyword, start_pos, stopindex=tk.END, nocase=True)
-                    if not start_pos: break
-                    end_pos = f"{start_pos}+{len(search_keyword)}c"
-                    self.post_text_area.tag_add("search_highlight_tag", start_pos, end_pos)
-                    start_pos = end_pos
-        
+        image_paths = []
         images_json_data = post.get('ImagesJSON', [])
         if images_json_data and isinstance(images_json_data, list) and len(images_json_data) > 0:
             for img_data in images_json_data:
@@ -1782,33 +2081,104 @@ class QPostViewer:
                 if img_filename:
                     local_image_path = os.path.join(config.IMAGE_DIR, utils.sanitize_filename_component(os.path.basename(img_filename)))
                     if os.path.exists(local_image_path):
-                        try:
-                            img_pil = Image.open(local_image_path)
-                            img_pil.thumbnail((300, 300))
-                            photo = ImageTk.PhotoImage(img_pil)
-                            img_label = ttk.Label(self.image_scrollable_frame, image=photo, cursor="hand2")
-                            img_label.image = photo
-                            img_label.pack(pady=2, anchor='nw')
-                            img_label.bind("<Button-1>", lambda e, p=local_image_path: utils.open_image_external(p, self.root))
-                            self.displayed_images_references.append(photo)
-                        except Exception as e:
-                            print(f"Err display img {local_image_path}: {e}")
-        
+                        image_paths.append(local_image_path)
+
         metadata_link_raw = post.get('Link')
         if metadata_link_raw and pd.notna(metadata_link_raw) and str(metadata_link_raw).strip():
-            self.post_text_area.insert(tk.END, "\nSource Link: ", "bold_label")
-            self._insert_text_with_abbreviations_and_urls(self.post_text_area, str(metadata_link_raw).strip(), ("clickable_link_style",) , f"metalink_{original_df_index}")
-            self.post_text_area.insert(tk.END, "\n")
+            add("\nSource Link: ", ("bold_label",))
+            self._text_segments_with_abbreviations_and_urls(segments, str(metadata_link_raw).strip(), ("clickable_link_style",), highlight_enabled)
+            add("\n")
 
         article_found_path = None; urls_to_scan_for_articles = []
         if metadata_link_raw and isinstance(metadata_link_raw, str) and metadata_link_raw.strip(): urls_to_scan_for_articles.append(metadata_link_raw.strip())
-        if main_text_content_raw: urls_to_scan_for_articles.extend(utils._extract_urls_from_text(main_text_content_raw))
+        urls_to_scan_for_articles.extend(app_data.urls_for_row(row))
         unique_urls_for_article_check = list(dict.fromkeys(urls_to_scan_for_articles))
         for url in unique_urls_for_article_check:
             if not url or not isinstance(url,str) or not url.startswith(('http://','https://')): continue
             if utils.is_excluded_domain(url, config.EXCLUDED_LINK_DOMAINS): continue
             exists, filepath = utils.check_article_exists_util(safe_filename_post_id, url)
             if exists: article_found_path = filepath; break
+
+        urls = list(dict.fromkeys(action[1] for _, _, _, action in segments if action and action[0] == 'url'))
+        return {'segments': segments, 'image_paths': image_paths, 'article_path': article_found_path, 'urls': urls}
+
+    def _get_render_model(self, original_df_index):
+        """Returns the post's render model for the current render settings, building it on a cache miss."""
+        highlight_enabled = self.highlight_abbreviations_var.get()
+        is_bookmarked = original_df_index in self.bookmarked_posts
+        key = (original_df_index, highlight_enabled, is_bookmarked)
+        model = self.render_cache.get(key)
+        if model is None:
+            model = self._build_render_model(original_df_index, highlight_enabled, is_bookmarked)
+            self.render_cache.put(key, model)
+        return model
+# --- END BUILD_RENDER_MODEL ---
+
+# --- START UPDATE_DISPLAY ---
+    def update_display(self):
+        self._cancel_image_loads()
+        self._cancel_prefetch() # Before this post's decodes are queued, so they never wait behind neighbours
+        for widget in self.image_scrollable_frame.winfo_children(): widget.destroy()
+        self.displayed_images_references = []; self._quote_image_references = []; self.current_post_urls = []; self.current_post_downloaded_article_path = None
+        self.post_text_area.config(state=tk.NORMAL)
+        self.post_text_area.delete(1.0, tk.END)
+        self.post_text_area.tag_remove("search_highlight_tag", "1.0", tk.END)
+        # Action tags are numbered per segment, so they are reused rather than piling up across posts
+        for tag in self.post_text_area.tag_names():
+            if tag.startswith("render_action_"): self.post_text_area.tag_delete(tag)
+        
+        if not self._has_current_post():
+            self.show_welcome_message(); return
+        
+        original_df_index = self._displayed_index(self.current_display_idx)
+        model = self._get_render_model(original_df_index)
+
+        for seg_idx, (kind, content, tags, action) in enumerate(model['segments']):
+            if kind == 'image':
+                image_name = self.post_text_area.image_create(tk.END, image=self._image_placeholder((75, 75)))
+                self._load_image_async(content, (75, 75), lambda photo, name=image_name: self._fill_inline_image(name, photo))
+                continue
+            if action is None:
+                self.post_text_area.insert(tk.END, content, tags)
+                continue
+            action_tag = f"render_action_{seg_idx}"
+            self.post_text_area.insert(tk.END, content, tags + (action_tag,))
+            if action[0] == 'url':
+                self.post_text_area.tag_bind(action_tag, "<Button-1>", lambda e, u=action[1]: utils.open_link_with_preference(u, self.app_settings))
+            elif action[0] == 'jump':
+                self.post_text_area.tag_bind(action_tag, "<Button-1>", lambda e, pn=action[1]: self.jump_to_post_number_from_ref(pn))
+            elif action[0] == 'open_image':
+                self.post_text_area.tag_bind(action_tag, "<Button-1>", lambda e, p=action[1]: utils.open_image_external(p, self.root))
+
+        if self.current_search_active:
+            match_length = tk.IntVar()
+            for term in self.search_highlight_terms:
+                if isinstance(term, re.Pattern):
+                    self._highlight_regex_matches(term)
+                    continue
+                if isinstance(term, str):
+                    # Literal term: plain case-insensitive substring
+                    pattern, use_regexp = term, False
+                else:
+                    # Word tokens: whole words in sequence, the last one a prefix (Tcl regex syntax)
+                    pattern, use_regexp = r"\m" + r"\W+".join(term) + r"\w*", True
+                start_pos = "1.0"
+                while True:
+                    start_pos = self.post_text_area.search(pattern, start_pos, stopindex=tk.END, nocase=True,
+                                                           regexp=use_regexp, count=match_length)
+                    if not start_pos or match_length.get() == 0: break
+                    end_pos = f"{start_pos}+{match_length.get()}c"
+                    self.post_text_area.tag_add("search_highlight_tag", start_pos, end_pos)
+                    start_pos = end_pos
+        
+        for local_image_path in model['image_paths']:
+            img_label = ttk.Label(self.image_scrollable_frame, image=self._image_placeholder((300, 300)), cursor="hand2")
+            img_label.pack(pady=2, anchor='nw')
+            img_label.bind("<Button-1>", lambda e, p=local_image_path: utils.open_image_external(p, self.root))
+            self._load_image_async(local_image_path, (300, 300), lambda photo, label=img_label: self._fill_side_image(label, photo))
+
+        self.current_post_urls = list(model['urls'])
+        article_found_path = model['article_path']
         if hasattr(self,'view_article_button'):
             if article_found_path: self.view_article_button.config(text="View Saved Article", state=tk.NORMAL, command=lambda p=article_found_path: self.open_downloaded_article(p))
             else: self.view_article_button.config(text="Article Not Saved", state=tk.DISABLED, command=lambda: None)
@@ -1816,7 +2186,7 @@ class QPostViewer:
             if self.current_post_urls: self.show_links_button.config(state=tk.NORMAL)
             else: self.show_links_button.config(state=tk.DISABLED)
         if hasattr(self,'view_edit_note_button'):
-            if self.df_displayed is not None and not self.df_displayed.empty and 0 <= self.current_display_idx < len(self.df_displayed): self.view_edit_note_button.config(state=tk.NORMAL)
+            if self._has_current_post(): self.view_edit_note_button.config(state=tk.NORMAL)
             else: self.view_edit_note_button.config(state=tk.DISABLED)
         self._update_context_button_state()
 
@@ -1832,14 +2202,184 @@ class QPostViewer:
         self.post_text_area.config(state=tk.DISABLED)
         self.update_post_number_label(); self.update_bookmark_button_status()
         self.root.update_idletasks()
+        self._restart_prefetch()
 
 # --- END UPDATE_DISPLAY ---
 
+# --- START BACKGROUND_IMAGE_LOADING ---
+    def _image_placeholder(self, size):
+        """Returns the grey box shown at size while an image is being decoded."""
+        placeholder = self._image_placeholders.get(size)
+        if placeholder is None:
+            placeholder = tk.PhotoImage(width=size[0], height=size[1])
+            placeholder.put("#808080", to=(0, 0, size[0], size[1]))
+            self._image_placeholders[size] = placeholder
+        return placeholder
+
+    def _cancel_image_loads(self):
+        """Drops every decode started for the post shown so far; queued ones never run."""
+        self._image_generation += 1
+        for future in self._pending_image_futures: future.cancel()
+        self._pending_image_futures = []
+
+    def _load_image_async(self, path, size, on_ready):
+        """
+        Calls on_ready with the PhotoImage of path's thumbnail at size, or with
+        None if it cannot be loaded. A thumbnail already in memory is handed
+        over at once; otherwise it is decoded and resized on the worker pool
+        and delivered on the Tk thread, unless the display has moved on.
+        """
+        photo = self.thumbnails.get_cached_photo(path, size)
+        if photo is not None:
+            on_ready(photo); return
+
+        generation = self._image_generation
+        future = self.image_executor.submit(self.thumbnails.load_image, path, size)
+        self._pending_image_futures.append(future)
+
+        def on_done(f):
+            # Runs on the worker thread; Tk is only touched from the main loop
+            if f.cancelled(): return
+            try: self.root.after(0, lambda: self._on_image_decoded(f, generation, path, size, on_ready))
+            except (RuntimeError, tk.TclError): pass # The window is already gone
+        future.add_done_callback(on_done)
+
+    def _on_image_decoded(self, future, generation, path, size, on_ready):
+        if generation != self._image_generation: return
+        try:
+            photo = self.thumbnails.add_photo(path, size, future.result())
+        except Exception as e:
+            print(f"Err display img {path}: {e}")
+            photo = None
+        on_ready(photo)
+
+    def _fill_inline_image(self, image_name, photo):
+        """Swaps an inline quote thumbnail's placeholder for the decoded image, or removes it if it failed."""
+        try:
+            if photo is not None:
+                self.post_text_area.image_configure(image_name, image=photo)
+                self._quote_image_references.append(photo)
+            else:
+                text_state = self.post_text_area.cget("state")
+                self.post_text_area.config(state=tk.NORMAL)
+                self.post_text_area.delete(image_name)
+                self.post_text_area.config(state=text_state)
+        except tk.TclError: pass # The post text was redrawn meanwhile
+
+    def _fill_side_image(self, img_label, photo):
+        """Swaps a side-panel image's placeholder for the decoded image, or drops it if it failed."""
+        if not img_label.winfo_exists(): return
+        if photo is None:
+            img_label.destroy(); return
+        img_label.config(image=photo)
+        img_label.image = photo
+        self.displayed_images_references.append(photo)
+# --- END BACKGROUND_IMAGE_LOADING ---
+
+# --- START IDLE_PREFETCH ---
+    def _cancel_prefetch(self):
+        """Stops the current prefetch round and drops its queued decodes."""
+        if self._prefetch_after_id:
+            self.root.after_cancel(self._prefetch_after_id)
+            self._prefetch_after_id = None
+        self._prefetch_generation += 1
+        for future in self._prefetch_futures: future.cancel()
+        self._prefetch_futures = []
+        self._prefetch_queue = []
+        self._prefetch_bytes = 0
+
+    def _restart_prefetch(self):
+        """
+        Starts a prefetch round around the current post: the render models and
+        thumbnails of the next and previous PREFETCH_RADIUS posts in the list,
+        nearest first, so stepping through them redraws from the caches.
+        """
+        self._cancel_prefetch()
+        if not self._has_current_post(): return
+        for distance in range(1, config.PREFETCH_RADIUS + 1):
+            for display_idx in (self.current_display_idx + distance, self.current_display_idx - distance):
+                if 0 <= display_idx < len(self.displayed_rows):
+                    self._prefetch_queue.append(display_idx)
+        if self._prefetch_queue:
+            self._prefetch_after_id = self.root.after(config.PREFETCH_DELAY_MS, self._prefetch_step)
+
+    def _postpone_prefetch(self, event=None):
+        """Pushes a pending prefetch step back, so prefetching never competes with user input."""
+        if self._prefetch_after_id:
+            self.root.after_cancel(self._prefetch_after_id)
+            self._prefetch_after_id = self.root.after(config.PREFETCH_DELAY_MS, self._prefetch_step)
+
+    def _prefetch_step(self):
+        """
+        Prefetches one post, then yields to the event loop until it is idle
+        again. Thumbnails are decoded on the prefetch worker; the round stops once
+        their decoded size would exceed PREFETCH_MEMORY_BUDGET_MB.
+        """
+        self._prefetch_after_id = None
+        if not self._prefetch_queue: return
+        display_idx = self._prefetch_queue.pop(0)
+        model = self._get_render_model(self._displayed_index(display_idx))
+
+        images = [(content, (75, 75)) for kind, content, _, _ in model['segments'] if kind == 'image']
+        images += [(path, (300, 300)) for path in model['image_paths']]
+        generation = self._prefetch_generation
+        for path, size in images:
+            if self.thumbnails.get_cached_photo(path, size) is not None: continue
+            cost = size[0] * size[1] * 4 # Upper bound of the decoded RGBA bitmap
+            if self._prefetch_bytes + cost > config.PREFETCH_MEMORY_BUDGET_MB * 1024 * 1024:
+                self._prefetch_queue = []
+                break
+            self._prefetch_bytes += cost
+            future = self.prefetch_executor.submit(self.thumbnails.load_image, path, size)
+            self._prefetch_futures.append(future)
+
+            def on_done(f, path=path, size=size):
+                if f.cancelled(): return
+                try: self.root.after(0, lambda: self._on_prefetch_decoded(f, generation, path, size))
+                except (RuntimeError, tk.TclError): pass # The window is already gone
+            future.add_done_callback(on_done)
+
+        if self._prefetch_queue:
+            self._prefetch_after_id = self.root.after_idle(self._prefetch_step)
+
+    def _on_prefetch_decoded(self, future, generation, path, size):
+        if generation != self._prefetch_generation or self.thumbnails.get_cached_photo(path, size) is not None: return
+        try:
+            self.thumbnails.add_photo(path, size, future.result())
+        except Exception as e:
+            print(f"Could not prefetch image {path}: {e}")
+# --- END IDLE_PREFETCH ---
+
+    def _highlight_regex_matches(self, regex):
+        """Tags every match of a compiled Python regex in the post text area."""
+        text_area = self.post_text_area
+        content = text_area.get("1.0", "end-1c")
+        # Tk 8.6 counts characters outside the BMP as two index positions
+        astral_offsets = [i for i, char in enumerate(content) if ord(char) > 0xFFFF] if tk.TkVersion < 9 else []
+        # Embedded images (quote thumbnails) take an index position each but are not in get()'s text;
+        # record each one's position counted in characters only, i.e. without the images before it
+        image_indices = [index for _, _, index in text_area.dump("1.0", "end", image=True, window=True)]
+        image_offsets = [(text_area.count("1.0", index, "indices") or (0,))[0] - i
+                         for i, index in enumerate(image_indices)]
+
+        def tk_offset(offset, after_images):
+            chars = offset + bisect.bisect_left(astral_offsets, offset)
+            # A match starting right after an image skips it; one ending right before it stops there
+            images = bisect.bisect_right(image_offsets, chars) if after_images else bisect.bisect_left(image_offsets, chars)
+            return chars + images
+
+        for match in regex.finditer(content):
+            if match.end() == match.start(): continue
+            start, end = tk_offset(match.start(), True), tk_offset(match.end(), False)
+            text_area.tag_add("search_highlight_tag", f"1.0+{start}c", f"1.0+{end}c")
+
 # --- START SHOW_WELCOME_MESSAGE ---
 
     def show_welcome_message(self):
         """Clears the display and shows the welcome text and logo."""
         # --- 1. PREPARE & CLEAR THE UI ---
+        self._cancel_image_loads()
+        self._cancel_prefetch()
         self.post_text_area.config(state=tk.NORMAL)
         self.post_text_area.delete(1.0, tk.END)
         
@@ -1900,19 +2440,19 @@ class QPostViewer:
         try: target_post_num_int = int(post_number)
         except (ValueError, TypeError): messagebox.showinfo("Navigation Error", f"Invalid post number format for jump: {post_number}.", parent=self.root); return
         
-        matching_posts = self.df_all_posts[self.df_all_posts['Post Number'] == target_post_num_int]
+        matching_row = app_data.row_for_post_number(target_post_num_int)
         
-        if not matching_posts.empty:
-            original_df_idx_to_jump_to = matching_posts.index[0]
+        if matching_row is not None:
+            original_df_idx_to_jump_to = self.df_all_posts.index[matching_row]
             
             if self.current_search_active:
                 self.clear_search_and_show_all()
                 self.root.update_idletasks() # Let the UI refresh after clearing search
 
-            if self.df_displayed is not None and original_df_idx_to_jump_to in self.df_displayed.index: 
-                # Find the position of the target post in the currently displayed list
-                display_idx = self.df_displayed.index.get_loc(original_df_idx_to_jump_to)
-                # Select the item in the tree. This will trigger the on_tree_select event,
+            display_idx = self._display_idx_of(original_df_idx_to_jump_to)
+            if display_idx is not None: 
+                # Found the position of the target post in the currently displayed list
+                # Select the item in the list. This calls on_tree_select,
                 # which is the single correct place to update self.current_display_idx and the view.
                 self.select_tree_item_by_idx(display_idx)
             else:
@@ -1930,8 +2470,8 @@ class QPostViewer:
 
         current_date = None
 # Try to get the date of the currently displayed post
-        if self.df_displayed is not None and not self.df_displayed.empty and 0 <= self.current_display_idx < len(self.df_displayed):
-            current_post = self.df_displayed.iloc[self.current_display_idx]
+        if self._has_current_post():
+            current_post = self.df_all_posts.iloc[self.displayed_rows[self.current_display_idx]]
             dt_val = current_post.get('Datetime_UTC')
             if pd.notna(dt_val):
                 current_date = dt_val.date()
@@ -1948,21 +2488,22 @@ class QPostViewer:
             self.root.update_idletasks() # Ensure UI updates before proceeding
 
 # Find posts for the target date
-        results = self.df_all_posts[self.df_all_posts['Datetime_UTC'].dt.date == target_date]
+        rows, _ = self._cached_search("Query", f"date:{target_date.strftime('%Y-%m-%d')}")
         
-        if not results.empty:
+        if len(rows) > 0:
 # Re-sort results by post number to ensure consistent navigation
-            results = results.sort_values(by='Post Number').reset_index(drop=True)
-            self._handle_search_results(results, f"Posts from {target_date.strftime('%Y-%m-%d')}")
+            post_numbers = self.df_all_posts['Post Number'].to_numpy()[rows]
+            rows = rows[np.argsort(post_numbers, kind='stable')]
+            self._handle_search_results(rows, f"Posts from {target_date.strftime('%Y-%m-%d')}")
         else:
             messagebox.showinfo("No Posts Found", f"No posts found for {target_date.strftime('%Y-%m-%d')}.", parent=self.root)
 # If no posts found for the target date, we should still clear existing selection
 # or show a neutral state. Calling update_display with -1 current_display_idx handles this.
-            self.df_displayed = pd.DataFrame(columns=self.df_all_posts.columns if self.df_all_posts is not None else [])
+            self._set_displayed_rows([])
             self.current_search_active = True # Treat as a search result
             self.clear_search_button.config(state=tk.NORMAL)
             self.current_display_idx = -1
-            self.repopulate_treeview(self.df_displayed, select_first_item=False)
+            self.repopulate_treeview(select_first_item=False)
             self.show_welcome_message() # Show welcome on no results
 
     def prev_day_post(self):
@@ -2121,6 +2662,8 @@ class QPostViewer:
     def on_closing(self):
         utils.save_bookmarks_to_file(self.bookmarked_posts, config.BOOKMARKS_FILE_PATH)
         utils.save_user_notes(self.user_notes, config.USER_NOTES_FILE_PATH)
+        self.image_executor.shutdown(wait=False, cancel_futures=True)
+        self.prefetch_executor.shutdown(wait=False, cancel_futures=True)
         self.root.destroy()
 
 # --- END ON_CLOSING ---
@@ -2180,33 +2723,33 @@ class QPostViewer:
 
                 if self.current_search_active:
                     self.current_display_idx = -1 
-                    self.df_displayed = self.df_all_posts.copy() #
+                    self._set_displayed_rows(None) #
                     self.current_search_active = False #
                     self.clear_search_button.config(state=tk.DISABLED) #
-                    self.repopulate_treeview(self.df_displayed, select_first_item=True) #
+                    self.repopulate_treeview(select_first_item=True) #
                     self.root.update_idletasks() # Allow UI to update
 
-                matching_posts = self.df_all_posts[self.df_all_posts['Post Number'] == post_to_find] #
-                if not matching_posts.empty: #
-                    original_df_idx_of_target = matching_posts.index[0]
+                matching_row = app_data.row_for_post_number(post_to_find)
+                if matching_row is not None: #
+                    original_df_idx_of_target = self.df_all_posts.index[matching_row]
 
-                    if self.df_displayed is not None and original_df_idx_of_target in self.df_displayed.index:
-                        target_display_idx_in_current_df = self.df_displayed.index.get_loc(original_df_idx_of_target)
+                    target_display_idx_in_current_df = self._display_idx_of(original_df_idx_of_target)
+                    if target_display_idx_in_current_df is not None:
 
                         self.current_display_idx = -1
                         
                         self.select_tree_item_by_idx(target_display_idx_in_current_df) #
                     else:
-# This case would be unusual if df_displayed is correctly set to df_all_posts
+# This case would be unusual if every post is displayed
                          messagebox.showinfo("Not Found", f"Post # {post_to_find} (Original Index {original_df_idx_of_target}) not found in current display view.", parent=self.root) #
                 else:
                     messagebox.showinfo("Not Found", f"Post # {post_to_find} not found in all posts.", parent=self.root) #
             else: 
 # This is for range or list search (e.g., "10-15" or "10,12,15")
-                results = self.df_all_posts[self.df_all_posts['Post Number'].isin(target_post_numbers)]
+                rows = sorted({row for row in map(app_data.row_for_post_number, target_post_numbers) if row is not None})
 # The fix for this path (setting self.current_display_idx = -1)
 # should already be in your _handle_search_results method from my previous response.
-                self._handle_search_results(results, search_term_str) #
+                self._handle_search_results(rows, search_term_str) #
 
         except ValueError: # Catches int conversion errors or custom ValueErrors
             messagebox.showerror("Input Error", "Invalid input. Please enter a number, a range (e.g., 10-15), or a comma-separated list. Ensure range parts are not empty.", parent=self.root)
@@ -2236,26 +2779,173 @@ class QPostViewer:
                 self.restore_placeholder(None, placeholder, entry_widget)
             return
 
-        keyword_lower = keyword.lower()
-        
 # Ensure df_all_posts is not None before trying to search
         if self.df_all_posts is None:
             messagebox.showerror("Data Error", "Post data is not loaded.", parent=self.root)
             return
 
-        results = self.df_all_posts[
-            (self.df_all_posts['Text'].str.lower().str.contains(keyword_lower, na=False, regex=False)) |
-            (self.df_all_posts['Tripcode'].str.lower().str.contains(keyword_lower, na=False, regex=False)) # Themes search removed from here
-        ]
-        
-        self._handle_search_results(results, f"Search = '{keyword}'") # Updated search term string
-        
-# Clear the entry and restore placeholder after search attempt
-        entry_widget.delete(0, tk.END)
-        self.restore_placeholder(None, placeholder, entry_widget)
+# Return searches right away; a live search still waiting would only repeat it
+        self._cancel_live_search()
+        self._live_search_text = None
+        self._live_search_rows = None
+
+# The entry keeps its text so the search can be refined by typing on
+        search_mode = self.search_mode_var.get()
+        if search_mode == "Regex":
+            self._run_regex_search(keyword, f"Regex = '{keyword}'")
+        elif search_mode == "Fuzzy":
+            self._run_query(keyword, f"Fuzzy Search = '{keyword}'", fuzzy_words=True)
+        else:
+            self._run_query(keyword, f"Search = '{keyword}'")
+
+    def _run_query(self, query_text, search_term_str, fuzzy_words=False):
+        """Runs a query through the search index and shows the results. Returns False on a malformed query."""
+        try:
+            rows, highlight_terms = self._cached_search("Fuzzy" if fuzzy_words else "Query", query_text)
+        except search.QuerySyntaxError as e:
+            messagebox.showerror("Search Error", f"Could not understand the search:\n{e}", parent=self.root)
+            return False
+        self._handle_search_results(rows, search_term_str, highlight_terms)
+        return True
+
+    def _run_regex_search(self, pattern, search_term_str):
+        """Runs a regular expression over post text (trigram-prefiltered) and shows the results."""
+        try:
+            rows, highlight_terms = self._cached_search("Regex", pattern)
+        except re.error as e:
+            messagebox.showerror("Search Error", f"Invalid regular expression:\n{e}", parent=self.root)
+            return False
+        self._handle_search_results(rows, search_term_str, highlight_terms)
+        return True
+
+    def _cached_search(self, search_mode, text, refine_from=None):
+        """
+        Returns (rows, highlight_terms) for a search box text in the given
+        mode ("Query", "Fuzzy" or "Regex"), from the result cache when the
+        same search ran before. Queries are keyed by their parsed form, so
+        "Storm  AND rain" and "storm rain" share an entry. The cache belongs
+        to one search index: when the indices are rebuilt or reloaded (new
+        posts or themes), it is emptied. refine_from is an optional
+        (previous text, rows) to narrow a query that extends it; refined
+        results are not cached, only searches over every post are.
+        Raises search.QuerySyntaxError or re.error for a malformed search.
+        """
+        search_index = app_data.get_search_index()
+        if self._search_cache_index is not search_index:
+            self.search_cache.clear()
+            self._search_cache_index = search_index
+
+        fuzzy_distance = self.app_settings.get("fuzzy_max_distance", settings.DEFAULT_SETTINGS["fuzzy_max_distance"])
+        if search_mode == "Regex":
+            key = ("Regex", text)
+        else:
+            key = ("Query", search.query_key(text, fuzzy_distance, fuzzy_words=search_mode == "Fuzzy"))
+        cached = self.search_cache.get(key)
+        if cached is not None:
+            return cached
+
+        if search_mode == "Regex":
+            rows, regex = search_index.regex_search(text)
+            highlight_terms = [regex]
+        elif search_mode == "Query" and refine_from is not None and search.is_refinement(refine_from[0], text):
+            rows, highlight_terms = search_index.refine(text, refine_from[1])
+            return rows, tuple(highlight_terms)
+        else:
+            rows, highlight_terms = search_index.query(text, fuzzy_distance, search_mode == "Fuzzy")
+        # Entries are shared between searches, so nothing may modify them in place
+        rows.flags.writeable = False
+        result = (rows, tuple(highlight_terms))
+        self.search_cache.put(key, result)
+        return result
 
 # --- END KEYWORD_SEARCH_LOGIC ---
 
+# --- START LIVE_SEARCH_LOGIC ---
+
+    def _on_keyword_typed(self, event):
+        """Restarts the debounce timer on every keystroke in the keyword entry."""
+        if event.keysym in ("Return", "KP_Enter"):
+            return
+        self._cancel_live_search()
+        self._live_search_after_id = self.root.after(config.LIVE_SEARCH_DELAY_MS, self._run_live_search)
+
+    def _on_search_mode_changed(self, event=None):
+        """Re-runs the live search, since the same text means something else in another mode."""
+        self._live_search_text = None
+        self._live_search_rows = None
+        self._cancel_live_search()
+        self._live_search_after_id = self.root.after(config.LIVE_SEARCH_DELAY_MS, self._run_live_search)
+
+    def _cancel_live_search(self):
+        """Drops a live search that is still waiting for the debounce delay."""
+        if self._live_search_after_id is not None:
+            self.root.after_cancel(self._live_search_after_id)
+            self._live_search_after_id = None
+
+    def _run_live_search(self):
+        """
+        Searches for the keyword entry text as typed. A query that only adds
+        to the previous one (see search.is_refinement) is run against the
+        previous results instead of every post. Half-typed queries that do
+        not parse yet leave the current results alone, without an error dialog.
+        """
+        self._live_search_after_id = None
+        if self.df_all_posts is None or self.df_all_posts.empty:
+            return
+        text = self.keyword_entry.get().strip()
+        if text == config.PLACEHOLDER_KEYWORD:
+            text = ""
+        search_mode = self.search_mode_var.get()
+        if text == self._live_search_text:
+            return
+
+        if not text:
+            self._live_search_text = None
+            self._live_search_rows = None
+            if self.current_search_active:
+                self._show_result_rows(None, ())
+            return
+
+        refine_from = None
+        if self._live_search_rows is not None:
+            refine_from = (self._live_search_text, self._live_search_rows)
+        try:
+            rows, highlight_terms = self._cached_search(search_mode, text, refine_from)
+        except (search.QuerySyntaxError, re.error):
+            return
+
+        self._live_search_text = text
+        self._live_search_rows = rows if search_mode == "Query" else None
+        self._show_result_rows(rows, highlight_terms)
+
+    def _show_result_rows(self, rows, highlight_terms):
+        """
+        Shows the posts at the given row positions (rows=None shows every
+        post), updating the post list in place and keeping the selected post
+        if it is still listed. Used by the searches that refresh as you go.
+        """
+        self.search_highlight_terms = list(highlight_terms)
+        selected_index = self._displayed_index(self.current_display_idx) if self._has_current_post() else None
+        self._set_displayed_rows(rows)
+        self.current_search_active = rows is not None
+        self.clear_search_button.config(state=tk.NORMAL if rows is not None else tk.DISABLED)
+
+        new_display_idx = self._display_idx_of(selected_index) if selected_index is not None else None
+        self.post_list.set_rows(self.displayed_rows, new_display_idx if new_display_idx is not None else -1)
+
+        if len(self.displayed_rows) == 0:
+            self.current_display_idx = -1
+            self.show_welcome_message()
+        elif new_display_idx is not None:
+# Same post, but its position and highlights may have changed
+            self.current_display_idx = new_display_idx
+            self.update_display()
+        else:
+            self.current_display_idx = -1
+            self.select_tree_item_by_idx(0)
+
+# --- END LIVE_SEARCH_LOGIC ---
+
 # --- START DATE_SEARCH_LOGIC ---
 
     def show_year_calendar_view(self):
@@ -2287,16 +2977,13 @@ class QPostViewer:
                 return
 
             if all_years:
-                results = self.df_all_posts[
-                    (self.df_all_posts['Datetime_UTC'].dt.month == target_date.month) &
-                    (self.df_all_posts['Datetime_UTC'].dt.day == target_date.day)
-                ]
+                query_text = f"date:{target_date.strftime('%m-%d')}"
                 search_term = f"Posts from {target_date.strftime('%B %d')} (All Years)"
             else:
-                results = self.df_all_posts[self.df_all_posts['Datetime_UTC'].dt.date == target_date]
+                query_text = f"date:{target_date.strftime('%Y-%m-%d')}"
                 search_term = f"Date = {target_date.strftime('%Y-%m-%d')}"
 
-            self._handle_search_results(results, search_term)
+            self._run_query(query_text, search_term)
         except Exception as e:
             messagebox.showerror("Error", f"Date selection error: {e}", parent=self.root)
 # --- END _search_by_date_str ---
@@ -2379,13 +3066,8 @@ class QPostViewer:
                  messagebox.showwarning("Data Warning", "Some dates could not be parsed. Results might be incomplete.", parent=self.root)
 
         try:
-            valid_dates_df = self.df_all_posts.dropna(subset=['Datetime_UTC'])
-            results = valid_dates_df[
-                (valid_dates_df['Datetime_UTC'].dt.month == month) &
-                (valid_dates_df['Datetime_UTC'].dt.day == day)
-            ]
             month_name = datetime.date(1900, month, 1).strftime('%B')
-            self._handle_search_results(results, f"Posts from {month_name} {day} (All Years)")
+            self._run_query(f"date:{month:02d}-{day:02d}", f"Posts from {month_name} {day} (All Years)")
         except Exception as e:
             messagebox.showerror("Search Error", f"An error occurred during delta search: {e}", parent=self.root)
 
@@ -2474,31 +3156,147 @@ class QPostViewer:
             messagebox.showerror("Error", "Could not map selected themes to internal keys.", parent=self.theme_dialog)
             return
 
-        # --- THIS IS THE FIX FOR THE KEYERROR ---
-        # Check for the correct column name in the DataFrame
-        theme_col_name = None
-        if 'Themes' in self.df_all_posts.columns:
-            theme_col_name = 'Themes'
-        elif 'themes' in self.df_all_posts.columns: # Check for lowercase version
-            theme_col_name = 'themes'
-        else:
-            messagebox.showerror("Error", "Theme column not found in post data. Expected 'Themes' or 'themes'.", parent=self.theme_dialog)
-            return
-        # --- END FIX ---
-
         self.theme_dialog.destroy()
 
-        results = self.df_all_posts[
-            self.df_all_posts[theme_col_name].apply(
-                lambda themes: any(t_key in themes for t_key in selected_theme_keys) if isinstance(themes, list) else False
-            )
-        ]
-        
         search_term_str = f"Themes = '{', '.join(selected_themes_display)}'"
-        self._handle_search_results(results, search_term_str)    
+        self._run_query(" OR ".join(f"theme:{key}" for key in selected_theme_keys), search_term_str)    
 
 # --- END THEME_SEARCH_LOGIC ---
 
+# --- START FILTER_PANEL ---
+
+    def show_filter_panel(self):
+        """
+        Opens a panel of combinable filters (dates, themes, author, tripcode,
+        images, links, bookmarks, notes). The post list follows every change.
+        """
+        if self.df_all_posts is None or self.df_all_posts.empty:
+            messagebox.showwarning("No Data", "No post data loaded to filter.", parent=self.root)
+            return
+        if hasattr(self, 'filter_win') and self.filter_win.winfo_exists():
+            self.filter_win.lift()
+            return
+
+        try:
+            dialog_bg = self.style.lookup("TFrame", "background")
+            listbox_bg = self.style.lookup("Treeview", "fieldbackground")
+            listbox_fg = self.style.lookup("Treeview", "foreground")
+            select_bg = self.style.lookup("Treeview", "selectbackground")
+            select_fg = self.style.lookup("Treeview", "selectforeground")
+        except tk.TclError: # Fallback colors
+            dialog_bg = "#2b2b2b" if self.current_theme == "dark" else "#f0f0f0"
+            listbox_bg = "#3c3f41" if self.current_theme == "dark" else "#ffffff"
+            listbox_fg = "#e0e0e0" if self.current_theme == "dark" else "#000000"
+            select_bg = "#0078D7"
+            select_fg = "#ffffff"
+
+        self.filter_win = tk.Toplevel(self.root)
+        self.filter_win.title("Filter Posts")
+        self.filter_win.configure(bg=dialog_bg)
+        self.filter_win.geometry("460x560")
+        self.filter_win.transient(self.root)
+
+        main_frame = ttk.Frame(self.filter_win, padding="10")
+        main_frame.pack(expand=True, fill=tk.BOTH)
+        index = app_data.get_search_index()
+
+        date_frame = ttk.Labelframe(main_frame, text="Date (YYYY, YYYY-MM or YYYY-MM-DD)", padding=5)
+        date_frame.pack(fill=tk.X, pady=(0, 5))
+        ttk.Label(date_frame, text="From:").pack(side=tk.LEFT)
+        self.filter_start_entry = ttk.Entry(date_frame, width=12)
+        self.filter_start_entry.pack(side=tk.LEFT, padx=(2, 10))
+        ttk.Label(date_frame, text="To:").pack(side=tk.LEFT)
+        self.filter_end_entry = ttk.Entry(date_frame, width=12)
+        self.filter_end_entry.pack(side=tk.LEFT, padx=2)
+        for entry in (self.filter_start_entry, self.filter_end_entry):
+            entry.bind("<KeyRelease>", lambda e: self._apply_filter_panel())
+
+        def make_listbox(title, names, height):
+            frame = ttk.Labelframe(main_frame, text=title, padding=5)
+            frame.pack(fill=tk.BOTH, expand=True, pady=5)
+            listbox = tk.Listbox(frame, selectmode=tk.MULTIPLE, height=height, exportselection=False,
+                                 bg=listbox_bg, fg=listbox_fg, selectbackground=select_bg, selectforeground=select_fg,
+                                 font=('Arial', 10), relief=tk.SOLID, borderwidth=1)
+            scrollbar = ttk.Scrollbar(frame, orient="vertical", command=listbox.yview)
+            listbox.config(yscrollcommand=scrollbar.set)
+            listbox.pack(side="left", fill="both", expand=True)
+            scrollbar.pack(side="right", fill="y")
+            for name in names:
+                listbox.insert(tk.END, name or "(none)")
+            listbox.bind("<<ListboxSelect>>", lambda e: self._apply_filter_panel())
+            return listbox
+
+        self.filter_theme_listbox = make_listbox("Themes", [" ".join(word.capitalize() for word in name.split('_'))
+                                                             for name in index.theme_names], 6)
+        self.filter_all_themes_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(main_frame, text="Require all selected themes", variable=self.filter_all_themes_var,
+                        command=self._apply_filter_panel).pack(anchor="w")
+        self.filter_author_listbox = make_listbox("Author", index.author_names, 3)
+        self.filter_tripcode_listbox = make_listbox("Tripcode", index.tripcode_names, 4)
+
+        flags_frame = ttk.Frame(main_frame)
+        flags_frame.pack(fill=tk.X, pady=5)
+        self.filter_flag_vars = {}
+        for key, label in (("image", "Has image"), ("link", "Has link"), ("bookmarked", "Bookmarked"), ("note", "Has note")):
+            self.filter_flag_vars[key] = tk.BooleanVar(value=False)
+            ttk.Checkbutton(flags_frame, text=label, variable=self.filter_flag_vars[key],
+                            command=self._apply_filter_panel).pack(side=tk.LEFT, padx=(0, 8))
+
+        self.filter_status_var = tk.StringVar()
+        ttk.Label(main_frame, textvariable=self.filter_status_var).pack(anchor="w", pady=5)
+
+        button_frame = ttk.Frame(main_frame)
+        button_frame.pack(fill=tk.X)
+        ttk.Button(button_frame, text="Reset", command=self._reset_filter_panel).pack(side=tk.LEFT, expand=True, padx=(0, 5))
+        ttk.Button(button_frame, text="Close", command=self.filter_win.destroy).pack(side=tk.LEFT, expand=True)
+
+    def _reset_filter_panel(self):
+        for entry in (self.filter_start_entry, self.filter_end_entry):
+            entry.delete(0, tk.END)
+        for listbox in (self.filter_theme_listbox, self.filter_author_listbox, self.filter_tripcode_listbox):
+            listbox.selection_clear(0, tk.END)
+        self.filter_all_themes_var.set(False)
+        for var in self.filter_flag_vars.values():
+            var.set(False)
+        self._apply_filter_panel()
+
+    def _user_state_mask(self, original_indices):
+        """Returns a row mask for a collection of original DataFrame indices (bookmarks, notes)."""
+        mask = np.zeros(len(self.df_all_posts), dtype=bool)
+        positions = self.df_all_posts.index.get_indexer(list(original_indices))
+        mask[positions[positions >= 0]] = True
+        return mask
+
+    def _apply_filter_panel(self):
+        """ANDs the filter panel selections into one row mask and shows the matching posts."""
+        index = app_data.get_search_index()
+        flags = {key: var.get() for key, var in self.filter_flag_vars.items()}
+        themes = [index.theme_names[i] for i in self.filter_theme_listbox.curselection()]
+        authors = [index.author_names[i] for i in self.filter_author_listbox.curselection()]
+        tripcodes = [index.tripcode_names[i] for i in self.filter_tripcode_listbox.curselection()]
+        start = self.filter_start_entry.get().strip()
+        end = self.filter_end_entry.get().strip()
+        try:
+            mask = index.filter_mask(start, end, themes, self.filter_all_themes_var.get(), authors, tripcodes,
+                                     has_image=flags["image"], has_link=flags["link"])
+        except search.QuerySyntaxError as e:
+            self.filter_status_var.set(str(e))
+            return
+        if flags["bookmarked"]:
+            mask &= self.row_bookmarked
+        if flags["note"]:
+            mask &= self.row_has_note
+
+        if not (start or end or themes or authors or tripcodes or any(flags.values())):
+            self.filter_status_var.set(f"No filters: showing all {len(mask)} posts.")
+            self._show_result_rows(None, ())
+            return
+        rows = np.flatnonzero(mask)
+        self.filter_status_var.set(f"{len(rows)} posts match.")
+        self._show_result_rows(rows, ())
+
+# --- END FILTER_PANEL ---
+
 # --- START CLEAR_SEARCH_AND_SHOW_ALL ---
 
     def clear_search_and_show_all(self):
@@ -2506,24 +3304,27 @@ class QPostViewer:
             self.show_welcome_message() # Handles empty df_all_posts
             return
 
-        self.df_displayed = self.df_all_posts.copy()
+        self._set_displayed_rows(None)
         self.current_search_active = False
+        self.search_highlight_terms = []
+        self._cancel_live_search()
+        self._live_search_text = None
+        self._live_search_rows = None
         self.clear_search_button.config(state=tk.DISABLED)
         self.current_display_idx = -1
-        self.repopulate_treeview(self.df_displayed, select_first_item=True) # Select first post
+        self.repopulate_treeview(select_first_item=True) # Select first post
         
 # update_display is called via on_tree_select if selection happens in repopulate_treeview
-        if self.df_displayed.empty: 
+        if len(self.displayed_rows) == 0: 
 # Should not happen if df_all_posts is not empty
              self.show_welcome_message()
 # If no item was selected for some reason (e.g. tree is empty after repopulation), ensure correct state:
-        elif self.post_tree.selection() == (): 
+        elif self.post_list.selected_idx < 0: 
 # If nothing ended up selected after repopulate
              self.show_welcome_message()
 # Else, if a selection was made by repopulate_treeview, update_display would have been called.
 # If current_display_idx is somehow valid but no selection, explicitly update.
-        elif self.df_displayed is not None and not self.df_displayed.empty and \
-             0 <= self.current_display_idx < len(self.df_displayed) and not self.post_tree.selection():
+        elif self._has_current_post() and self.post_list.selected_idx < 0:
              self.update_display()
 
 # --- END CLEAR_SEARCH_AND_SHOW_ALL ---
@@ -2531,8 +3332,7 @@ class QPostViewer:
 # --- START PREV_POST ---
 
     def prev_post(self):
-        if self.df_displayed is None or self.df_displayed.empty: return
-        num_items = len(self.df_displayed)
+        num_items = len(self.displayed_rows)
         if num_items == 0: return
         if num_items == 1 and self.current_display_idx == 0: return 
 
@@ -2549,8 +3349,7 @@ class QPostViewer:
 # --- START NEXT_POST ---
 
     def next_post(self):
-        if self.df_displayed is None or self.df_displayed.empty: return
-        num_items = len(self.df_displayed)
+        num_items = len(self.displayed_rows)
         if num_items == 0: return
         if num_items == 1 and self.current_display_idx == 0: return
 
@@ -2625,12 +3424,12 @@ class QPostViewer:
 # --- START BOOKMARKING_LOGIC ---
 
     def toggle_current_post_bookmark(self):
-        if self.df_displayed is None or self.df_displayed.empty or self.current_display_idx < 0: 
+        if not self._has_current_post(): 
             messagebox.showwarning("Bookmark", "No post selected to bookmark/unbookmark.", parent=self.root) 
             return
         
 # Get the original DataFrame index of the currently displayed post
-        original_df_index_of_current_post = self.df_displayed.index[self.current_display_idx] 
+        original_df_index_of_current_post = self._displayed_index(self.current_display_idx) 
 
         post_series = self.df_all_posts.loc[original_df_index_of_current_post] 
         post_num_df = post_series.get('Post Number', original_df_index_of_current_post) 
@@ -2647,37 +3446,25 @@ class QPostViewer:
         
         self.update_display() 
 
-# Repopulate tree to update the '★' column, but DO NOT auto-select the first item.
-        self.repopulate_treeview(self.df_displayed, select_first_item=False) 
-        
-# Re-select the item that was just bookmarked/unbookmarked.
-# Its positional index (self.current_display_idx) within self.df_displayed has not changed.
-# The iid for the treeview is the original_df_index_of_current_post.
-        iid_to_reselect = str(original_df_index_of_current_post)
-        if self.post_tree.exists(iid_to_reselect): 
-            self.post_tree.selection_set(iid_to_reselect) 
-            self.post_tree.focus(iid_to_reselect) 
-            self.post_tree.see(iid_to_reselect) 
-# Note: self.post_tree.selection_set() will trigger on_tree_select.
-# Since new_display_idx will equal self.current_display_idx, and welcome_was_showing is false,
-# on_tree_select will NOT call update_display() again, which is correct as we just called it.
+# Refresh this post's row to update the '★' column; the selection stays where it is.
+        self._refresh_treeview_row(original_df_index_of_current_post)
         
         self.view_bookmarks_button.config(text=f"View Bookmarks ({len(self.bookmarked_posts)})") 
 
     def update_bookmark_button_status(self, is_welcome=False): # Added is_welcome
-        if is_welcome or self.df_displayed is None or self.df_displayed.empty or self.current_display_idx < 0:
+        if is_welcome or not self._has_current_post():
             self.bookmark_button.config(text="Bookmark Post", state=tk.DISABLED)
             return
         self.bookmark_button.config(state=tk.NORMAL)
-        original_df_index = self.df_displayed.index[self.current_display_idx]
+        original_df_index = self._displayed_index(self.current_display_idx)
         self.bookmark_button.config(text="Unbookmark This Post" if original_df_index in self.bookmarked_posts else "Bookmark This Post")
 
 
     # --- START UPDATE_CONTEXT_BUTTON_STATE ---
     def _update_context_button_state(self):
         if hasattr(self, 'view_context_button'):
-            if self.df_displayed is not None and not self.df_displayed.empty and 0 <= self.current_display_idx < len(self.df_displayed):
-                original_df_index = self.df_displayed.index[self.current_display_idx]
+            if self._has_current_post():
+                original_df_index = self._displayed_index(self.current_display_idx)
                 current_post_num = self.df_all_posts.loc[original_df_index].get('Post Number')
                 if pd.notna(current_post_num):
                     self.view_context_button.config(state=tk.NORMAL)
@@ -2694,26 +3481,26 @@ class QPostViewer:
         valid_bookmarked_indices = [idx for idx in self.bookmarked_posts if idx in self.df_all_posts.index]
         if not valid_bookmarked_indices:
             messagebox.showwarning("Bookmarks", "Bookmarked posts not found in current data.", parent=self.root)
-            self.df_displayed = pd.DataFrame(columns=self.df_all_posts.columns if self.df_all_posts is not None else [])
-            self.repopulate_treeview(self.df_displayed, select_first_item=False)
+            self._set_displayed_rows([])
+            self.repopulate_treeview(select_first_item=False)
             self.show_welcome_message()
             return
         
-        results_df = self.df_all_posts.loc[list(valid_bookmarked_indices)].copy()
-        if 'Datetime_UTC' in results_df.columns:
-            results_df.sort_values(by='Datetime_UTC', inplace=True) 
-        self._handle_search_results(results_df, "Bookmarked Posts")
+        rows = self.df_all_posts.index.get_indexer(valid_bookmarked_indices)
+        if 'Datetime_UTC' in self.df_all_posts.columns:
+            rows = rows[np.argsort(self.df_all_posts['Datetime_UTC'].to_numpy()[rows], kind='stable')]
+        self._handle_search_results(rows, "Bookmarked Posts")
 
 # --- END BOOKMARKING_LOGIC ---
 
 # --- START USER_NOTES_METHODS ---
 
     def show_note_popup(self):
-        if self.df_displayed is None or self.df_displayed.empty or not (0 <= self.current_display_idx < len(self.df_displayed)):
+        if not self._has_current_post():
             messagebox.showwarning("No Post Selected", "Please select a post to view or edit its note.", parent=self.root)
             return
 
-        original_df_index = str(self.df_displayed.index[self.current_display_idx])
+        original_df_index = str(self._displayed_index(self.current_display_idx))
         
         # Retrieve current note content and show_tooltip preference
         note_data = self.user_notes.get(original_df_index, {"content": "", "show_tooltip": True})
@@ -2771,9 +3558,8 @@ class QPostViewer:
             utils.save_user_notes(self.user_notes, config.USER_NOTES_FILE_PATH) # Save immediately
             print(f"Note for post index {original_df_index} saved. Tooltip enabled: {tooltip_enabled}")
             
-            # Refresh treeview to update '♪' icon and potentially tooltips
-            self.repopulate_treeview(self.df_displayed, select_first_item=False) 
-            self.select_tree_item_by_idx(self.current_display_idx) # Reselect current post
+            # Refresh this post's row to update the '♪' icon
+            self._refresh_treeview_row(int(original_df_index))
             note_popup.destroy()
 
         def cancel_and_close():
@@ -2795,12 +3581,12 @@ class QPostViewer:
         # Hide any existing tooltip first
         self.treeview_note_tooltip.hidetip()
 
-        # Get the item (row) under the mouse
-        item = self.post_tree.identify_row(event.y)
+        # Get the row under the mouse
+        row = self.post_list.row_at_y(event.y)
 
-        # Check if an item (row) is identified
-        if item:
-            original_df_index = item # Treeview iid is the original DataFrame index
+        # Check if a row is identified
+        if row is not None:
+            original_df_index = str(self.df_all_posts.index[row]) # Notes are keyed by the original DataFrame index
             note_data = self.user_notes.get(original_df_index)
 
             # Check if there's note data, if tooltip is enabled, and if content exists
@@ -2828,7 +3614,7 @@ class QPostViewer:
 # --- START EXPORT_DISPLAYED_LIST ---
 
     def export_displayed_list(self, file_format=""): 
-        if self.df_displayed is None or self.df_displayed.empty:
+        if len(self.displayed_rows) == 0:
             messagebox.showwarning("Export", "No posts to export.", parent=self.root)
             return
         
@@ -2861,18 +3647,17 @@ class QPostViewer:
         if not final_filename:
             return
         
-        df_exp = self.df_displayed.copy()
-        
-        cols_to_use = [c for c in config.EXPORT_COLUMNS if c in df_exp.columns]
+        cols_to_use = [c for c in config.EXPORT_COLUMNS if c in self.df_all_posts.columns]
         if not cols_to_use:
             messagebox.showerror("Export Error", "No valid columns found for export. Check EXPORT_COLUMNS in config.", parent=self.root)
             return
         
-        df_for_export = df_exp[cols_to_use]
+# Only the exported columns of the displayed rows are materialized
+        df_for_export = self.df_all_posts[cols_to_use].iloc[self.displayed_rows]
 
         try:
             if final_filename.endswith(".csv"):
-                df_csv = df_for_export.copy()
+                df_csv = df_for_export
                 if 'Themes' in df_csv.columns:
                     df_csv['Themes'] = df_csv['Themes'].apply(lambda x: ', '.join(x) if isinstance(x, list) else str(x))
                 if 'ImagesJSON' in df_csv.columns: 
@@ -2885,7 +3670,7 @@ class QPostViewer:
             
             elif final_filename.endswith(".html"):
                 import html
-                df_html = df_for_export.copy()
+                df_html = df_for_export
                 
                 if 'Link' in df_html.columns:
                     df_html['Link'] = df_html['Link'].apply(
@@ -3036,7 +3821,8 @@ class QPostViewer:
             if task_name == "images":
                 utils.download_all_post_images_util(self.df_all_posts, status_callback=status_cb, progress_callback=progress_cb)
             elif task_name == "articles":
-                utils.scan_and_download_all_articles_util(self.df_all_posts, status_callback=status_cb, progress_callback=progress_cb)
+                utils.scan_and_download_all_articles_util(self.df_all_posts, status_callback=status_cb, progress_callback=progress_cb,
+                                                          urls_for_row=app_data.urls_for_row)
             elif task_name == "quoted_images":
                 utils.download_all_quoted_images_util(self.df_all_posts, status_callback=status_cb, progress_callback=progress_cb)
             
@@ -3048,6 +3834,9 @@ class QPostViewer:
             print(error_msg)
             self.root.after(0, lambda: self._update_download_status(error_msg))
         finally:
+            # Downloaded files change which images and articles a post shows
+            self.root.after(0, self.render_cache.clear)
+            self.root.after(0, self.thumbnails.clear)
             for btn in buttons_to_disable:
                 if btn.winfo_exists():
                     self.root.after(0, lambda b=btn: b.config(state=tk.NORMAL))
@@ -3109,7 +3898,7 @@ class QPostViewer:
         self.settings_win.configure(bg=dialog_bg)
 
         # --- THIS IS THE FIX ---
-        self.settings_win.geometry("400x340") # Increased height from 300 to 340
+        self.settings_win.geometry("400x410") # Room for the Search frame
         # --- END FIX ---
         
         self.settings_win.transient(self.root)
@@ -3144,6 +3933,14 @@ class QPostViewer:
         self.settings_highlight_abbreviations_var = tk.BooleanVar(value=self.app_settings.get("highlight_abbreviations", settings.DEFAULT_SETTINGS.get("highlight_abbreviations")))
         ttk.Checkbutton(abbreviations_frame, text="Highlight Abbreviations in Post Text", variable=self.settings_highlight_abbreviations_var, command=self.on_setting_change).pack(anchor="w", padx=5)
 
+        # Fuzzy Search Distance
+        search_frame = ttk.Labelframe(main_frame, text="Search", padding="10")
+        search_frame.pack(fill="x", pady=5)
+        self.settings_fuzzy_distance_var = tk.IntVar(value=self.app_settings.get("fuzzy_max_distance", settings.DEFAULT_SETTINGS.get("fuzzy_max_distance")))
+        ttk.Label(search_frame, text="Fuzzy search typo tolerance (edits):").pack(side="left", padx=5)
+        ttk.Spinbox(search_frame, from_=0, to=search.MAX_FUZZY_DISTANCE, width=4, state="readonly",
+                    textvariable=self.settings_fuzzy_distance_var, command=self.on_setting_change).pack(side="left", padx=5)
+
         # Close Button
         close_button_frame = ttk.Frame(main_frame)
         close_button_frame.pack(side="bottom", fill=tk.X, pady=(10,0))
@@ -3163,6 +3960,13 @@ class QPostViewer:
             settings.save_settings(self.app_settings)
             print(f"Highlight abbreviations saved: '{new_highlight_abbreviations}'")
 
+        # --- Fuzzy Search Distance ---
+        new_fuzzy_distance = self.settings_fuzzy_distance_var.get()
+        if self.app_settings.get("fuzzy_max_distance") != new_fuzzy_distance:
+            self.app_settings["fuzzy_max_distance"] = new_fuzzy_distance
+            settings.save_settings(self.app_settings)
+            print(f"Fuzzy search distance saved: '{new_fuzzy_distance}'")
+
         # --- Link Opening Preference ---
         new_link_pref = self.settings_link_pref_var.get()
         if self.app_settings.get("link_opening_preference") != new_link_pref:
@@ -3177,6 +3981,51 @@ class QPostViewer:
 
 # --- END SHOW_SETTINGS_WINDOW ---
 
+# --- START SHOW_SEARCH_CACHE_STATS_WINDOW ---
+
+    def show_search_cache_stats_window(self):
+        """Shows how well the search result cache is doing, for debugging."""
+        if hasattr(self, 'cache_stats_win') and self.cache_stats_win.winfo_exists():
+            self.cache_stats_win.lift()
+            return
+
+        self.cache_stats_win = tk.Toplevel(self.root)
+        self.cache_stats_win.title("Search Cache Stats")
+        try:
+            dialog_bg = self.style.lookup("TFrame", "background")
+        except tk.TclError:
+            dialog_bg = "#2b2b2b" if self.current_theme == "dark" else "#f0f0f0"
+        self.cache_stats_win.configure(bg=dialog_bg)
+        self.cache_stats_win.geometry("300x220")
+        self.cache_stats_win.transient(self.root)
+
+        main_frame = ttk.Frame(self.cache_stats_win, padding="10")
+        main_frame.pack(expand=True, fill=tk.BOTH)
+        stats_var = tk.StringVar()
+        ttk.Label(main_frame, textvariable=stats_var, justify=tk.LEFT, font=('Courier New', 10)).pack(anchor="w", pady=(0, 10))
+
+        def refresh():
+            stats = self.search_cache.stats()
+            stored_bytes = sum(rows.nbytes for rows, _ in self.search_cache.values())
+            stats_var.set(f"Entries:   {stats['entries']} / {stats['maxsize']}\n"
+                          f"Hits:      {stats['hits']}\n"
+                          f"Misses:    {stats['misses']}\n"
+                          f"Hit rate:  {stats['hit_rate']:.1%}\n"
+                          f"Evictions: {stats['evictions']}\n"
+                          f"Rows held: {stored_bytes / 1024:.1f} KB")
+
+        def clear():
+            self.search_cache.clear()
+            refresh()
+
+        button_frame = ttk.Frame(main_frame)
+        button_frame.pack(fill=tk.X)
+        ttk.Button(button_frame, text="Refresh", command=refresh).pack(side=tk.LEFT, expand=True, padx=(0, 5))
+        ttk.Button(button_frame, text="Clear Cache", command=clear).pack(side=tk.LEFT, expand=True)
+        refresh()
+
+# --- END SHOW_SEARCH_CACHE_STATS_WINDOW ---
+
 # --- START SHOW_HELP_WINDOW ---
 
     def show_help_window(self):
@@ -3299,11 +4148,11 @@ class QPostViewer:
 # --- START SHOW_CONTEXT_CHAIN_VIEWER_WINDOW ---
 
     def show_context_chain_viewer_window(self):
-        if self.df_displayed is None or self.df_displayed.empty or not (0 <= self.current_display_idx < len(self.df_displayed)):
+        if not self._has_current_post():
             messagebox.showwarning("Context Chain", "Please select a post to view its context chain.", parent=self.root)
             return
 
-        original_df_index = self.df_displayed.index[self.current_display_idx]
+        original_df_index = self._displayed_index(self.current_display_idx)
         current_post = self.df_all_posts.loc[original_df_index]
         current_post_num = current_post.get('Post Number')
 
@@ -3415,10 +4264,10 @@ class QPostViewer:
                 self.context_text_area.insert(tk.END, "  None\n")
             self.context_text_area.insert(tk.END, "\n")
             
-        if self.df_displayed is None or self.df_displayed.empty or not (0 <= self.current_display_idx < len(self.df_displayed)):
+        if not self._has_current_post():
             return
 
-        original_df_index = self.df_displayed.index[self.current_display_idx]
+        original_df_index = self._displayed_index(self.current_display_idx)
         current_post = self.df_all_posts.loc[original_df_index]
         current_post_num = current_post.get('Post Number')
 
@@ -3439,13 +4288,13 @@ class QPostViewer:
         # --- Standard Context Sections ---
         quoted_by_this_post = app_data.post_quotes_map.get(current_post_num, [])
         display_section("Posts Quoted by This Post", quoted_by_this_post)
-        posts_quoting_this = app_data.post_quoted_by_map.get(current_post_num, [])
+        posts_quoting_this = app_data.quoted_by_map.get(current_post_num, [])
         display_section("Posts Quoting This Post", posts_quoting_this)
         
         current_date = current_post.get('Datetime_UTC')
         if pd.notna(current_date):
             time_hhmm = current_date.strftime("%H:%M")
-            delta_matches = app_data.post_time_hhmm_map.get(time_hhmm, [])
+            delta_matches = app_data.post_time_hhmm_map.get(app_data.minute_of_day(current_date), [])
             filtered_delta_matches = sorted(list(set(delta_matches) - {current_post_num} - set(quoted_by_this_post) - set(posts_quoting_this)))
             display_section(f"Time/Delta Matches ({time_hhmm})", filtered_delta_matches)
 
@@ -3457,7 +4306,7 @@ class QPostViewer:
 
         text_content = current_post.get('Text', '')
         if isinstance(text_content, str) and (markers := re.findall(r'\[([^\]]+)\]', text_content)):
-            all_shared_marker_posts = [p for m in markers for p in app_data.post_markers_map.get(m.strip(), []) if m.strip()]
+            all_shared_marker_posts = [p for m in markers for p in app_data.marker_posts_map.get(m.strip(), []) if m.strip()]
             filtered_marker_posts = sorted(list(set(all_shared_marker_posts) - {current_post_num} - set(quoted_by_this_post) - set(posts_quoting_this)))
             display_section("Shared [Markers]", filtered_marker_posts)
 
@@ -3507,9 +4356,9 @@ class QPostViewer:
     def _get_post_text_snippet(self, post_number, max_length=150):
         """Retrieves a text snippet for a given post number for use in tooltips."""
         if not pd.isna(post_number):
-            matching_posts = self.df_all_posts[self.df_all_posts['Post Number'] == post_number]
-            if not matching_posts.empty:
-                text_content = matching_posts.iloc[0].get('Text', '')
+            matching_row = app_data.row_for_post_number(post_number)
+            if matching_row is not None:
+                text_content = self.df_all_posts.iloc[matching_row].get('Text', '')
                 if isinstance(text_content, str):
                     snippet = text_content.strip()
                     if len(snippet) > max_length:
@@ -3635,7 +4484,7 @@ class QPostViewer:
         reversed_num = int(str(int(post_num))[::-1])
         
         # Check if a post with this reversed number actually exists
-        if not self.df_all_posts[self.df_all_posts['Post Number'] == reversed_num].empty:
+        if app_data.row_for_post_number(reversed_num) is not None:
             return reversed_num
         return None
 
@@ -3645,9 +4494,10 @@ class QPostViewer:
         mirrored_min = 59 - time_obj.minute
         mirrored_sec = 59 - time_obj.second
         
-        # Create a new time string to look up in the index
+        # The index is keyed by second of the day; the string is for display
         mirrored_time_str = f"{mirrored_hr:02}:{mirrored_min:02}:{mirrored_sec:02}"
-        matching_posts = app_data.post_time_hhmms_map.get(mirrored_time_str, [])
+        mirrored_second = (mirrored_hr * 60 + mirrored_min) * 60 + mirrored_sec
+        matching_posts = app_data.post_time_hhmmss_map.get(mirrored_second, [])
         return mirrored_time_str, matching_posts
 
 # --- END MIRRORING LOGIC HELPERS ---
@@ -3813,29 +4663,22 @@ class QPostViewer:
 
 # --- START ON_TREE_SELECT ---
 
-    def on_tree_select(self, event):
-        selected_items = self.post_tree.selection()
-        if selected_items:
-            selected_iid_str = selected_items[0]
+    def on_tree_select(self, display_idx):
+        """Called by the post list when the post at list position display_idx gets selected."""
+        if 0 <= display_idx < len(self.displayed_rows):
             try:
-                original_df_index = int(selected_iid_str)
-                if self.df_displayed is not None and original_df_index in self.df_displayed.index:
-                    new_display_idx = self.df_displayed.index.get_loc(original_df_index)
-                    
-                    welcome_was_showing = (hasattr(self, 'post_number_label') and 
-                                           self.post_number_label.cget("text") == "Welcome to QView!")
-                                           
-                    if (not hasattr(self, '_init_complete') or not self._init_complete or \
-                       new_display_idx != self.current_display_idx or welcome_was_showing):
-                        self.current_display_idx = new_display_idx # Update current index HERE
-                        self.update_display()
-                        self._update_context_chain_content() # NEW: Update context window content
-            except ValueError: 
-                print(f"Error: Tree iid '{selected_iid_str}' not a valid integer for index.")
+                welcome_was_showing = (hasattr(self, 'post_number_label') and 
+                                       self.post_number_label.cget("text") == "Welcome to QView!")
+                                       
+                if (not hasattr(self, '_init_complete') or not self._init_complete or \
+                   display_idx != self.current_display_idx or welcome_was_showing):
+                    self.current_display_idx = display_idx # Update current index HERE
+                    self.update_display()
+                    self._update_context_chain_content() # NEW: Update context window content
             except Exception as e: 
                 print(f"Error in on_tree_select: {e}")
         else: 
-# No items selected in tree
+# No post selected in the list
             self.current_display_idx = -1 # Reflect that no item is selected
             if hasattr(self, '_init_complete') and self._init_complete:
 # If fully initialized and selection is cleared, usually means list is empty
@@ -3843,83 +4686,105 @@ class QPostViewer:
 # update_display (if current_display_idx becomes -1) will call show_welcome_message.
                 self.update_display() # Call update_display to handle the "no selection" state
 
+
+    def _preview_post(self, display_idx):
+        """Cheap stand-in for update_display while the post list is being scrolled by key auto-repeat."""
+        row = self.displayed_rows[display_idx]
+        self.post_number_label.config(text=f"{display_idx + 1}/{len(self.displayed_rows)}: "
+                                           f"{self.row_post_labels[row]} ({self.row_date_labels[row]})")
+
 # --- END ON_TREE_SELECT ---
 
-# --- START ON_TREE_ARROW_NAV ---
+# --- START DISPLAYED_ROWS ---
 
-    def on_tree_arrow_nav(self, event):
-        if self.df_displayed is None or self.df_displayed.empty: return "break"
-        all_tree_iids_str = list(self.post_tree.get_children(''))
-        num_items_in_tree = len(all_tree_iids_str)
-        if num_items_in_tree == 0: return "break"
-        
-        current_focus_iid_str = self.post_tree.focus()
-        current_logical_idx_in_tree = -1
-        
-        if current_focus_iid_str and current_focus_iid_str in all_tree_iids_str:
-            current_logical_idx_in_tree = all_tree_iids_str.index(current_focus_iid_str)
-        elif num_items_in_tree > 0 : # If no focus, but items exist, determine start based on key
-            current_logical_idx_in_tree = 0 if event.keysym == "Down" else num_items_in_tree - 1
-            
-        if current_logical_idx_in_tree == -1 : return "break" # Should not happen if num_items > 0
-            
-        target_logical_idx_in_tree = -1
-        if event.keysym == "Down":
-            target_logical_idx_in_tree = current_logical_idx_in_tree + 1
-            if target_logical_idx_in_tree >= num_items_in_tree:
-                target_logical_idx_in_tree = num_items_in_tree - 1 # Stay on last item
-        elif event.keysym == "Up":
-            target_logical_idx_in_tree = current_logical_idx_in_tree - 1
-            if target_logical_idx_in_tree < 0:
-                target_logical_idx_in_tree = 0 # Stay on first item
-        else:
-            return # Should not happen if bound to Up/Down keys only
-            
-        if 0 <= target_logical_idx_in_tree < num_items_in_tree:
-            target_iid_str = all_tree_iids_str[target_logical_idx_in_tree]
-            self.post_tree.selection_set(target_iid_str) # This will trigger on_tree_select
-            self.post_tree.focus(target_iid_str)
-            self.post_tree.see(target_iid_str)
-            
-        return "break" # Prevent default Treeview handling of arrow keys if we've handled it
+    def _set_displayed_rows(self, rows):
+        """
+        Makes rows (positions in df_all_posts, in list order; None for every
+        post) the displayed set. The displayed posts are a view over
+        df_all_posts, never a copy of it.
+        """
+        n_rows = len(self.df_all_posts) if self.df_all_posts is not None else 0
+        self.displayed_rows = np.arange(n_rows) if rows is None else np.asarray(rows, dtype=np.int64)
+        self._display_positions = np.full(n_rows, -1, dtype=np.int64)
+        self._display_positions[self.displayed_rows] = np.arange(len(self.displayed_rows))
+
+    def _has_current_post(self):
+        return 0 <= self.current_display_idx < len(self.displayed_rows)
 
-# --- END ON_TREE_ARROW_NAV ---
+    def _displayed_index(self, display_idx):
+        """Returns the df_all_posts index label of the post at a list position."""
+        return self.df_all_posts.index[self.displayed_rows[display_idx]]
+
+    def _display_idx_of(self, original_df_index):
+        """Returns the list position of a post (by df_all_posts index label), or None if it is not displayed."""
+        try:
+            display_idx = int(self._display_positions[self.df_all_posts.index.get_loc(original_df_index)])
+        except (KeyError, IndexError):
+            return None
+        return display_idx if display_idx >= 0 else None
+
+# --- END DISPLAYED_ROWS ---
 
 # --- START REPOPULATE_TREEVIEW ---
 
-    def repopulate_treeview(self, dataframe_to_show, select_first_item=True): # Added select_first_item
-        self.post_tree.delete(*self.post_tree.get_children())
-        if dataframe_to_show is not None:
-            for original_df_index, row in dataframe_to_show.iterrows():
-                date_val_real = row.get('Datetime_UTC')
-                date_str = date_val_real.strftime('%Y-%m-%d') if pd.notna(date_val_real) else "No Date"
-                post_num_real = row.get('Post Number')
-                iid_original_index_str = str(row.name)
-                post_num_display = f"#{post_num_real}" if pd.notna(post_num_real) else f"Idx:{iid_original_index_str}"
-                is_bookmarked_char = "★" if row.name in self.bookmarked_posts else ""
-# NEW: Check for notes and add indicator
-# In gui.py, inside repopulate_treeview, replace the has_note_char line:
-# NEW: Check for notes and add indicator
-                has_note_char = "♪" if iid_original_index_str in self.user_notes and self.user_notes.get(iid_original_index_str, {}).get("content", "").strip() else ""
-                self.post_tree.insert("", "end", iid=iid_original_index_str, values=(post_num_display, date_str, has_note_char, is_bookmarked_char)) # Added has_note_char
-
-        if dataframe_to_show is not None and not dataframe_to_show.empty:
+    def _prepare_row_columns(self):
+        """
+        Computes the post list column text and a typed sort key array for
+        every column once, by row position. The bookmark and note arrays are
+        kept up to date as those change.
+        """
+        df = self.df_all_posts
+        post_numbers = df['Post Number']
+        self.row_post_labels = [f"#{pn}" if pd.notna(pn) else f"Idx:{idx}" for idx, pn in zip(df.index, post_numbers)]
+        self.row_date_labels = df['Datetime_UTC'].dt.strftime('%Y-%m-%d').fillna("No Date").tolist()
+        self.row_image_counts = np.array([len(images) if isinstance(images, list) else 0 for images in df['ImagesJSON']], dtype=np.int32)
+        self.row_quoted_by_counts = np.array([len(set(app_data.quoted_by_map.get(pn, ()))) if pd.notna(pn) else 0
+                                              for pn in post_numbers], dtype=np.int32)
+        self.row_text_lengths = df['Text'].str.len().fillna(0).to_numpy(dtype=np.int32)
+        self.row_bookmarked = self._user_state_mask(self.bookmarked_posts)
+        self.row_has_note = self._user_state_mask(int(idx) for idx, note in self.user_notes.items()
+                                                  if idx.isdigit() and note.get("content", "").strip())
+        epoch_seconds = df['Datetime_UTC'].to_numpy().astype('datetime64[s]').astype(np.int64)
+        self.sort_keys = {
+            "Post #": post_numbers.fillna(-1).to_numpy(dtype=np.int64),
+            "Date": epoch_seconds, # NaT becomes the smallest int64, so undated posts sort first
+            "Notes": self.row_has_note,
+            "Bookmarked": self.row_bookmarked,
+            "Images": self.row_image_counts,
+            "Quoted": self.row_quoted_by_counts,
+            "Length": self.row_text_lengths,
+        }
+
+    def _treeview_row_values(self, row):
+        """Returns the post list column values for a row position in df_all_posts."""
+        has_note_char = "♪" if self.row_has_note[row] else ""
+        is_bookmarked_char = "★" if self.row_bookmarked[row] else ""
+        image_count = self.row_image_counts[row]
+        return (self.row_post_labels[row], self.row_date_labels[row], has_note_char, is_bookmarked_char,
+                image_count if image_count else "", self.row_quoted_by_counts[row] or "", self.row_text_lengths[row])
+
+    def _refresh_treeview_row(self, original_df_index):
+        """Updates one post's bookmark and note state and redraws its row, e.g. after either changed."""
+        row = self.df_all_posts.index.get_loc(original_df_index)
+        note = self.user_notes.get(str(original_df_index), {})
+        self.row_bookmarked[row] = original_df_index in self.bookmarked_posts
+        self.row_has_note[row] = bool(note.get("content", "").strip())
+        self.post_list.refresh_row(row)
+
+    def repopulate_treeview(self, select_first_item=True): # Added select_first_item
+        """Points the post list at displayed_rows; only the visible rows are drawn."""
+        self.post_list.set_rows(self.displayed_rows)
+
+        if len(self.displayed_rows) > 0:
             if select_first_item:
 # For new views (searches, clear search), we always select the first item (index 0)
-# of the 'dataframe_to_show'. We do not modify self.current_display_idx here.
-# The on_tree_select event will handle updating self.current_display_idx.
-                idx_to_select_in_df = 0 
-                                
-                if 0 <= idx_to_select_in_df < len(dataframe_to_show.index): 
-                    iid_to_select_original_index_str = str(dataframe_to_show.index[idx_to_select_in_df])
-                    if self.post_tree.exists(iid_to_select_original_index_str):
-                        self.post_tree.selection_set(iid_to_select_original_index_str)
-                        self.post_tree.focus(iid_to_select_original_index_str)
-                        self.post_tree.see(iid_to_select_original_index_str)
+# of the displayed rows. We do not modify self.current_display_idx here.
+# on_tree_select (called by the list) will handle updating self.current_display_idx.
+                self.post_list.select(0)
 # If select_first_item is False (e.g., initial load with welcome message showing),
 # no item is programmatically selected here. self.current_display_idx remains as is
 # (likely -1, set by show_welcome_message or __init__).
-        else: # dataframe_to_show is empty or None
+        else: # Nothing is displayed
 # current_display_idx will be set to -1 by on_tree_select if selection is cleared,
 # or by show_welcome_message if that's called by the search logic.
             if hasattr(self, '_init_complete') and self._init_complete:
@@ -3941,56 +4806,30 @@ class QPostViewer:
 # --- END REPOPULATE_TREEVIEW ---
 
 # --- START sort_treeview_column ---
-    def sort_treeview_column(self, col, reverse):
-        """Sorts the treeview items when a column header is clicked."""
-        try:
-            # Get items as a list of tuples: (column_value, iid_as_int)
-            # The iid is the original DataFrame index, which is numeric and perfect for sorting.
-            items = []
-            for iid in self.post_tree.get_children(''):
-                try:
-                    col_value = self.post_tree.set(iid, col)
-                    iid_int = int(iid) # The iid is the original DataFrame index string
-                    items.append((col_value, iid_int))
-                except (ValueError, TypeError):
-                    continue # Skip if iid isn't a valid integer
-
-            # Define a smart sort key
-            def get_sort_key(item):
-                col_value, iid_int = item
-                
-                if col == "Post #":
-                    # For this column, the *primary* key IS the numeric value.
-                    try:
-                        if col_value.startswith('#'):
-                            primary_key = int(col_value[1:])
-                        elif col_value.startswith('Idx:'):
-                            primary_key = int(col_value[4:])
-                        else:
-                            primary_key = 0
-                    except (ValueError, TypeError):
-                        primary_key = 0
-                    return primary_key
-
-                # For ALL OTHER columns (Date, Notes, Bookmarked):
-                # Sort by the column value (e.g., "★" or "2020-10-27") first.
-                # Then, as a tie-breaker, sort by the iid_int (original numeric index).
-                return (col_value, iid_int)
-            
-            # Perform the sort using our new smart key
-            items.sort(key=get_sort_key, reverse=reverse)
-
-            # Reorder items in the treeview
-            for index, (val, iid_int) in enumerate(items):
-                self.post_tree.move(str(iid_int), '', index) # Use the string version of iid to move
-
-            # Invert the sort direction for the next click on this column
-            self.post_tree.heading(col, command=lambda: self.sort_treeview_column(col, not reverse))
-            
-        except Exception as e:
-            print(f"Error sorting treeview column '{col}': {e}")
-            # Reset the command to prevent repeated errors if sorting fails
-            self.post_tree.heading(col, command=lambda: self.sort_treeview_column(col, reverse))
+    def sort_treeview_column(self, col):
+        """
+        Sorts the displayed posts when a column header is clicked; each click
+        flips the direction. The column's precomputed sort keys are argsorted
+        and the displayed rows reordered in one step.
+        """
+        reverse = self._sort_reverse.get(col, False)
+        rows = self.displayed_rows
+        if len(rows) == 0:
+            return
+        key = self.sort_keys[col][rows]
+        if reverse:
+            # Descending, with ties still in their current relative order
+            order = len(key) - 1 - np.argsort(key[::-1], kind='stable')[::-1]
+        else:
+            order = np.argsort(key, kind='stable')
+
+        selected_index = self._displayed_index(self.current_display_idx) if self._has_current_post() else None
+        self._set_displayed_rows(rows[order])
+        self.current_display_idx = self._display_idx_of(selected_index) if selected_index is not None else -1
+        self.post_list.set_rows(self.displayed_rows, self.current_display_idx)
+        if self.current_display_idx >= 0:
+            self.update_post_number_label()
+        self._sort_reverse[col] = not reverse
 # --- END sort_treeview_column ---
 
 # --- START UPDATE_POST_NUMBER_LABEL ---
@@ -4000,20 +4839,19 @@ class QPostViewer:
             self.post_number_label.config(text="Welcome to QView!")
             return
         
-        if self.df_displayed is None or self.df_displayed.empty or self.current_display_idx < 0 :
+        if len(self.displayed_rows) == 0 or self.current_display_idx < 0 :
             self.post_number_label.config(text="No Posts Displayed")
             return
         
-        if not (0 <= self.current_display_idx < len(self.df_displayed)):
+        if not self._has_current_post():
             self.post_number_label.config(text="Invalid Index")
             return
             
-        post_series = self.df_displayed.iloc[self.current_display_idx]
-        post_num_df = post_series.get('Post Number')
-        original_df_idx = self.df_displayed.index[self.current_display_idx] 
+        post_num_df = self.df_all_posts['Post Number'].iat[self.displayed_rows[self.current_display_idx]]
+        original_df_idx = self._displayed_index(self.current_display_idx) 
         
         post_num_display = f"#{post_num_df}" if pd.notna(post_num_df) else f"(Original Idx:{original_df_idx})"
-        total_in_view = len(self.df_displayed)
+        total_in_view = len(self.displayed_rows)
         current_pos_in_view = self.current_display_idx + 1
         
         label_text_parts = []
@@ -4030,28 +4868,26 @@ class QPostViewer:
 
 # --- START _HANDLE_SEARCH_RESULTS ---
 
-    def _handle_search_results(self, results_df, search_term_str):
-        if not results_df.empty:
-            self.df_displayed = results_df.copy()
+    def _handle_search_results(self, rows, search_term_str, highlight_terms=()):
+        """Shows the posts at the given row positions of df_all_posts, in that order, as search results."""
+        self.search_highlight_terms = list(highlight_terms)
+        if len(rows) > 0:
+            self._set_displayed_rows(rows)
             self.current_search_active = True
             self.clear_search_button.config(state=tk.NORMAL)
             self.current_display_idx = -1
-            self.repopulate_treeview(self.df_displayed, select_first_item=True) # select_first_item=True to show first result
+            self.repopulate_treeview(select_first_item=True) # select_first_item=True to show first result
             
-# After repopulating, if df_displayed is still not empty and no tree selection was made
+# After repopulating, if no tree selection was made
 # (which repopulate_treeview with select_first_item=True should handle),
 # ensure the first item is selected and display is updated.
 # The on_tree_select event triggered by repopulate_treeview should call update_display.
-            if not self.df_displayed.empty and not self.post_tree.selection():
-                if 0 <= self.current_display_idx < len(self.df_displayed) : # If current_display_idx is somehow valid
+            if self.post_list.selected_idx < 0:
+                if self._has_current_post(): # If current_display_idx is somehow valid
                     self.select_tree_item_by_idx(self.current_display_idx)
-                elif len(self.df_displayed) > 0: # Default to first item if display_idx was bad
+                else: # Default to first item if display_idx was bad
                     self.current_display_idx = 0
                     self.select_tree_item_by_idx(0)
-                else: # No results to select (should not happen if results_df was not empty)
-                    self.show_welcome_message()
-            elif self.df_displayed.empty: # If results_df was not empty but df_displayed somehow became empty
-                 self.show_welcome_message()
 # If a selection was made by repopulate_treeview, update_display would have been called via on_tree_select.
 
         else: 
@@ -4063,11 +4899,10 @@ class QPostViewer:
 # ---- PROPOSED CHANGE for consistency ----
             self.current_display_idx = -1 # Also invalidate here
 # ---- END PROPOSED CHANGE ----
-            columns_to_use = self.df_all_posts.columns if self.df_all_posts is not None else []
-            self.df_displayed = pd.DataFrame(columns=columns_to_use) 
+            self._set_displayed_rows([])
             self.current_search_active = True 
             self.clear_search_button.config(state=tk.NORMAL) 
-            self.repopulate_treeview(self.df_displayed, select_first_item=False) 
+            self.repopulate_treeview(select_first_item=False) 
             self.show_welcome_message() # Show welcome on no results
 
 # --- END _HANDLE_SEARCH_RESULTS ---
@@ -4075,23 +4910,11 @@ class QPostViewer:
 # --- START SELECT_TREE_ITEM_BY_IDX ---
 
     def select_tree_item_by_idx(self, display_idx_in_current_df):
-        if self.df_displayed is not None and \
-           0 <= display_idx_in_current_df < len(self.df_displayed): # Check df_displayed
-            # Ensure the index exists in the current df_displayed's index
-            if display_idx_in_current_df < len(self.df_displayed.index):
-                original_df_idx_to_select = self.df_displayed.index[display_idx_in_current_df]
-                iid_to_select = str(original_df_idx_to_select)
-                if self.post_tree.exists(iid_to_select):
-                    self.post_tree.selection_set(iid_to_select)
-                    self.post_tree.focus(iid_to_select)
-                    self.post_tree.see(iid_to_select)
-                # else:
-                #     print(f"Warning: IID {iid_to_select} not found in tree, though index was valid.")
-            # else:
-            #     print(f"Warning: display_idx_in_current_df {display_idx_in_current_df} out of range for df_displayed.index.")
-
-        elif self.post_tree.selection(): # If no valid selection can be made, clear existing selection
-            self.post_tree.selection_remove(self.post_tree.selection())
+        if 0 <= display_idx_in_current_df < len(self.displayed_rows): # Check the displayed rows
+            self.post_list.select(display_idx_in_current_df) # Calls on_tree_select
+
+        elif self.post_list.selected_idx >= 0: # If no valid selection can be made, clear existing selection
+            self.post_list.clear_selection()
 
 # --- END SELECT_TREE_ITEM_BY_IDX ---
 
@@ -4326,7 +5149,7 @@ class QPostViewer:
         settings.save_settings(self.app_settings)
         print(f"Theme changed and saved: '{theme_name}'")
 
-        if self.current_display_idx != -1 and self.df_displayed is not None and not self.df_displayed.empty: 
+        if self._has_current_post(): 
             self.update_display()
         else: 
             self.show_welcome_message()
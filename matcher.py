@@ -0,0 +1,166 @@
+import re
+
+import numpy as np
+
+import config
+
+def _trie_pattern(words):
+    """
+    Builds a regex alternation factored by common prefix ("storm|story"
+    becomes "stor(?:m|y)"), so the engine walks each candidate position
+    once instead of retrying every keyword. Longer keywords are tried before
+    their own prefixes.
+    """
+    trie = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[''] = {}
+
+    def build(node):
+        branches = [re.escape(char) + build(node[char]) for char in sorted(c for c in node if c)]
+        if not branches:
+            return ''
+        body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+        return '(?:' + body + ')?' if '' in node else body
+
+    return build(trie)
+
+# Up to this many keywords, find_label_pairs first drops the texts holding none of them
+PREFILTER_MAX_KEYWORDS = 16
+
+class KeywordMatcher:
+    """
+    Finds many keywords in a text with one compiled regex instead of one scan
+    per keyword. Keywords match case-insensitively and only as whole words,
+    i.e. they may not be glued to a letter, digit or underscore on either side.
+
+    Each keyword carries a set of labels (e.g. the themes it belongs to). The
+    pattern is a lookahead, so a match is reported at every word start and
+    partially overlapping keywords are all found. Where a shorter keyword is
+    contained in a longer one at the same position, only the longer one is
+    reported, so it also carries the labels of every keyword it contains.
+    """
+
+    def __init__(self, keyword_labels):
+        """keyword_labels maps each keyword to an iterable of labels."""
+        self.keyword_labels = {}
+        for keyword, labels in keyword_labels.items():
+            if isinstance(keyword, str) and keyword.strip():
+                self.keyword_labels.setdefault(keyword.lower(), set()).update(labels)
+
+        keywords = sorted(self.keyword_labels)
+        self.pattern = None
+        if keywords:
+            # The leading class lets the engine skip positions no keyword can start at
+            first_chars = re.escape(''.join(sorted({keyword[0] for keyword in keywords})))
+            self.pattern = re.compile(r'(?=[' + first_chars + r'])(?<!\w)(?=(' + _trie_pattern(keywords) + r')(?!\w))',
+                                      re.IGNORECASE)
+
+        self._match_labels = {}
+        for keyword in keywords:
+            labels = set()
+            for inner, inner_labels in self.keyword_labels.items():
+                if inner == keyword or re.search(r'(?<!\w)' + re.escape(inner) + r'(?!\w)', keyword):
+                    labels |= inner_labels
+            self._match_labels[keyword] = labels
+
+    def finditer(self, text):
+        """Yields (start, end, keyword) for the longest keyword starting at each word position."""
+        if self.pattern is None or not isinstance(text, str):
+            return
+        for match in self.pattern.finditer(text):
+            yield match.start(1), match.end(1), match.group(1).lower()
+
+    def find_label_pairs(self, texts):
+        """
+        Matches a whole sequence of texts in one scan and returns the unique
+        (text position, label) pairs found, as two aligned lists. The texts
+        are joined with newlines, which can never be part of a whole-word
+        match, and each hit is mapped back to its text by offset.
+        """
+        texts = [text if isinstance(text, str) else '' for text in texts]
+        if self.pattern is None or not texts:
+            return [], []
+        text_positions = range(len(texts))
+        if len(self.keyword_labels) <= PREFILTER_MAX_KEYWORDS:
+            # A text can only match if it holds a keyword as a case-folded substring;
+            # for a few keywords those checks cost far less than the regex scan
+            keywords = [keyword.casefold() for keyword in self.keyword_labels]
+            text_positions = [position for position, text in enumerate(text.casefold() for text in texts)
+                              if any(keyword in text for keyword in keywords)]
+            texts = [texts[position] for position in text_positions]
+            if not texts:
+                return [], []
+        starts = np.cumsum([0] + [len(text) + 1 for text in texts[:-1]])
+        matches = [(match.start(1), match.group(1).lower()) for match in self.pattern.finditer('\n'.join(texts))]
+        if not matches:
+            return [], []
+        positions = [text_positions[i] for i in
+                     (np.searchsorted(starts, [start for start, _ in matches], side='right') - 1).tolist()]
+        pairs = set()
+        for position, (_, keyword) in zip(positions, matches):
+            for label in self._match_labels.get(keyword, ()):
+                pairs.add((position, label))
+        return [p for p, _ in pairs], [label for _, label in pairs]
+
+    def find_labels(self, text):
+        """Returns the set of labels of every keyword found in text."""
+        found = set()
+        for _, _, keyword in self.finditer(text):
+            found |= self._match_labels.get(keyword, set())
+        return found
+
+# --- START THEME_MATCHER ---
+
+_theme_matcher = None
+
+def get_theme_matcher():
+    """Returns the shared matcher for config.THEMES, compiling it on first use."""
+    global _theme_matcher
+    if _theme_matcher is None:
+        keyword_labels = {}
+        for theme, keywords in config.THEMES.items():
+            for keyword in keywords:
+                if isinstance(keyword, str):
+                    keyword_labels.setdefault(keyword.lower(), set()).add(theme)
+        _theme_matcher = KeywordMatcher(keyword_labels)
+    return _theme_matcher
+
+def find_themes(text):
+    """Returns the themes whose keywords occur in text, in config.THEMES order."""
+    found = get_theme_matcher().find_labels(text)
+    return [theme for theme in config.THEMES if theme in found]
+
+# --- END THEME_MATCHER ---
+
+# --- START ABBREVIATION_MATCHER ---
+
+_abbreviation_pattern = None
+
+def get_abbreviation_pattern():
+    """
+    Returns the shared regex for config.Q_ABBREVIATIONS, compiling it on first
+    use. It finds every abbreviation, standalone on word boundaries or inside
+    [brackets], in a single scan; matching is case-sensitive and the longest
+    abbreviation at a position wins.
+    """
+    global _abbreviation_pattern
+    if _abbreviation_pattern is None:
+        abbreviations = [abbr for abbr in config.Q_ABBREVIATIONS if isinstance(abbr, str) and abbr]
+        body = _trie_pattern(abbreviations)
+        # The lookahead lets the engine skip positions no abbreviation (or bracket) can start at
+        first_chars = re.escape('[' + ''.join(sorted({abbr[0] for abbr in abbreviations})))
+        _abbreviation_pattern = re.compile(
+            r'(?=[' + first_chars + r'])(?:\[' + body + r'\]|\b' + body + r'\b)') if abbreviations else None
+    return _abbreviation_pattern
+
+def find_abbreviation_spans(text):
+    """Returns the (start, end) spans of the abbreviations in text, left to right and non-overlapping."""
+    pattern = get_abbreviation_pattern()
+    if pattern is None or not isinstance(text, str):
+        return []
+    return [match.span() for match in pattern.finditer(text)]
+
+# --- END ABBREVIATION_MATCHER ---
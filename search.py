@@ -0,0 +1,785 @@
+import bisect
+import datetime
+import re
+
+import numpy as np
+import pandas as pd
+
+import config
+
+try:
+    from re import _parser as sre_parse
+except ImportError:  # Python < 3.11
+    import sre_parse
+
+# A token is a run of word characters; search terms are matched lowercased.
+TOKEN_REGEX = re.compile(r'\w+')
+
+# Occurrences are packed as (row << POSITION_BITS) | position, so a phrase is a
+# run of keys that differ by exactly one.
+POSITION_BITS = 32
+
+def tokenize(text):
+    """Returns the lowercased word tokens of a text, the unit the search index works on."""
+    if not isinstance(text, str):
+        return []
+    return TOKEN_REGEX.findall(text.lower())
+
+# --- START FUZZY_SEARCH ---
+
+def edit_distance(a, b, max_distance):
+    """
+    Returns the Levenshtein distance between a and b, or max_distance + 1
+    as soon as it is certain to exceed max_distance.
+    """
+    if abs(len(a) - len(b)) > max_distance:
+        return max_distance + 1
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (char_a != char_b)))
+        if min(current) > max_distance:
+            return max_distance + 1
+        previous = current
+    return min(previous[-1], max_distance + 1)
+
+def _bigrams(term):
+    """Returns the distinct bigrams of a term padded with start/end markers ("^a", ..., "z$")."""
+    padded = '^' + term + '$'
+    return {padded[i:i + 2] for i in range(len(padded) - 1)}
+
+class VocabularyGramIndex:
+    """
+    Bigram index over a sorted vocabulary for finding the terms within a
+    small edit distance of a query term. One edit removes at most two of a
+    term's distinct bigrams, so a term within distance k of the query must
+    share all but 2k of the query's bigrams. Only the few terms passing
+    that count (and the length) filter get a real edit-distance check.
+
+    Terms of fewer than 2k bigrams can lose them all, so for those a
+    character-count filter takes over: a term within k edits keeps all but
+    k characters of the longer of the two.
+    """
+
+    def __init__(self, vocab):
+        gram_slots = {}
+        gram_of_entry = []
+        term_of_entry = []
+        char_slots = {}
+        char_of_entry = []
+        char_term_of_entry = []
+        char_count_of_entry = []
+        for term_id, term in enumerate(vocab):
+            for gram in _bigrams(term):
+                gram_of_entry.append(gram_slots.setdefault(gram, len(gram_slots)))
+                term_of_entry.append(term_id)
+            for char in set(term):
+                char_of_entry.append(char_slots.setdefault(char, len(char_slots)))
+                char_term_of_entry.append(term_id)
+                char_count_of_entry.append(term.count(char))
+        gram_of_entry = np.asarray(gram_of_entry, dtype=np.int32)
+        order = np.argsort(gram_of_entry, kind='stable')
+        self.gram_slots = gram_slots
+        self.term_ids = np.asarray(term_of_entry, dtype=np.int32)[order]
+        self.offsets = np.searchsorted(gram_of_entry[order], np.arange(len(gram_slots) + 1))
+        self.lengths = np.array([len(term) for term in vocab], dtype=np.int32)
+
+        char_of_entry = np.asarray(char_of_entry, dtype=np.int32)
+        order = np.argsort(char_of_entry, kind='stable')
+        self.char_slots = char_slots
+        self.char_term_ids = np.asarray(char_term_of_entry, dtype=np.int32)[order]
+        self.char_counts = np.asarray(char_count_of_entry, dtype=np.int32)[order]
+        self.char_offsets = np.searchsorted(char_of_entry[order], np.arange(len(char_slots) + 1))
+
+    def neighbors(self, term, max_distance, vocab):
+        """Returns the term ids of vocab entries within max_distance edits of term."""
+        grams = _bigrams(term)
+        candidates = np.abs(self.lengths - len(term)) <= max_distance
+        threshold = len(grams) - 2 * max_distance
+        if threshold > 0:
+            shared = np.zeros(len(self.lengths), dtype=np.int32)
+            for gram in grams:
+                slot = self.gram_slots.get(gram)
+                if slot is not None:
+                    shared[self.term_ids[self.offsets[slot]:self.offsets[slot + 1]]] += 1
+            candidates &= shared >= threshold
+        else:
+            shared = np.zeros(len(self.lengths), dtype=np.int32)
+            for char in set(term):
+                slot = self.char_slots.get(char)
+                if slot is not None:
+                    start, end = self.char_offsets[slot], self.char_offsets[slot + 1]
+                    shared[self.char_term_ids[start:end]] += np.minimum(self.char_counts[start:end], term.count(char))
+            candidates &= shared >= np.maximum(self.lengths, len(term)) - max_distance
+        return [term_id for term_id in np.flatnonzero(candidates).tolist()
+                if edit_distance(term, vocab[term_id], max_distance) <= max_distance]
+
+# --- END FUZZY_SEARCH ---
+
+class FieldIndex:
+    """
+    Positional inverted index over one text column of the posts DataFrame.
+
+    The vocabulary is kept sorted, so every term sharing a prefix occupies a
+    contiguous range of term ids. Postings are stored as flat NumPy arrays
+    sliced by term id (CSR layout): occurrence_rows/occurrence_positions hold
+    every (row, word position) of a term, and doc_rows the distinct rows.
+    """
+
+    def __init__(self, texts):
+        vocab_ids = {}
+        term_ids = []
+        token_counts = []
+        for text in texts:
+            tokens = tokenize(text)
+            term_ids.extend([vocab_ids.setdefault(token, len(vocab_ids)) for token in tokens])
+            token_counts.append(len(tokens))
+
+        self.vocab = sorted(vocab_ids)
+        # Renumber the ids in vocabulary order so prefixes map to id ranges
+        rank = np.empty(len(self.vocab), dtype=np.int32)
+        rank[[vocab_ids[term] for term in self.vocab]] = np.arange(len(self.vocab), dtype=np.int32)
+        terms = rank[np.asarray(term_ids, dtype=np.int64)] if term_ids else np.zeros(0, dtype=np.int32)
+
+        token_counts = np.asarray(token_counts, dtype=np.int64)
+        self.n_rows = len(token_counts)
+        rows = np.repeat(np.arange(len(token_counts), dtype=np.int32), token_counts)
+        starts = np.repeat(np.cumsum(token_counts) - token_counts, token_counts)
+        positions = (np.arange(len(rows), dtype=np.int64) - starts).astype(np.int32)
+
+        # Stable, so each term's occurrences stay in (row, position) order
+        order = np.argsort(terms, kind='stable')
+        terms = terms[order]
+        self.occurrence_rows = rows[order]
+        self.occurrence_positions = positions[order]
+        term_bounds = np.arange(len(self.vocab) + 1)
+        self.occurrence_offsets = np.searchsorted(terms, term_bounds)
+
+        first_in_row = np.ones(len(terms), dtype=bool)
+        first_in_row[1:] = (terms[1:] != terms[:-1]) | (self.occurrence_rows[1:] != self.occurrence_rows[:-1])
+        self.doc_rows = self.occurrence_rows[first_in_row]
+        self.doc_offsets = np.searchsorted(terms[first_in_row], term_bounds)
+        self.gram_index = VocabularyGramIndex(self.vocab)
+
+    def term_range(self, term, prefix=False):
+        """Returns the [lo, hi) term-id range matching term exactly or, with prefix=True, as a prefix."""
+        lo = bisect.bisect_left(self.vocab, term)
+        if not prefix:
+            return (lo, lo + 1) if lo < len(self.vocab) and self.vocab[lo] == term else (lo, lo)
+        return lo, bisect.bisect_left(self.vocab, term + '\U0010ffff', lo)
+
+    def terms_with_prefix(self, prefix):
+        """Returns the vocabulary terms starting with prefix."""
+        lo, hi = self.term_range(prefix, prefix=True)
+        return self.vocab[lo:hi]
+
+    def fuzzy_terms(self, term, max_distance):
+        """Returns the vocabulary terms within max_distance edits of term."""
+        return [self.vocab[term_id] for term_id in self.gram_index.neighbors(term, max_distance, self.vocab)]
+
+    def rows_for_fuzzy_term(self, term, max_distance):
+        """Returns the sorted rows containing any term within max_distance edits of term."""
+        mask = np.zeros(self.n_rows, dtype=bool)
+        for term_id in self.gram_index.neighbors(term, max_distance, self.vocab):
+            mask[self.doc_rows[self.doc_offsets[term_id]:self.doc_offsets[term_id + 1]]] = True
+        return np.flatnonzero(mask).astype(np.int32)
+
+    def rows_for_term_ids(self, lo, hi):
+        """Returns the sorted distinct rows containing any term in the id range [lo, hi)."""
+        rows = self.doc_rows[self.doc_offsets[lo]:self.doc_offsets[hi]]
+        if hi - lo <= 1:
+            return rows
+        # Merging many terms' rows through a row mask beats sorting them
+        mask = np.zeros(self.n_rows, dtype=bool)
+        mask[rows] = True
+        return np.flatnonzero(mask).astype(np.int32)
+
+    def rows_for_term(self, term, prefix=False):
+        """Returns the sorted distinct rows containing term (or any term it prefixes)."""
+        return self.rows_for_term_ids(*self.term_range(term, prefix))
+
+    def occurrence_keys(self, term, prefix=False):
+        """Returns the packed (row, position) keys of every occurrence of term, sorted."""
+        lo, hi = self.term_range(term, prefix)
+        start, end = self.occurrence_offsets[lo], self.occurrence_offsets[hi]
+        keys = (self.occurrence_rows[start:end].astype(np.int64) << POSITION_BITS) | self.occurrence_positions[start:end]
+        return keys if hi - lo <= 1 else np.sort(keys)
+
+    def rows_for_phrase(self, tokens, prefix_last=True, within=None):
+        """
+        Returns the sorted rows where tokens occur as consecutive words. With
+        prefix_last, the final token may be the start of a longer word, which
+        is what someone typing a phrase expects. within (sorted rows)
+        restricts the search to those rows.
+        """
+        if not tokens:
+            return np.zeros(0, dtype=np.int32)
+        if len(tokens) == 1:
+            rows = self.rows_for_term(tokens[0], prefix_last)
+            return rows if within is None else np.intersect1d(within, rows, assume_unique=True).astype(np.int32)
+
+        # Cheap document-level intersection first, then positions on the survivors
+        candidates = within
+        for i, token in enumerate(tokens):
+            rows = self.rows_for_term(token, prefix_last and i == len(tokens) - 1)
+            candidates = rows if candidates is None else np.intersect1d(candidates, rows, assume_unique=True)
+            if len(candidates) == 0:
+                return candidates.astype(np.int32)
+
+        starts = None
+        for i, token in enumerate(tokens):
+            keys = self.occurrence_keys(token, prefix_last and i == len(tokens) - 1)
+            keys = keys[np.isin(keys >> POSITION_BITS, candidates)] - i
+            starts = keys if starts is None else np.intersect1d(starts, keys)
+            if len(starts) == 0:
+                break
+        return np.unique(starts >> POSITION_BITS).astype(np.int32)
+
+# --- START REGEX_SEARCH ---
+
+def _trigram_code(a, b, c):
+    """Packs three code points (21 bits each) into one integer key."""
+    return (a << 42) | (b << 21) | c
+
+class TrigramIndex:
+    """
+    Maps every three-character sequence of the lowercased post text to the
+    rows containing it (CSR layout: codes sorted, rows sliced by offsets).
+    A regex can only match a row that contains every trigram of the literal
+    strings the regex requires, so the index narrows the candidates before
+    the real regex runs.
+    """
+
+    def __init__(self, texts_lower):
+        texts = [text.replace('\0', ' ') for text in texts_lower]
+        lengths = np.array([len(text) for text in texts], dtype=np.int64)
+        # NUL separates the posts so no trigram spans two of them
+        code_points = np.frombuffer('\0'.join(texts).encode('utf-32-le'), dtype=np.uint32).astype(np.int64)
+        if len(code_points) < 3:
+            self.codes = np.zeros(0, dtype=np.int64)
+            self.offsets = np.zeros(1, dtype=np.int64)
+            self.rows = np.zeros(0, dtype=np.int32)
+            return
+        rows_of_chars = np.repeat(np.arange(len(texts), dtype=np.int32), lengths + 1)[:len(code_points)]
+
+        first, second, third = code_points[:-2], code_points[1:-1], code_points[2:]
+        valid = (first != 0) & (second != 0) & (third != 0)
+        codes = _trigram_code(first, second, third)[valid]
+        rows = rows_of_chars[:-2][valid]
+
+        order = np.lexsort((rows, codes))
+        codes, rows = codes[order], rows[order]
+        distinct = np.ones(len(codes), dtype=bool)
+        distinct[1:] = (codes[1:] != codes[:-1]) | (rows[1:] != rows[:-1])
+        codes, self.rows = codes[distinct], rows[distinct]
+        self.codes, starts = np.unique(codes, return_index=True)
+        self.offsets = np.append(starts, len(codes))
+
+    def rows_for_literal(self, literal):
+        """Returns the sorted rows that may contain literal, or None when it is too short to filter on."""
+        literal = literal.lower()
+        if len(literal) < 3:
+            return None
+        rows = None
+        for i in range(len(literal) - 2):
+            code = _trigram_code(ord(literal[i]), ord(literal[i + 1]), ord(literal[i + 2]))
+            slot = np.searchsorted(self.codes, code)
+            if slot == len(self.codes) or self.codes[slot] != code:
+                return np.zeros(0, dtype=np.int32)
+            trigram_rows = self.rows[self.offsets[slot]:self.offsets[slot + 1]]
+            rows = trigram_rows if rows is None else np.intersect1d(rows, trigram_rows, assume_unique=True)
+            if len(rows) == 0:
+                break
+        return rows
+
+    def candidate_rows(self, requirements):
+        """
+        Returns the sorted rows satisfying the requirements from
+        required_literals, or None when they do not narrow the search.
+        """
+        rows = None
+        for requirement in requirements:
+            if isinstance(requirement, str):
+                required_rows = self.rows_for_literal(requirement)
+            else:
+                alternatives = [self.candidate_rows(branch) for branch in requirement[1]]
+                required_rows = None if any(a is None for a in alternatives) else \
+                    np.unique(np.concatenate(alternatives)).astype(np.int32)
+            if required_rows is not None:
+                rows = required_rows if rows is None else np.intersect1d(rows, required_rows, assume_unique=True)
+        return rows
+
+def required_literals(pattern):
+    """
+    Returns what any match of a regex must contain: a list (all required)
+    of literal strings and ('or', [requirement lists]) alternatives. Parts
+    that are optional or not literal, like classes and wildcards, simply
+    contribute nothing, so the result is always safe to prefilter with.
+    """
+    return _required_literals(sre_parse.parse(pattern))
+
+def _required_literals(items):
+    required = []
+    run = []
+
+    def flush():
+        if run:
+            required.append(''.join(run))
+            run.clear()
+
+    for op, argument in items:
+        if op is sre_parse.LITERAL:
+            run.append(chr(argument))
+        elif op is sre_parse.AT:
+            continue  # Anchors are zero-width, the literal run goes on
+        elif op is sre_parse.SUBPATTERN:
+            flush()
+            required.extend(_required_literals(argument[-1]))
+        elif op is sre_parse.BRANCH:
+            flush()
+            alternatives = [_required_literals(branch) for branch in argument[1]]
+            if all(alternatives):
+                required.append(('or', alternatives))
+        elif op in (sre_parse.MAX_REPEAT, sre_parse.MIN_REPEAT, getattr(sre_parse, 'POSSESSIVE_REPEAT', None)):
+            flush()
+            if argument[0] >= 1:
+                required.extend(_required_literals(argument[2]))
+        else:
+            flush()
+    flush()
+    return required
+
+# --- END REGEX_SEARCH ---
+
+class QuerySyntaxError(ValueError):
+    """Raised for a query the parser cannot make sense of; the message is shown to the user."""
+
+# --- START QUERY_PARSER ---
+# Grammar (operators are upper case, juxtaposition means AND):
+#   query := and_expr ('OR' and_expr)*
+#   and_expr := not_expr ('AND'? not_expr)*
+#   not_expr := 'NOT' not_expr | '(' query ')' | field ':' value | '"phrase"' | word | word~N
+# word~N (or word~ for the default distance) matches words within N edits.
+
+# Upper bound on fuzzy edit distance; larger values match most of the vocabulary
+MAX_FUZZY_DISTANCE = 3
+
+QUERY_FIELDS = ('author', 'trip', 'theme', 'date', 'has', 'quotes')
+
+_QUERY_TOKEN_REGEX = re.compile(r'\s*(?:(\()|(\))|("[^"]*"?)|([^\s()"]+?):("[^"]*"?|[^\s()"]+)|([^\s()"]+))')
+
+def _unquote(value):
+    return value[1:-1] if len(value) >= 2 and value.endswith('"') else value.lstrip('"')
+
+def _lex_query(text):
+    """Splits a query into (kind, value) tokens."""
+    tokens = []
+    position = 0
+    text = text.strip()
+    while position < len(text):
+        match = _QUERY_TOKEN_REGEX.match(text, position)
+        if not match or match.end() == position:
+            raise QuerySyntaxError(f"Unexpected character at position {position + 1}.")
+        position = match.end()
+        open_paren, close_paren, phrase, field, value, word = match.groups()
+        if open_paren:
+            tokens.append(('(', None))
+        elif close_paren:
+            tokens.append((')', None))
+        elif phrase:
+            tokens.append(('phrase', _unquote(phrase)))
+        elif field and field.lower() in QUERY_FIELDS:
+            tokens.append(('field', (field.lower(), _unquote(value))))
+        elif field:
+            # Not a known field (e.g. "10:30"), so the whole thing is a word
+            tokens.append(('word', f"{field}:{_unquote(value)}"))
+        elif word in ('AND', 'OR', 'NOT'):
+            tokens.append((word, None))
+        else:
+            tokens.append(('word', word))
+        position = len(text) - len(text[position:].lstrip())
+    return tokens
+
+def parse_query(text, fuzzy_distance=1, fuzzy_words=False):
+    """
+    Parses a search box query into a tree of tuples:
+    ('and', [nodes]), ('or', [nodes]), ('not', node), ('words', tokens),
+    ('fuzzy', token, distance), ('literal', text) or ('field', name, value).
+    fuzzy_distance is used for a bare "word~"; with fuzzy_words every
+    unquoted single word is fuzzy.
+    """
+    tokens = _lex_query(text)
+    if not tokens:
+        raise QuerySyntaxError("The query is empty.")
+    position = 0
+
+    def peek():
+        return tokens[position][0] if position < len(tokens) else None
+
+    def parse_or():
+        nonlocal position
+        nodes = [parse_and()]
+        while peek() == 'OR':
+            position += 1
+            nodes.append(parse_and())
+        return nodes[0] if len(nodes) == 1 else ('or', nodes)
+
+    def parse_and():
+        nonlocal position
+        nodes = [parse_not()]
+        while peek() not in (None, 'OR', ')'):
+            if peek() == 'AND':
+                position += 1
+            nodes.append(parse_not())
+        return nodes[0] if len(nodes) == 1 else ('and', nodes)
+
+    def parse_not():
+        nonlocal position
+        kind = peek()
+        if kind is None:
+            raise QuerySyntaxError("The query ends where a search term was expected.")
+        value = tokens[position][1]
+        position += 1
+        if kind == 'NOT':
+            return ('not', parse_not())
+        if kind == '(':
+            node = parse_or()
+            if peek() != ')':
+                raise QuerySyntaxError("Missing closing parenthesis.")
+            position += 1
+            return node
+        if kind == 'field':
+            return ('field',) + value
+        if kind == 'word':
+            fuzzy = re.fullmatch(r'(.+?)~(\d*)', value)
+            words = tokenize(fuzzy.group(1) if fuzzy else value)
+            if len(words) == 1 and (fuzzy or fuzzy_words):
+                distance = int(fuzzy.group(2)) if fuzzy and fuzzy.group(2) else fuzzy_distance
+                return ('fuzzy', words[0], max(0, min(distance, MAX_FUZZY_DISTANCE)))
+        if kind == 'phrase' and not value.strip():
+            raise QuerySyntaxError("The quoted phrase is empty.")
+        if kind in ('word', 'phrase'):
+            words = tokenize(value)
+            return ('words', tuple(words)) if words else ('literal', value.lower())
+        raise QuerySyntaxError(f"Unexpected '{kind}' in query.")
+
+    node = parse_or()
+    if position < len(tokens):
+        raise QuerySyntaxError(f"Unexpected '{tokens[position][0]}' in query.")
+    return node
+
+def query_key(text, fuzzy_distance=1, fuzzy_words=False):
+    """
+    Returns a hashable normal form of a query: texts that differ only in
+    case, spacing, redundant parentheses or AND keywords get the same key.
+    Raises QuerySyntaxError like parse_query.
+    """
+    return repr(parse_query(text, fuzzy_distance, fuzzy_words))
+
+def _conjunction_terms(node):
+    """Returns the token tuples of a plain word or phrase conjunction, in order, or None for any other query."""
+    children = node[1] if node[0] == 'and' else [node]
+    if not all(child[0] == 'words' for child in children):
+        return None
+    return [child[1] for child in children]
+
+def is_refinement(previous_text, text):
+    """
+    True when text extends previous_text and both are plain word or phrase
+    conjunctions, so every post matching text also matched previous_text.
+    Every term of the previous query must still be there unchanged, except
+    the last one, which may only have been typed further (its last word is
+    a prefix). Search-as-you-type uses this to refine the previous results
+    instead of searching everything; a half-typed operator such as "AN"
+    drops out of the next query, so it never counts as a refinement.
+    """
+    if not previous_text or not text.lower().startswith(previous_text.lower()):
+        return False
+    try:
+        previous_terms = _conjunction_terms(parse_query(previous_text))
+        terms = _conjunction_terms(parse_query(text))
+    except QuerySyntaxError:
+        return False
+    if previous_terms is None or terms is None or len(terms) < len(previous_terms):
+        return False
+    if terms[:len(previous_terms) - 1] != previous_terms[:-1]:
+        return False
+    last, extended = previous_terms[-1], terms[len(previous_terms) - 1]
+    return (len(extended) >= len(last) and extended[:len(last) - 1] == last[:-1]
+            and extended[len(last) - 1].startswith(last[-1]))
+
+def highlight_terms(node, search_index=None, negated=False):
+    """
+    Returns what a match of the query looks like in post text, for
+    highlighting: a tuple of word tokens (the last one a prefix) for word
+    and phrase terms, or a plain string for literal terms. Fuzzy terms
+    expand to the words they matched in search_index. Terms under a NOT
+    are left out.
+    """
+    kind = node[0]
+    if kind in ('and', 'or'):
+        return [term for child in node[1] for term in highlight_terms(child, search_index, negated)]
+    if kind == 'not':
+        return highlight_terms(node[1], search_index, not negated)
+    if negated:
+        return []
+    if kind == 'words':
+        return [node[1]]
+    if kind == 'fuzzy':
+        if search_index is None:
+            return [(node[1],)]
+        return [(term,) for field in search_index.DEFAULT_FIELDS
+                for term in search_index.fields[field].fuzzy_terms(node[1], node[2])]
+    if kind == 'literal':
+        return [node[1]]
+    return []
+
+def _parse_date_bound(text, end=False):
+    """Turns 'YYYY', 'YYYY-MM' or 'YYYY-MM-DD' into the first (or, with end=True, last) day it covers."""
+    match = re.fullmatch(r'(\d{4})(?:-(\d{1,2})(?:-(\d{1,2}))?)?', text)
+    if not match:
+        raise QuerySyntaxError(f"Bad date '{text}'. Use YYYY, YYYY-MM, YYYY-MM-DD or MM-DD.")
+    year, month, day = int(match.group(1)), match.group(2), match.group(3)
+    try:
+        if day:
+            return datetime.date(year, int(month), int(day))
+        if month:
+            first = datetime.date(year, int(month), 1)
+            return (first + datetime.timedelta(days=32)).replace(day=1) - datetime.timedelta(days=1) if end else first
+        return datetime.date(year, 12, 31) if end else datetime.date(year, 1, 1)
+    except ValueError:
+        raise QuerySyntaxError(f"Bad date '{text}'.")
+
+# --- END QUERY_PARSER ---
+
+def _value_bitmaps(values):
+    """
+    Returns (names, bitmaps) for a column: the sorted distinct values
+    (stripped, '' for missing) and a bool matrix with one row mask per value.
+    """
+    values = pd.Series(values).fillna('').astype(str).str.strip()
+    codes, names = pd.factorize(values, sort=True)
+    return list(names), codes[np.newaxis, :] == np.arange(len(names))[:, np.newaxis]
+
+class SearchIndex:
+    """Inverted indices over the searchable fields of the posts DataFrame."""
+
+    # Fields a plain keyword search looks in
+    DEFAULT_FIELDS = ('text', 'tripcode')
+
+    def __init__(self, df, has_link=None):
+        """has_link optionally gives the rows whose Text holds a URL, when they were already found."""
+        self.n_rows = len(df)
+        self.fields = {
+            'text': FieldIndex(df['Text'].tolist()),
+            'tripcode': FieldIndex(df['Tripcode'].tolist()),
+            'author': FieldIndex(df['Author'].tolist()),
+        }
+        self.texts = [text if isinstance(text, str) else '' for text in df['Text']]
+        # Lowercased copies for the rare literal (punctuation-only) terms
+        self.texts_lower = [text.lower() for text in self.texts]
+        self.tripcodes_lower = [trip.lower() if isinstance(trip, str) else '' for trip in df['Tripcode']]
+        # Only regex searches use it, so it is built on the first one
+        self._trigrams = None
+
+        # --- Attribute columns for field queries ---
+        timestamps = df['Datetime_UTC']
+        valid = timestamps.notna().to_numpy()
+        epoch_days = np.full(self.n_rows, -1, dtype=np.int32)
+        epoch_days[valid] = (timestamps[valid].to_numpy().astype('datetime64[D]').astype(np.int64))
+        self.epoch_days = epoch_days
+        self.month_days = np.full(self.n_rows, -1, dtype=np.int16)
+        self.month_days[valid] = (timestamps[valid].dt.month * 100 + timestamps[valid].dt.day).to_numpy()
+
+        self.has_image = np.array([isinstance(images, list) and len(images) > 0 for images in df['ImagesJSON']], dtype=bool)
+        if has_link is None:
+            has_link = [bool(config.URL_REGEX.search(text)) for text in self.texts_lower]
+        self.has_link = np.asarray(has_link, dtype=bool)
+
+        self.theme_rows = {}
+        if 'Themes' in df.columns:
+            themes = pd.Series(df['Themes'].to_numpy()).explode().dropna()
+            for theme, rows in themes.groupby(themes).groups.items():
+                self.theme_rows[theme] = np.unique(np.asarray(rows, dtype=np.int32))
+
+        quotes = pd.Series(self.texts_lower).str.extractall(r'>>(\d+)')
+        self.quote_rows = {}
+        if not quotes.empty:
+            quoted = quotes[0].astype(np.int64)
+            for post_number, rows in quoted.groupby(quoted.to_numpy()).groups.items():
+                self.quote_rows[int(post_number)] = np.unique(np.asarray(rows.get_level_values(0), dtype=np.int32))
+
+        # --- Filter bitmaps: one row mask per attribute value ---
+        self.theme_names = sorted(self.theme_rows)
+        self.theme_bitmaps = np.zeros((len(self.theme_names), self.n_rows), dtype=bool)
+        for i, theme in enumerate(self.theme_names):
+            self.theme_bitmaps[i, self.theme_rows[theme]] = True
+        self.author_names, self.author_bitmaps = _value_bitmaps(df['Author'].to_numpy())
+        self.tripcode_names, self.tripcode_bitmaps = _value_bitmaps(df['Tripcode'].to_numpy())
+
+    def filter_mask(self, start=None, end=None, themes=(), all_themes=False, authors=(), tripcodes=(),
+                    has_image=False, has_link=False):
+        """
+        Combines the filter bitmaps into one row mask. Every filter given
+        must hold; within themes, authors and tripcodes any selected value
+        will do, or every selected theme with all_themes. start and end take
+        the date: query forms (YYYY, YYYY-MM, YYYY-MM-DD); a bad date raises
+        QuerySyntaxError.
+        """
+        mask = np.ones(self.n_rows, dtype=bool)
+        if start or end:
+            mask &= self._evaluate_date(f"{start or ''}..{end or ''}")
+        if themes:
+            selected = self.theme_bitmaps[[self.theme_names.index(theme) for theme in themes]]
+            mask &= selected.all(axis=0) if all_themes else selected.any(axis=0)
+        for names, bitmaps, chosen in ((self.author_names, self.author_bitmaps, authors),
+                                       (self.tripcode_names, self.tripcode_bitmaps, tripcodes)):
+            if chosen:
+                mask &= bitmaps[[names.index(value) for value in chosen]].any(axis=0)
+        if has_image:
+            mask &= self.has_image
+        if has_link:
+            mask &= self.has_link
+        return mask
+
+    def search(self, phrase, fields=DEFAULT_FIELDS):
+        """
+        Returns the sorted row positions whose fields contain phrase as a run
+        of words, the last of which may be a prefix ("storm" also finds
+        "storms"). A phrase without any word characters matches nothing.
+        """
+        tokens = tokenize(phrase)
+        results = [self.fields[field].rows_for_phrase(tokens) for field in fields]
+        if not results:
+            return np.zeros(0, dtype=np.int32)
+        return np.unique(np.concatenate(results)).astype(np.int32)
+
+    def query(self, text, fuzzy_distance=1, fuzzy_words=False):
+        """
+        Runs a search box query and returns (rows, highlight_terms). Raises
+        QuerySyntaxError for malformed queries. See parse_query for the
+        fuzzy options.
+        """
+        node = parse_query(text, fuzzy_distance, fuzzy_words)
+        return np.flatnonzero(self.evaluate(node)).astype(np.int32), highlight_terms(node, self)
+
+    def refine(self, text, within):
+        """
+        Like query, but only looks at the rows in within, the results of a
+        query text extends (see is_refinement).
+        """
+        node = parse_query(text)
+        return np.flatnonzero(self.evaluate(node, within)).astype(np.int32), highlight_terms(node, self)
+
+    def _get_trigram_index(self):
+        """Returns the TrigramIndex over the lowercased text, building it on first use."""
+        if self._trigrams is None:
+            self._trigrams = TrigramIndex(self.texts_lower)
+        return self._trigrams
+
+    def regex_search(self, pattern):
+        """
+        Returns (rows, compiled regex) for the posts whose text matches
+        pattern. The trigram index picks the candidates and the regex only
+        runs on those. Raises re.error for an invalid pattern.
+        """
+        regex = re.compile(pattern)
+        candidates = self._get_trigram_index().candidate_rows(required_literals(pattern))
+        if candidates is None:
+            candidates = range(self.n_rows)
+        texts = self.texts
+        return np.array([row for row in candidates if regex.search(texts[row])], dtype=np.int32), regex
+
+    def _rows_to_mask(self, rows):
+        mask = np.zeros(self.n_rows, dtype=bool)
+        mask[rows] = True
+        return mask
+
+    def evaluate(self, node, within=None):
+        """
+        Evaluates a parsed query into a boolean row mask. within (sorted
+        rows) limits the result to those rows; AND and word terms use it to
+        skip the posting work for every other row.
+        """
+        kind = node[0]
+        if kind == 'and':
+            mask = None
+            for child in node[1]:
+                mask = self.evaluate(child, within) if mask is None else mask & self.evaluate(child, within)
+                within = np.flatnonzero(mask)
+                if len(within) == 0:
+                    break
+            return mask
+        if kind == 'words':
+            return self._rows_to_mask(np.concatenate(
+                [self.fields[field].rows_for_phrase(list(node[1]), within=within) for field in self.DEFAULT_FIELDS]))
+        mask = self._evaluate_unrestricted(node)
+        if within is not None:
+            mask &= self._rows_to_mask(within)
+        return mask
+
+    def _evaluate_unrestricted(self, node):
+        """Evaluates every node kind but AND and word terms over all rows."""
+        kind = node[0]
+        if kind == 'or':
+            mask = self.evaluate(node[1][0])
+            for child in node[1][1:]:
+                mask |= self.evaluate(child)
+            return mask
+        if kind == 'not':
+            return ~self.evaluate(node[1])
+        if kind == 'fuzzy':
+            # Like word terms, fuzzy terms look in every default field
+            mask = np.zeros(self.n_rows, dtype=bool)
+            for field in self.DEFAULT_FIELDS:
+                mask[self.fields[field].rows_for_fuzzy_term(node[1], node[2])] = True
+            return mask
+        if kind == 'literal':
+            return np.array([node[1] in text or node[1] in trip
+                             for text, trip in zip(self.texts_lower, self.tripcodes_lower)], dtype=bool)
+        return self._evaluate_field(node[1], node[2])
+
+    def _evaluate_field(self, name, value):
+        """Evaluates one field:value term into a boolean row mask."""
+        if name == 'author':
+            return self._rows_to_mask(self.fields['author'].rows_for_phrase(tokenize(value)))
+        if name == 'trip':
+            return self._rows_to_mask(self.fields['tripcode'].rows_for_phrase(tokenize(value), prefix_last=False))
+        if name == 'theme':
+            key = '_'.join(value.lower().replace('-', ' ').split())
+            # An exact theme key wins; otherwise every theme the value prefixes
+            matching = [self.theme_rows[key]] if key in self.theme_rows else \
+                [rows for theme, rows in self.theme_rows.items() if theme.startswith(key)]
+            return self._rows_to_mask(np.concatenate(matching)) if matching else np.zeros(self.n_rows, dtype=bool)
+        if name == 'quotes':
+            if not value.lstrip('>').isdigit():
+                raise QuerySyntaxError(f"quotes: needs a post number, not '{value}'.")
+            return self._rows_to_mask(self.quote_rows.get(int(value.lstrip('>')), np.zeros(0, dtype=np.int32)))
+        if name == 'has':
+            if value.lower() in ('image', 'images'):
+                return self.has_image.copy()
+            if value.lower() in ('link', 'links'):
+                return self.has_link.copy()
+            raise QuerySyntaxError(f"Unknown has: value '{value}'. Use has:image or has:link.")
+        return self._evaluate_date(value)
+
+    def _evaluate_date(self, value):
+        """date:YYYY[-MM[-DD]], date:A..B (either end may be left open) or date:MM-DD for every year."""
+        month_day = re.fullmatch(r'(\d{1,2})-(\d{1,2})', value)
+        if month_day:
+            return self.month_days == int(month_day.group(1)) * 100 + int(month_day.group(2))
+
+        if '..' in value:
+            start_text, end_text = value.split('..', 1)
+        else:
+            start_text = end_text = value
+        start = _parse_date_bound(start_text) if start_text else None
+        end = _parse_date_bound(end_text, end=True) if end_text else None
+        epoch = datetime.date(1970, 1, 1)
+        mask = self.epoch_days >= 0
+        if start:
+            mask &= self.epoch_days >= (start - epoch).days
+        if end:
+            mask &= self.epoch_days <= (end - epoch).days
+        return mask
@@ -9,7 +9,8 @@ SETTINGS_FILE_PATH = os.path.join(config.USER_DATA_ROOT, 'settings.json')
 DEFAULT_SETTINGS = {
     "theme": "dark",
     "link_opening_preference": "default",
-    "highlight_abbreviations": True
+    "highlight_abbreviations": True,
+    "fuzzy_max_distance": 1
 }
 
 def load_settings():
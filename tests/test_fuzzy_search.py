@@ -0,0 +1,22 @@
+import pytest
+
+import search
+
+VOCAB = sorted(['a', 'an', 'at', 'b', 'ba', 'bat', 'cat', 'cab', 'q', 'qq', 'storm', 'store', 'stop', 'xyz'])
+
+
+def brute_force_neighbors(term, max_distance):
+    return [term_id for term_id, candidate in enumerate(VOCAB)
+            if search.edit_distance(term, candidate, max_distance) <= max_distance]
+
+
+@pytest.mark.parametrize("term, max_distance", [('a', 1), ('q', 1), ('at', 2), ('sto', 3), ('x', 3)])
+def test_short_term_neighbors(term, max_distance):
+    # Too short for the bigram filter; the character-count filter must not lose any neighbour
+    index = search.VocabularyGramIndex(VOCAB)
+    assert sorted(index.neighbors(term, max_distance, VOCAB)) == brute_force_neighbors(term, max_distance)
+
+
+def test_short_term_filter_skips_distant_terms():
+    index = search.VocabularyGramIndex(VOCAB)
+    assert [VOCAB[term_id] for term_id in index.neighbors('q', 1, VOCAB)] == ['a', 'b', 'q', 'qq']
@@ -0,0 +1,36 @@
+import pytest
+
+import search
+
+
+@pytest.mark.parametrize("text", ['"', '""', '" "'])
+def test_empty_phrase_is_a_syntax_error(text):
+    with pytest.raises(search.QuerySyntaxError):
+        search.parse_query(text)
+
+
+def test_punctuation_phrase_is_a_literal():
+    assert search.parse_query('"..."') == ('literal', '...')
+
+
+def test_phrase_words():
+    assert search.parse_query('"Storm  Rain"') == ('words', ('storm', 'rain'))
+
+
+@pytest.mark.parametrize("previous, text", [
+    ("god", "god bless"),
+    ("god bl", "god bless"),
+    ('"the sto', '"the storm"'),
+])
+def test_typing_further_is_a_refinement(previous, text):
+    assert search.is_refinement(previous, text)
+
+
+@pytest.mark.parametrize("previous, text", [
+    ("god AN", "god AND bless"),
+    ("future O", "future OR past"),
+    ("god N", "god NOT bless"),
+    ("god bless", "god blue"),
+])
+def test_half_typed_operator_is_not_a_refinement(previous, text):
+    assert not search.is_refinement(previous, text)
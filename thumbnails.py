@@ -0,0 +1,70 @@
+import os
+import threading
+
+from PIL import Image, ImageTk
+
+import utils
+
+# Formats a thumbnail can be saved to PNG in as-is; anything else (CMYK, YCbCr, ...) is converted
+_PNG_MODES = ('1', 'L', 'LA', 'P', 'RGB', 'RGBA')
+
+class ThumbnailCache:
+    """
+    Serves size-keyed thumbnails of downloaded images. A thumbnail is
+    generated once and stored in thumbnail_dir, and regenerated only when
+    the original is newer than it. The most recently used PhotoImages are
+    also kept in memory, so redisplaying an image reads no file at all.
+
+    load_image only touches files and PIL and may run on a worker thread;
+    the PhotoImage methods must be called from the Tk main thread.
+    """
+
+    def __init__(self, thumbnail_dir, maxsize):
+        self.thumbnail_dir = thumbnail_dir
+        self.photos = utils.LRUCache(maxsize)
+
+    def thumbnail_path(self, source_path, size):
+        """Returns where the thumbnail of source_path at size is stored."""
+        return os.path.join(self.thumbnail_dir, f"{os.path.basename(source_path)}_{size[0]}x{size[1]}.png")
+
+    def load_image(self, source_path, size):
+        """
+        Returns the thumbnail of source_path, scaled to fit size, as a PIL
+        image. The stored thumbnail is used while it is at least as new as
+        the original; otherwise it is regenerated from the original and saved.
+        """
+        thumb_path = self.thumbnail_path(source_path, size)
+        try:
+            if os.path.getmtime(thumb_path) >= os.path.getmtime(source_path):
+                img = Image.open(thumb_path)
+                img.load()
+                return img
+        except OSError:
+            pass # Missing, stale-checked against a missing original, or unreadable: regenerate
+
+        img = Image.open(source_path)
+        img.thumbnail(size)
+        if img.mode not in _PNG_MODES:
+            img = img.convert('RGBA' if 'A' in img.mode else 'RGB')
+        try:
+            os.makedirs(self.thumbnail_dir, exist_ok=True)
+            tmp_path = f"{thumb_path}.{threading.get_ident()}.tmp"
+            img.save(tmp_path, format='PNG')
+            os.replace(tmp_path, thumb_path)
+        except OSError as e:
+            print(f"Could not save thumbnail {thumb_path}: {e}")
+        return img
+
+    def get_cached_photo(self, source_path, size):
+        """Returns the in-memory PhotoImage of the thumbnail of source_path at size, or None."""
+        return self.photos.get((source_path, tuple(size)))
+
+    def add_photo(self, source_path, size, img):
+        """Wraps a thumbnail returned by load_image in a PhotoImage, keeps it in memory and returns it."""
+        photo = ImageTk.PhotoImage(img)
+        self.photos.put((source_path, tuple(size)), photo)
+        return photo
+
+    def clear(self):
+        """Drops the in-memory PhotoImages; the thumbnails on disk are kept."""
+        self.photos.clear()
@@ -9,27 +9,114 @@ import platform
 import re
 import shutil
 import subprocess
+import threading
 import webbrowser
 import time
+from collections import OrderedDict
 import requests
 import pandas as pd
 from tkinter import messagebox
 from urllib.parse import urlparse, quote_plus
 from PIL import Image, ImageTk
 import config
+import matcher
 
 class TermColors:
     RESET, BOLD, LIGHT_RED, LIGHT_YELLOW, LIGHT_GRAY, BLUE, MAGENTA, GREEN, CYAN = "\033[0m", "\033[1m", "\033[91m", "\033[93m", "\033[90m", "\033[94m", "\033[95m", "\033[92m", "\033[96m"
 
+class LRUCache:
+    """
+    A dict-like cache holding at most maxsize entries, evicting the least
+    recently used one first. Counts hits, misses and evictions for stats().
+    """
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self.hits = self.misses = self.evictions = 0
+
+    def get(self, key, default=None):
+        if key in self._entries:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return self._entries[key]
+        self.misses += 1
+        return default
+
+    def put(self, key, value):
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        """Drops every entry; the counters keep running."""
+        self._entries.clear()
+
+    def values(self):
+        return list(self._entries.values())
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {'entries': len(self._entries), 'maxsize': self.maxsize, 'hits': self.hits,
+                'misses': self.misses, 'evictions': self.evictions,
+                'hit_rate': self.hits / lookups if lookups else 0.0}
+
+class ArticleIndex:
+    """
+    In-memory index of the saved articles in a directory, read with a single
+    os.scandir when first needed. Saved articles are named after their post
+    and the URL's domain (see article_filename), so looking one up by
+    (post, URL) is a set test instead of a file-system probe; the article
+    downloader records every article it saves.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        self._filenames = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def article_filename(post_id, url):
+        return f"{sanitize_filename_component(post_id)}-{sanitize_filename_component(get_domain(url))}.html"
+
+    def _names(self):
+        with self._lock:
+            if self._filenames is None:
+                try:
+                    with os.scandir(self.directory) as entries:
+                        self._filenames = {entry.name for entry in entries if entry.is_file()}
+                except OSError:
+                    self._filenames = set()
+        return self._filenames
+
+    def lookup(self, post_id, url):
+        """Returns (exists, path) for the article of url saved for post_id."""
+        filename = self.article_filename(post_id, url)
+        return filename in self._names(), os.path.join(self.directory, filename)
+
+    def add(self, path):
+        """Records an article just saved at path."""
+        self._names().add(os.path.basename(path))
+
+    def refresh(self):
+        """Forgets the index so the next lookup rescans the directory, e.g. after files changed on disk."""
+        with self._lock:
+            self._filenames = None
+
+# Shared index of config.LINKED_ARTICLES_DIR
+article_index = ArticleIndex(config.LINKED_ARTICLES_DIR)
+
 def tag_post_with_themes(post_text):
     if not isinstance(post_text, str) or not post_text.strip(): return []
-    found_themes = set()
-    post_text_lower = post_text.lower()
-    for theme, keywords in config.THEMES.items():
-        for keyword in keywords:
-            if isinstance(keyword, str) and keyword.lower() in post_text_lower:
-                found_themes.add(theme); break
-    return sorted(list(found_themes))
+    return sorted(matcher.find_themes(post_text))
 
 def get_chrome_path():
     if platform.system() == "Windows":
@@ -123,8 +210,7 @@ def get_domain(url):
     except: return "unknown_domain"
 
 def check_article_exists_util(post_id, url):
-    filename = f"{sanitize_filename_component(post_id)}-{sanitize_filename_component(get_domain(url))}.html"
-    return os.path.exists(os.path.join(config.LINKED_ARTICLES_DIR, filename)), os.path.join(config.LINKED_ARTICLES_DIR, filename)
+    return article_index.lookup(post_id, url)
 
 def _download_image(url, path):
     try:
@@ -176,6 +262,10 @@ def download_all_quoted_images_util(df, status_callback=None, progress_callback=
 
 # --- START NEW AND CORRECTED FUNCTIONS ---
 
+def is_syncable_url(url):
+    """Checks if the article sync fetches a URL at all: only http(s) URLs are downloaded."""
+    return bool(url) and url.startswith(("http:", "https:"))
+
 def is_excluded_domain(url, excluded_list):
     """Checks if a URL's domain is in the exclusion list."""
     try:
@@ -198,21 +288,27 @@ def download_article_util(url, path):
     except Exception as e:
         return False, str(e)
 
-def scan_and_download_all_articles_util(df, status_callback=None, progress_callback=None):
+def scan_and_download_all_articles_util(df, status_callback=None, progress_callback=None, urls_for_row=None):
+    """
+    Downloads the article behind every URL in the posts' Text and Link.
+    urls_for_row optionally returns the precomputed URLs of the Text at a
+    row position of df (see data.urls_for_row); otherwise each Text is scanned.
+    """
     if status_callback: status_callback("Preparing to download articles...")
     os.makedirs(config.LINKED_ARTICLES_DIR, exist_ok=True)
+    article_index.refresh() # One rescan picks up articles added or removed outside the app
     total, downloaded, skipped, errors, excluded, processed = len(df), 0, 0, 0, 0, 0
-    for index, post in df.iterrows():
+    for row, (index, post) in enumerate(df.iterrows()):
         processed += 1
         if progress_callback: progress_callback(processed, total)
         if status_callback and processed % 20 == 0: status_callback(f"Articles: Post {processed}/{total}. D:{downloaded}, S:{skipped}, E:{errors}")
         
-        urls_to_scan = set(_extract_urls_from_text(post.get("Text", "")))
+        urls_to_scan = set(urls_for_row(row) if urls_for_row else _extract_urls_from_text(post.get("Text", "")))
         if post.get("Link") and isinstance(post.get("Link"), str):
             urls_to_scan.add(post.get("Link"))
 
         for url in urls_to_scan:
-            if not url or not url.startswith(("http:", "https:")):
+            if not is_syncable_url(url):
                 continue
             if is_excluded_domain(url, config.EXCLUDED_LINK_DOMAINS):
                 excluded += 1
@@ -227,6 +323,7 @@ def scan_and_download_all_articles_util(df, status_callback=None, progress_callb
             time.sleep(0.1) # Be polite to servers
             success, err_msg = download_article_util(url, filepath)
             if success:
+                article_index.add(filepath)
                 downloaded += 1
             else:
                 errors += 1